@@ -6,7 +6,7 @@
 """
 
 import logging
-from typing import Dict, Any, Tuple, Optional
+from typing import Callable, Dict, Any, Iterable, List, Tuple, Optional
 from .base_controller import BaseController
 from ..features.stock_fetcher import StockDataFetcher
 from ..features.stock_manager import StockDataManager
@@ -21,23 +21,27 @@ class DataController(BaseController):
         self.fetcher = StockDataFetcher()
         self.manager = StockDataManager()
     
-    def initialize(self) -> bool:
+    def initialize(self, config: Optional[Dict] = None) -> bool:
         """
         初始化控制器及其组件
         
+        参数：
+            config: 按模块名称组织的配置，如{'fetcher': {...}, 'manager': {...}}
+            
         返回值：
             bool: 如果初始化成功返回True，否则返回False
         """
         try:
             self.register_module("fetcher", self.fetcher)
             self.register_module("manager", self.manager)
-            return self.initialize_modules()
+            return self.initialize_modules(config)
         except Exception as e:
             self.logger.error(f"控制器初始化错误：{str(e)}")
             return False
     
     def get_stock_data(self, code: str, frequency: str = '1d',
-                      count: int = 5, end_date: str = '') -> Tuple[bool, Any]:
+                      count: int = 5, end_date: str = '',
+                      incremental: bool = False) -> Tuple[bool, Any]:
         """
         使用数据管理器获取股票数据
         
@@ -46,19 +50,102 @@ class DataController(BaseController):
             frequency: 数据频率
             count: 数据点数量
             end_date: 结束日期
+            incremental: 是否只获取已保存数据之后的新K线
             
         返回值：
             Tuple[bool, Any]: (成功标志, 数据或错误信息)
         """
         try:
             return self.manager.get_and_save_stock_data(
-                code, frequency, count, end_date
+                code, frequency, count, end_date, incremental
             )
         except Exception as e:
             error_msg = f"获取股票数据失败：{str(e)}"
             self.logger.error(error_msg)
             return False, error_msg
     
+    def get_stock_data_batch(self, codes: List[str], frequency: str = '1d',
+                             count: int = 5, end_date: str = '',
+                             incremental: bool = False) -> Dict[str, Tuple[bool, Any]]:
+        """
+        使用数据管理器并发获取多只股票的数据
+        
+        参数：
+            codes: 股票代码列表
+            frequency: 数据频率
+            count: 数据点数量
+            end_date: 结束日期
+            incremental: 是否只获取已保存数据之后的新K线
+            
+        返回值：
+            Dict[str, Tuple[bool, Any]]: 每只股票的(成功标志, 数据或错误信息)
+        """
+        try:
+            return self.manager.get_and_save_stock_data_batch(
+                codes, frequency, count, end_date, incremental
+            )
+        except Exception as e:
+            error_msg = f"批量获取股票数据失败：{str(e)}"
+            self.logger.error(error_msg)
+            return {code: (False, error_msg) for code in codes}
+    
+    def resolve_universe(self, names: List[str]) -> List[str]:
+        """
+        将市场节点和股票代码展开为股票代码列表
+        
+        参数：
+            names: 市场节点（如'sh_a'、'sz_a'）或股票代码
+            
+        返回值：
+            List[str]: 去重后的股票代码列表
+        """
+        codes = []
+        for name in names:
+            if '_' in name:
+                codes.extend(self.fetcher.security_master.node_codes(name))
+            else:
+                codes.append(name)
+        return list(dict.fromkeys(codes))
+    
+    def backfill(self, codes: List[str], frequencies: List[str], count: int = 800,
+                 workers: Optional[int] = None, incremental: bool = False,
+                 on_result: Optional[Callable[[Tuple[str, str], bool, Any], None]] = None,
+                 skip: Iterable[Tuple[str, str]] = ()) -> Dict[Tuple[str, str], Tuple[bool, Any]]:
+        """
+        使用数据管理器的多进程工作池批量下载数据
+        
+        参数：
+            codes: 股票代码列表
+            frequencies: 数据频率列表
+            count: 每只股票获取的数据点数量
+            workers: 工作进程数，默认为CPU核数
+            incremental: 是否只获取已保存数据之后的新K线
+            on_result: 结果回调，见StockDataManager.backfill
+            skip: 不需要下载的(股票, 频率)
+            
+        返回值：
+            Dict[Tuple[str, str], Tuple[bool, Any]]: 每个(股票, 频率)的(成功标志, 文件路径或错误信息)
+        """
+        try:
+            return self.manager.backfill(codes, frequencies, count, workers=workers,
+                                         incremental=incremental, on_result=on_result, skip=skip)
+        except Exception as e:
+            error_msg = f"批量下载失败：{str(e)}"
+            self.logger.error(error_msg)
+            return {}
+    
+    def get_stock_names(self, codes: List[str]) -> Dict[str, str]:
+        """
+        使用数据获取器批量获取股票名称
+        
+        参数：
+            codes: 股票代码列表
+            
+        返回值：
+            Dict[str, str]: 每只股票的名称，未获取到的为"未知股票"
+        """
+        return self.fetcher.get_stock_names(codes)
+    
     def search_stock(self, keyword: str) -> list:
         """
         使用数据获取器搜索股票
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+按K线收盘时间轮询自选股的调度器
+
+每个分钟周期的K线收盘后稍等片刻唤醒一次，只增量获取该周期刚刚收盘的股票；
+一轮获取耗时超过下一个收盘时间时不会叠加执行，下一轮按最近的收盘时间一次补齐
+"""
+
+import threading
+import logging
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Any
+from .data_controller import DataController
+from ..utils.trading_time import FREQUENCY_MINUTES, last_bar_close, next_bar_close
+
+logger = logging.getLogger(__name__)
+
+class BarScheduler:
+    """自选股K线轮询调度器"""
+
+    def __init__(self, controller: DataController, delay: float = 3.0, count: int = 800,
+                 retry_interval: float = 30.0, clock: Callable[[], datetime] = datetime.now):
+        """
+        参数：
+            controller: 已初始化的数据控制器
+            delay: K线收盘后等待数据源生成该K线的秒数
+            count: 没有已保存数据时每只股票获取的数据点数量
+            retry_interval: 有股票获取失败时，距下一次重试的最长秒数
+            clock: 返回当前时间的函数
+        """
+        self.controller = controller
+        self.delay = timedelta(seconds=delay)
+        self.count = count
+        self.retry_interval = retry_interval
+        self.clock = clock
+        self.logger = logger
+        # 周期 -> 股票代码
+        self._watchlist: Dict[str, Set[str]] = {}
+        # (周期, 股票代码) -> 已获取的最近一根K线的收盘时间
+        self._fetched: Dict[Tuple[str, str], datetime] = {}
+        self._lock = threading.Lock()
+        self._tick_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {'ticks': 0, 'collapsed': 0, 'requests': 0, 'failed': 0}
+
+    def watch(self, code: str, frequencies: Iterable[str]):
+        """
+        添加自选股
+
+        参数：
+            code: 股票代码
+            frequencies: 分钟线周期，如['1m', '5m']
+        """
+        frequencies = list(frequencies)
+        unknown = [frequency for frequency in frequencies if frequency not in FREQUENCY_MINUTES]
+        if unknown:
+            raise ValueError(f"不支持的轮询周期：{', '.join(unknown)}")
+        with self._lock:
+            for frequency in frequencies:
+                self._watchlist.setdefault(frequency, set()).add(code)
+
+    def unwatch(self, code: str, frequency: Optional[str] = None):
+        """
+        移除自选股
+
+        参数：
+            code: 股票代码
+            frequency: 分钟线周期，None表示全部周期
+        """
+        with self._lock:
+            for key in [frequency] if frequency else list(self._watchlist):
+                codes = self._watchlist.get(key)
+                if codes is None:
+                    continue
+                codes.discard(code)
+                self._fetched.pop((key, code), None)
+                if not codes:
+                    del self._watchlist[key]
+
+    def due(self, now: Optional[datetime] = None) -> Dict[str, Tuple[datetime, List[str]]]:
+        """
+        获取已有新K线收盘、需要获取的股票
+
+        参数：
+            now: 当前时间，默认为clock()
+
+        返回值：
+            Dict[str, Tuple[datetime, List[str]]]: 周期 -> (最近一根K线的收盘时间, 尚未获取这根K线的股票代码)
+        """
+        # 收盘后delay秒数据源才会生成该K线
+        moment = (now or self.clock()) - self.delay
+        with self._lock:
+            result = {}
+            for frequency, codes in self._watchlist.items():
+                closed = last_bar_close(moment, frequency)
+                pending = sorted(code for code in codes if self._fetched.get((frequency, code)) != closed)
+                if pending:
+                    result[frequency] = (closed, pending)
+            return result
+
+    def next_wakeup(self, now: Optional[datetime] = None) -> Optional[datetime]:
+        """
+        获取下一次需要唤醒的时间：各周期下一根K线收盘时间的最小值加上delay
+
+        参数：
+            now: 当前时间，默认为clock()
+
+        返回值：
+            Optional[datetime]: 唤醒时间，自选股为空时返回None
+        """
+        moment = (now or self.clock()) - self.delay
+        with self._lock:
+            frequencies = list(self._watchlist)
+        if not frequencies:
+            return None
+        return min(next_bar_close(moment, frequency) for frequency in frequencies) + self.delay
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, Dict[str, Tuple[bool, Any]]]:
+        """
+        获取全部到期周期的数据，已有一轮在执行时直接返回
+
+        参数：
+            now: 当前时间，默认为clock()
+
+        返回值：
+            Dict[str, Dict[str, Tuple[bool, Any]]]: 周期 -> 每只股票的(成功标志, 文件路径或错误信息)
+        """
+        if not self._tick_lock.acquire(blocking=False):
+            self._stats['collapsed'] += 1
+            return {}
+        try:
+            self._stats['ticks'] += 1
+            results = {}
+            for frequency, (closed, codes) in self.due(now).items():
+                results[frequency] = self.controller.get_stock_data_batch(
+                    codes, frequency, self.count, incremental=True)
+                failed = []
+                with self._lock:
+                    for code in codes:
+                        success, _ = results[frequency].get(code, (False, None))
+                        if not success:
+                            # 下一轮重新获取
+                            failed.append(code)
+                        elif code in self._watchlist.get(frequency, ()):
+                            self._fetched[(frequency, code)] = closed
+                self._stats['requests'] += len(codes)
+                self._stats['failed'] += len(failed)
+                if failed:
+                    self.logger.warning(f"{frequency} {closed} 获取失败：{', '.join(failed)}")
+            return results
+        finally:
+            self._tick_lock.release()
+
+    def run(self):
+        """在当前线程中循环执行，直到stop被调用"""
+        while not self._stop.is_set():
+            self.run_once()
+            wakeup = self.next_wakeup()
+            if wakeup is None:
+                timeout = 1.0
+            else:
+                timeout = max((wakeup - self.clock()).total_seconds(), 0.0)
+            if self.due():
+                timeout = min(timeout, self.retry_interval)
+            self._stop.wait(timeout)
+
+    def start(self) -> bool:
+        """
+        在后台线程中启动调度器
+
+        返回值：
+            bool: 如果启动成功返回True，已在运行时返回False
+        """
+        if self._thread is not None and self._thread.is_alive():
+            self.logger.warning("调度器已经在运行")
+            return False
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run, name='bar-scheduler', daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        停止调度器，等待正在进行的一轮获取结束
+
+        参数：
+            timeout: 等待后台线程退出的最长时间（秒）
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取统计信息
+
+        返回值：
+            Dict[str, int]: 执行轮数、被合并的重叠轮数、请求数和失败数
+        """
+        return dict(self._stats)
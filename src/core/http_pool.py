@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP连接池模块，为所有行情请求提供共享的长连接会话
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Optional
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+# 默认连接池配置
+DEFAULT_HTTP_CONFIG: Dict[str, Any] = {
+    'pool_connections': 10,   # 缓存的主机连接池数量
+    'pool_maxsize': 16,       # 每个主机保持的最大连接数
+    'pool_block': False,      # 连接数耗尽时是否阻塞等待
+    'max_retries': 0,         # 底层连接重试次数
+    'connect_timeout': 3.05,  # 连接超时（秒）
+    'read_timeout': 10.0,     # 读取超时（秒）
+    'keep_alive': True,       # 是否使用长连接
+    'compression': True,      # 是否协商gzip压缩
+}
+
+
+class _PoolCounters:
+    """连接池命中计数器（线程安全）"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.misses = 0
+
+    def record_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def record_miss(self):
+        with self._lock:
+            self.misses += 1
+
+
+def _counting_pool_class(base: type, counters: _PoolCounters) -> type:
+    """生成在建立TCP连接时计数的连接池类"""
+
+    class CountingConnection(base.ConnectionCls):
+        def connect(self):
+            counters.record_miss()
+            return super().connect()
+
+    class CountingConnectionPool(base):
+        ConnectionCls = CountingConnection
+
+    CountingConnectionPool.__name__ = f"Counting{base.__name__}"
+    return CountingConnectionPool
+
+
+class _CountingAdapter(HTTPAdapter):
+    """记录新建连接次数的HTTP适配器"""
+
+    def __init__(self, counters: _PoolCounters, **kwargs):
+        self._counters = counters
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: _counting_pool_class(cls, self._counters)
+            for scheme, cls in self.poolmanager.pool_classes_by_scheme.items()
+        }
+
+
+class HttpPool:
+    """HTTP连接池类，按主机复用长连接并统计连接复用情况"""
+
+    def __init__(self, config: Optional[Dict] = None):
+        self.config = dict(DEFAULT_HTTP_CONFIG)
+        self.config.update(config or {})
+        self.timeout = (self.config['connect_timeout'], self.config['read_timeout'])
+        self._counters = _PoolCounters()
+        self.session = self._create_session()
+
+    def _create_session(self) -> requests.Session:
+        """
+        创建挂载了连接池适配器的会话
+
+        返回值：
+            requests.Session: 配置好的会话对象
+        """
+        session = requests.Session()
+        adapter = _CountingAdapter(
+            self._counters,
+            pool_connections=self.config['pool_connections'],
+            pool_maxsize=self.config['pool_maxsize'],
+            pool_block=self.config['pool_block'],
+            max_retries=self.config['max_retries'],
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+
+        session.headers['Connection'] = 'keep-alive' if self.config['keep_alive'] else 'close'
+        session.headers['Accept-Encoding'] = 'gzip, deflate' if self.config['compression'] else 'identity'
+        return session
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        通过连接池发送GET请求
+
+        参数：
+            url: 请求地址
+            **kwargs: 传递给requests的其他参数，未指定timeout时使用连接池的超时配置
+
+        返回值：
+            requests.Response: 响应对象
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        self._counters.record_request()
+        return self.session.get(url, **kwargs)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取连接池统计信息
+
+        返回值：
+            Dict[str, int]: 请求数、连接复用命中数和新建连接数
+        """
+        requests_count = self._counters.requests
+        misses = self._counters.misses
+        return {
+            'requests': requests_count,
+            'hits': max(requests_count - misses, 0),
+            'misses': misses,
+        }
+
+    def close(self):
+        """关闭会话并释放所有连接"""
+        self.session.close()
+
+
+_default_pool: Optional[HttpPool] = None
+_default_pool_lock = threading.Lock()
+
+
+def get_default_pool() -> HttpPool:
+    """
+    获取进程内共享的默认连接池
+
+    返回值：
+        HttpPool: 默认连接池
+    """
+    global _default_pool
+    if _default_pool is None:
+        with _default_pool_lock:
+            if _default_pool is None:
+                _default_pool = HttpPool()
+    return _default_pool
+
+
+def set_default_pool(pool: Optional[HttpPool]):
+    """
+    替换默认连接池，传入None时在下次使用时重新创建
+
+    注意：旧连接池不会被关闭，子进程中丢弃继承的连接池时不会影响父进程的连接
+
+    参数：
+        pool: 新的默认连接池
+    """
+    global _default_pool
+    with _default_pool_lock:
+        _default_pool = pool
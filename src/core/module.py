@@ -7,6 +7,7 @@
 
 import logging
 from typing import Dict, Any, Optional
+from .http_pool import HttpPool, get_default_pool
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,7 @@ class ModuleBase:
         self.logger = logger
         self.initialized = False
         self.config: Optional[Dict] = None
+        self._http_pool: Optional[HttpPool] = None
     
     def initialize(self, config: Dict = None) -> bool:
         """
@@ -63,3 +65,25 @@ class ModuleBase:
         if not self.config:
             return default
         return self.config.get(key, default)
+    
+    def get_http_pool(self) -> HttpPool:
+        """
+        获取模块使用的HTTP连接池
+        
+        配置项'http_pool'可直接注入HttpPool实例，配置项'http'可提供
+        连接池参数为本模块创建独立连接池，否则使用进程内共享的默认连接池
+        
+        返回值：
+            HttpPool: HTTP连接池
+        """
+        pool = self.get_config('http_pool')
+        if isinstance(pool, HttpPool):
+            return pool
+        
+        http_config = self.get_config('http')
+        if http_config:
+            if self._http_pool is None:
+                self._http_pool = HttpPool(http_config)
+            return self._http_pool
+        
+        return get_default_pool()
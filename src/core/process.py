@@ -3,11 +3,19 @@
 
 """
 进程管理模块，用于管理和监控系统进程
+
+WorkerPool在ProcessManager之上提供多进程工作池：任务列表按轮询分片到各工作进程的
+任务队列，每个工作进程使用独立的HTTP连接池，结果经同一个结果队列流式返回；
+失败的任务换一个工作进程重试，异常退出的工作进程会被重启
 """
 
+import time
+import queue
+import signal
 import logging
 import multiprocessing as mp
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Set, Tuple
+from .http_pool import HttpPool, set_default_pool
 
 logger = logging.getLogger(__name__)
 
@@ -66,3 +74,297 @@ class ProcessManager:
         except Exception as e:
             self.logger.error(f"停止进程失败：{str(e)}")
             return False
+    
+    def join_process(self, name: str, timeout: Optional[float] = None) -> bool:
+        """
+        等待指定进程结束，结束后从进程表中移除
+        
+        参数：
+            name: 进程名称
+            timeout: 最长等待时间（秒），None表示一直等待
+            
+        返回值：
+            bool: 如果进程已结束返回True，否则返回False
+        """
+        process = self.processes.get(name)
+        if not process:
+            return True
+        process.join(timeout)
+        if process.is_alive():
+            return False
+        del self.processes[name]
+        return True
+    
+    def is_alive(self, name: str) -> bool:
+        """
+        检查指定进程是否仍在运行
+        
+        参数：
+            name: 进程名称
+            
+        返回值：
+            bool: 如果进程存在且在运行返回True，否则返回False
+        """
+        process = self.processes.get(name)
+        return process is not None and process.is_alive()
+
+def _worker_main(worker_id: int, tasks, results, stop, func: Callable, initializer: Optional[Callable],
+                 initargs: tuple, http_config: Optional[Dict]):
+    """
+    工作进程主循环：逐个取出任务执行，开始和结束时各发送一条消息
+
+    继承自父进程的连接池被替换为本进程新建的连接池，任务中通过get_default_pool
+    或ModuleBase.get_http_pool发出的请求都使用本进程的长连接
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # 中断由父进程统一处理
+    pool = HttpPool(http_config)
+    set_default_pool(pool)
+    try:
+        if initializer is not None:
+            initializer(*initargs)
+        while not stop.is_set():
+            item = tasks.get()
+            if item is None or stop.is_set():
+                break
+            results.put(('started', worker_id, item, None, None))
+            start = time.perf_counter()
+            try:
+                value = func(item)
+                results.put(('done', worker_id, item, True, (value, time.perf_counter() - start)))
+            except Exception as e:
+                results.put(('done', worker_id, item, False, (f"{type(e).__name__}: {e}", time.perf_counter() - start)))
+    finally:
+        pool.close()
+        set_default_pool(None)
+
+class WorkerPool:
+    """多进程工作池，任务函数和任务项需可被pickle"""
+    
+    def __init__(self, func: Callable[[Any], Any], workers: Optional[int] = None, retries: int = 2,
+                 initializer: Optional[Callable] = None, initargs: tuple = (),
+                 http_config: Optional[Dict] = None, max_restarts: Optional[int] = None,
+                 name: str = 'worker', process_manager: Optional[ProcessManager] = None):
+        """
+        参数：
+            func: 任务函数，接受一个任务项并返回结果，抛出异常表示失败
+            workers: 工作进程数，默认为CPU核数
+            retries: 每个任务失败后的最多重试次数
+            initializer: 每个工作进程启动时调用一次的初始化函数
+            initargs: 初始化函数的参数
+            http_config: 工作进程连接池的配置，见HttpPool
+            max_restarts: 工作进程异常退出后最多重启的总次数，默认等于工作进程数
+            name: 工作进程名称前缀
+            process_manager: 管理工作进程的ProcessManager，默认新建
+        """
+        self.func = func
+        self.workers = max(1, workers or mp.cpu_count())
+        self.retries = retries
+        self.initializer = initializer
+        self.initargs = initargs
+        self.http_config = http_config
+        self.max_restarts = self.workers if max_restarts is None else max_restarts
+        self.name = name
+        self.process_manager = process_manager or ProcessManager()
+        self.logger = logger
+        self._stats: Dict[str, Any] = {}
+        self._reset()
+    
+    def _reset(self):
+        self._queues: List[Any] = []
+        self._results = None
+        self._stop = None
+        self._pending: List[Set] = []
+        self._running: List[Any] = []
+        self._attempts: Dict[Any, int] = {}
+        self._finished: Set = set()
+    
+    def _process_name(self, worker_id: int) -> str:
+        return f"{self.name}-{worker_id}"
+    
+    def _start_worker(self, worker_id: int) -> bool:
+        return self.process_manager.start_process(
+            self._process_name(worker_id), _worker_main,
+            (worker_id, self._queues[worker_id], self._results, self._stop, self.func,
+             self.initializer, self.initargs, self.http_config))
+    
+    def _submit(self, worker_id: int, item: Any):
+        self._pending[worker_id].add(item)
+        self._queues[worker_id].put(item)
+    
+    def run(self, items: Iterable, progress: Optional[Callable[[int, int, Any, bool], None]] = None
+            ) -> Iterator[Tuple[Any, bool, Any]]:
+        """
+        执行全部任务，按完成顺序逐个返回结果，迭代结束或中途退出时关闭工作进程
+        
+        参数：
+            items: 任务项，重复的任务项只执行一次
+            progress: 进度回调，每个任务最终完成时以(已完成数, 总数, 任务项, 是否成功)调用
+            
+        返回值：
+            Iterator[Tuple[Any, bool, Any]]: (任务项, 是否成功, 结果或错误信息)
+        """
+        items = list(dict.fromkeys(items))
+        total = len(items)
+        self._stats = {'total': total, 'done': 0, 'succeeded': 0, 'failed': 0, 'retried': 0,
+                       'restarts': 0, 'elapsed': 0.0, 'task_seconds': 0.0}
+        if not total:
+            return
+        started_at = time.perf_counter()
+        workers = min(self.workers, total)
+        context = mp.get_context()
+        self._results = context.Queue()
+        self._stop = context.Event()
+        self._queues = [context.Queue() for _ in range(workers)]
+        self._pending = [set() for _ in range(workers)]
+        self._running = [None] * workers
+        self._attempts = {item: 0 for item in items}
+        try:
+            # 轮询分片，各工作进程的任务量相差不超过1
+            for index, item in enumerate(items):
+                self._submit(index % workers, item)
+            for worker_id in range(workers):
+                if not self._start_worker(worker_id):
+                    raise RuntimeError(f"启动工作进程失败：{self._process_name(worker_id)}")
+            
+            while self._stats['done'] < total:
+                try:
+                    kind, worker_id, item, success, payload = self._results.get(timeout=0.5)
+                except queue.Empty:
+                    for result in self._recover_workers(workers):
+                        yield self._finish(result, total, progress)
+                    continue
+                if kind == 'started':
+                    self._pending[worker_id].discard(item)
+                    self._running[worker_id] = item
+                    continue
+                if self._running[worker_id] == item:
+                    self._running[worker_id] = None
+                if item in self._finished:  # 异常退出的进程中已按失败处理的任务，结果迟到
+                    continue
+                value, seconds = payload
+                self._stats['task_seconds'] += seconds
+                result = self._complete(worker_id, item, success, value)
+                if result is not None:
+                    yield self._finish(result, total, progress)
+        finally:
+            self._stats['elapsed'] = time.perf_counter() - started_at
+            self.shutdown()
+    
+    def _complete(self, worker_id: int, item: Any, success: bool, value: Any) -> Optional[Tuple[Any, bool, Any]]:
+        """处理一次执行结果，失败且可重试时提交给下一个工作进程，返回None"""
+        if success:
+            return item, True, value
+        self._attempts[item] += 1
+        if self._attempts[item] > self.retries:
+            return item, False, value
+        self._stats['retried'] += 1
+        self.logger.warning(f"{item} 第{self._attempts[item]}次执行失败，重试：{value}")
+        workers = len(self._queues)
+        for offset in range(1, workers + 1):
+            target = (worker_id + offset) % workers
+            if self.process_manager.is_alive(self._process_name(target)):
+                self._submit(target, item)
+                return None
+        return item, False, value
+    
+    def _finish(self, result: Tuple[Any, bool, Any], total: int, progress) -> Tuple[Any, bool, Any]:
+        self._finished.add(result[0])
+        self._stats['done'] += 1
+        self._stats['succeeded' if result[1] else 'failed'] += 1
+        if progress is not None:
+            try:
+                progress(self._stats['done'], total, result[0], result[1])
+            except Exception as e:
+                self.logger.error(f"进度回调失败：{str(e)}")
+        return result
+    
+    def _recover_workers(self, workers: int) -> List[Tuple[Any, bool, Any]]:
+        """
+        检查异常退出的工作进程：正在执行的任务计为一次失败，未执行的任务交给重启的进程，
+        超过重启次数时交给其他存活的进程
+        """
+        finished = []
+        for worker_id in range(workers):
+            name = self._process_name(worker_id)
+            if self.process_manager.is_alive(name):
+                continue
+            if not self._pending[worker_id] and self._running[worker_id] is None:
+                continue
+            self.process_manager.join_process(name, 0)
+            self.logger.error(f"工作进程 {name} 异常退出")
+            
+            failed, self._running[worker_id] = self._running[worker_id], None
+            outstanding = list(self._pending[worker_id])
+            self._pending[worker_id] = set()
+            self._queues[worker_id].cancel_join_thread()
+            self._queues[worker_id] = mp.get_context().Queue()
+            
+            restarted = self._stats['restarts'] < self.max_restarts and self._start_worker(worker_id)
+            if restarted:
+                self._stats['restarts'] += 1
+            alive = [i for i in range(workers) if self.process_manager.is_alive(self._process_name(i))]
+            if not alive:
+                finished.extend((item, False, "没有可用的工作进程") for item in outstanding)
+                outstanding = []
+                if failed is not None:
+                    finished.append((failed, False, "工作进程异常退出"))
+                continue
+            for index, item in enumerate(outstanding):
+                self._submit(worker_id if restarted else alive[index % len(alive)], item)
+            if failed is not None:
+                result = self._complete(worker_id, failed, False, "工作进程异常退出")
+                if result is not None:
+                    finished.append(result)
+        return finished
+    
+    def map(self, items: Iterable, progress: Optional[Callable[[int, int, Any, bool], None]] = None
+            ) -> Dict[Any, Tuple[bool, Any]]:
+        """
+        执行全部任务并收集结果
+        
+        参数：
+            items: 任务项
+            progress: 进度回调，见run
+            
+        返回值：
+            Dict[Any, Tuple[bool, Any]]: 每个任务项的(是否成功, 结果或错误信息)
+        """
+        return {item: (success, value) for item, success, value in self.run(items, progress)}
+    
+    def shutdown(self, timeout: float = 5.0):
+        """
+        关闭工作进程：通知停止并等待正在执行的任务结束，超时后强制终止
+        
+        参数：
+            timeout: 等待工作进程退出的最长时间（秒）
+        """
+        if self._stop is None:
+            return
+        self._stop.set()
+        for task_queue in self._queues:
+            task_queue.put(None)
+            task_queue.cancel_join_thread()
+        deadline = time.monotonic() + timeout
+        names = [self._process_name(i) for i in range(len(self._queues))]
+        while names and time.monotonic() < deadline:
+            # 持续取出结果队列中的消息，避免工作进程因结果未写完而无法退出
+            try:
+                while True:
+                    self._results.get_nowait()
+            except queue.Empty:
+                pass
+            names = [name for name in names if not self.process_manager.join_process(name, 0.05)]
+        for name in names:
+            self.logger.warning(f"工作进程 {name} 未能按时退出，强制终止")
+            self.process_manager.stop_process(name)
+        self._results.cancel_join_thread()
+        self._reset()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        获取最近一次运行的统计信息
+        
+        返回值：
+            Dict[str, Any]: 总数、完成数、成功数、失败数、重试次数、重启次数、总耗时和任务累计耗时（秒）
+        """
+        return dict(self._stats)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+批量下载的检查点日志
+
+第一行记录本次下载的参数，之后每完成一个(股票, 频率)追加一行结果，
+进程中途退出后用相同参数重新运行时跳过已成功的任务
+"""
+
+import os
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+class FetchJournal:
+    """追加写入的JSON Lines检查点文件"""
+
+    def __init__(self, path: str, params: Dict[str, Any]):
+        """
+        参数：
+            path: 日志文件路径
+            params: 下载参数，与已有日志的参数不同时重新开始
+        """
+        self.path = path
+        self.params = params
+        self.completed: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._file = None
+
+    def open(self, restart: bool = False) -> int:
+        """
+        打开日志，参数相同时加载已成功的任务
+
+        参数：
+            restart: 是否忽略已有的日志重新开始
+
+        返回值：
+            int: 已成功的任务数
+        """
+        self.completed = {}
+        if not restart and os.path.exists(self.path):
+            self._load()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if self.completed:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        else:
+            self._file = open(self.path, 'w', encoding='utf-8')
+            self._write({'params': self.params, 'started': datetime.now().isoformat(timespec='seconds')})
+        return len(self.completed)
+
+    def _load(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        try:
+            header = json.loads(lines[0]) if lines else {}
+        except ValueError:
+            header = {}
+        if header.get('params') != self.params:
+            logger.info(f"检查点日志的参数不同，重新开始：{self.path}")
+            return
+        for line in lines[1:]:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # 进程退出时未写完的最后一行
+                continue
+            if entry.get('ok'):
+                self.completed[(entry['code'], entry['frequency'])] = entry
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        self._file.flush()
+
+    def record(self, task: Tuple[str, str], success: bool, value: Any):
+        """
+        记录一个任务的结果
+
+        参数：
+            task: (股票, 频率)
+            success: 是否成功
+            value: 成功时为包含bars、bytes的字典，失败时为错误信息
+        """
+        code, frequency = task
+        entry = {'code': code, 'frequency': frequency, 'ok': success}
+        if success:
+            entry.update(bars=value.get('bars', 0), bytes=value.get('bytes', 0))
+            self.completed[task] = entry
+        else:
+            entry['error'] = str(value)
+        self._write(entry)
+
+    def close(self, remove: bool = False):
+        """
+        关闭日志
+
+        参数：
+            remove: 是否删除日志文件，全部任务成功后不再需要续传
+        """
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
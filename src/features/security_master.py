@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+证券主数据模块，维护本地持久化的全市场证券列表及名称检索索引
+"""
+
+import os
+import re
+import json
+import time
+import bisect
+import logging
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from ..core.module import ModuleBase
+from ..utils.file_utils import save_to_json, load_from_json
+from ..utils.pinyin import pinyin_initials
+
+logger = logging.getLogger(__name__)
+
+NODE_DATA_URL = ('http://vip.stock.finance.sina.com.cn/quotes_service/api/json_v2.php/'
+                 'Market_Center.getHQNodeData?page={page}&num={num}&sort=symbol&asc=1&node={node}')
+
+# 代码类关键词：'600000'、'sh6000'、'600000.xshg'
+_CODE_PATTERN = re.compile(r'^(?P<market>sh|sz|bj)?(?P<digits>\d+)(?:\.(?P<suffix>xshg|xshe))?$')
+_SUFFIX_MARKETS = {'xshg': 'sh', 'xshe': 'sz'}
+
+
+class SecurityMaster(ModuleBase):
+    """证券主数据类，分页下载全市场证券列表并在内存中建立n-gram倒排索引"""
+
+    def __init__(self):
+        super().__init__()
+        self.path = os.path.join("data", "cache", "security_master.json")
+        self.nodes = ['sz_a', 'sh_a']
+        self.page_size = 100
+        self.max_pages = 200
+        self.ttl = 24 * 3600
+        self.securities: List[Dict[str, str]] = []
+        self.updated_at = 0.0
+        self._exact_codes: Dict[str, List[int]] = {}
+        self._code_keys: List[Tuple[str, int]] = []
+        self._exact_texts: Dict[str, List[int]] = {}
+        self._text_keys: List[Tuple[str, int]] = []
+        self._ngram_index: Dict[str, Set[int]] = {}
+        self._markets: List[str] = []
+        self._texts: List[List[str]] = []
+
+    def initialize(self, config: Dict = None) -> bool:
+        """
+        初始化证券主数据
+
+        参数：
+            config: 配置字典，支持path、nodes、page_size、max_pages、ttl（秒）
+
+        返回值：
+            bool: 如果初始化成功返回True，否则返回False
+        """
+        if not super().initialize(config):
+            return False
+        self.path = self.get_config('path', self.path)
+        self.nodes = list(self.get_config('nodes', self.nodes))
+        self.page_size = self.get_config('page_size', self.page_size)
+        self.max_pages = self.get_config('max_pages', self.max_pages)
+        self.ttl = self.get_config('ttl', self.ttl)
+        return True
+
+    def is_fresh(self) -> bool:
+        """
+        检查内存中的证券列表是否在有效期内
+
+        返回值：
+            bool: 如果已加载且未过期返回True，否则返回False
+        """
+        return bool(self.securities) and time.time() - self.updated_at < self.ttl
+
+    def ensure_loaded(self) -> bool:
+        """
+        确保证券列表可用：优先使用内存数据，其次本地文件，过期后重新下载
+
+        下载失败时继续使用已过期的本地数据
+
+        返回值：
+            bool: 如果有可用的证券列表返回True，否则返回False
+        """
+        if not self.initialized:
+            self.initialize()
+        if self.is_fresh():
+            return True
+
+        if not self.securities:
+            self._load()
+            if self.is_fresh():
+                return True
+
+        if self.refresh():
+            return True
+        if self.securities:
+            logger.warning("证券列表更新失败，继续使用过期的本地数据")
+            return True
+        return False
+
+    def refresh(self) -> bool:
+        """
+        从新浪接口分页下载全市场证券列表，保存到本地并重建索引
+
+        返回值：
+            bool: 如果下载成功返回True，否则返回False
+        """
+        try:
+            securities = []
+            for node in self.nodes:
+                securities.extend(self._fetch_node(node))
+            if not securities:
+                logger.error("未获取到证券列表")
+                return False
+
+            self._set_securities(securities, time.time())
+            if not save_to_json(self.path, {'updated_at': self.updated_at,
+                                            'securities': self.securities}):
+                logger.warning(f"保存证券列表失败：{self.path}")
+            return True
+        except Exception as e:
+            logger.error(f"更新证券列表失败：{str(e)}")
+            return False
+
+    def _fetch_node(self, node: str) -> List[Dict[str, str]]:
+        """
+        分页下载某个市场节点的全部证券，遇到空列表或没有新数据的页时停止
+
+        某一页请求失败时抛出RuntimeError，避免把不完整的列表当作最新数据保存
+
+        参数：
+            node: 市场节点名称，如'sh_a'
+
+        返回值：
+            List[Dict[str, str]]: 证券列表
+        """
+        http = self.get_http_pool()
+        securities = []
+        seen = set()
+        for page in range(1, self.max_pages + 1):
+            url = NODE_DATA_URL.format(page=page, num=self.page_size, node=node)
+            response = http.get(url)
+            if response.status_code != 200 or not response.text:
+                raise RuntimeError(f"{node}第{page}页下载失败：HTTP {response.status_code}")
+
+            stocks = json.loads(response.text)
+            if not isinstance(stocks, list) or not stocks:
+                break
+
+            new_count = 0
+            for stock in stocks:
+                # 确保股票数据包含必要的字段
+                if isinstance(stock, dict) and 'name' in stock and 'symbol' in stock:
+                    if stock['symbol'] in seen:
+                        continue
+                    seen.add(stock['symbol'])
+                    securities.append({'code': stock['symbol'], 'name': stock['name']})
+                    new_count += 1
+            if new_count == 0:
+                break
+        return securities
+
+    def _load(self) -> bool:
+        """
+        从本地文件加载证券列表
+
+        返回值：
+            bool: 如果加载成功返回True，否则返回False
+        """
+        if not os.path.exists(self.path):
+            return False
+        data = load_from_json(self.path)
+        if not data or not data.get('securities'):
+            return False
+        self._set_securities(data['securities'], float(data.get('updated_at', 0)))
+        return True
+
+    def _set_securities(self, securities: List[Dict[str, str]], updated_at: float):
+        """设置证券列表并重建索引"""
+        self.securities = securities
+        self.updated_at = updated_at
+        self._build_index()
+
+    def _build_index(self):
+        """
+        建立检索索引：
+        代码键（纯数字代码、带市场前缀的代码）支持精确和前缀匹配；
+        文本键（小写名称、拼音首字母）支持精确、前缀和基于单字/双字倒排索引的子串匹配
+        """
+        exact_codes: Dict[str, List[int]] = {}
+        code_keys: List[Tuple[str, int]] = []
+        exact_texts: Dict[str, List[int]] = {}
+        text_keys: List[Tuple[str, int]] = []
+        ngram_index: Dict[str, Set[int]] = {}
+        markets: List[str] = []
+        texts: List[List[str]] = []
+
+        for idx, security in enumerate(self.securities):
+            market, digits = _split_code(security['code'])
+            markets.append(market)
+            for key in dict.fromkeys([digits, f"{market}{digits}"]):
+                exact_codes.setdefault(key, []).append(idx)
+            code_keys.append((digits, idx))
+
+            name = security['name'].lower()
+            texts.append(list(dict.fromkeys([name] + pinyin_initials(name))))
+            for key in texts[-1]:
+                exact_texts.setdefault(key, []).append(idx)
+                text_keys.append((key, idx))
+                for n in (1, 2):
+                    for i in range(len(key) - n + 1):
+                        ngram_index.setdefault(key[i:i + n], set()).add(idx)
+
+        code_keys.sort()
+        text_keys.sort()
+        self._exact_codes = exact_codes
+        self._code_keys = code_keys
+        self._exact_texts = exact_texts
+        self._text_keys = text_keys
+        self._ngram_index = ngram_index
+        self._markets = markets
+        self._texts = texts
+
+    def _candidates(self, keyword: str) -> Set[int]:
+        """
+        通过倒排索引求出可能包含关键词的证券编号
+
+        参数：
+            keyword: 小写的关键词
+
+        返回值：
+            Set[int]: 候选证券编号集合
+        """
+        n = 1 if len(keyword) == 1 else 2
+        grams = {keyword[i:i + n] for i in range(len(keyword) - n + 1)}
+        postings = []
+        for gram in grams:
+            posting = self._ngram_index.get(gram)
+            if not posting:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        return set.intersection(*postings)
+
+    def _text_contains(self, idx: int, keyword: str) -> bool:
+        """检查证券名称或其拼音首字母是否包含关键词"""
+        return any(keyword in key for key in self._texts[idx])
+
+    @staticmethod
+    def _prefix_range(keys: List[Tuple[str, int]], prefix: str) -> Iterator[int]:
+        """按键的字典序遍历以prefix开头的证券编号"""
+        for i in range(bisect.bisect_left(keys, (prefix, -1)), len(keys)):
+            key, idx = keys[i]
+            if not key.startswith(prefix):
+                break
+            yield idx
+
+    def _ranked(self, keyword: str) -> Iterator[int]:
+        """
+        按匹配等级依次产出证券编号：精确 > 前缀 > 子串
+
+        参数：
+            keyword: 小写的关键词
+
+        返回值：
+            Iterator[int]: 证券编号（可能重复，由调用方去重）
+        """
+        code_match = _CODE_PATTERN.match(keyword)
+        if code_match:
+            market = code_match.group('market') or code_match.group('suffix') or ''
+            market = _SUFFIX_MARKETS.get(market, market)
+            digits = code_match.group('digits')
+
+            def in_market(idx: int) -> bool:
+                return not market or self._markets[idx] == market
+
+            yield from filter(in_market, self._exact_codes.get(digits, []))
+            yield from filter(in_market, self._prefix_range(self._code_keys, digits))
+            return
+
+        yield from self._exact_texts.get(keyword, [])
+        yield from self._prefix_range(self._text_keys, keyword)
+
+        candidates = sorted(self._candidates(keyword),
+                            key=lambda i: (len(self.securities[i]['name']), i))
+        yield from (idx for idx in candidates if self._text_contains(idx, keyword))
+
+    def search(self, keyword: str, limit: Optional[int] = None) -> List[Dict[str, str]]:
+        """
+        检索证券，支持以下几种关键词：
+        数字代码前缀（'6000'）、带市场的代码（'sh600000'、'600000.XSHG'）、
+        名称子串（'浦发'）以及拼音首字母（'pfyh'）
+
+        结果按匹配等级排序：精确匹配 > 前缀匹配 > 子串匹配
+
+        参数：
+            keyword: 检索关键词
+            limit: 最多返回的结果数，默认返回全部
+
+        返回值：
+            List[Dict[str, str]]: 匹配的证券列表
+        """
+        keyword = keyword.strip().lower()
+        if not keyword or not self.ensure_loaded():
+            return []
+
+        matches = []
+        seen = set()
+        for idx in self._ranked(keyword):
+            if idx in seen:
+                continue
+            seen.add(idx)
+            matches.append(dict(self.securities[idx]))
+            if limit is not None and len(matches) >= limit:
+                break
+        return matches
+
+    def node_codes(self, node: str) -> List[str]:
+        """
+        获取一个市场节点的全部证券代码
+
+        配置的节点从本地证券列表中按市场前缀筛选，其他节点直接从新浪接口下载
+
+        参数：
+            node: 市场节点名称，如'sh_a'
+
+        返回值：
+            List[str]: 证券代码列表
+        """
+        if node in self.nodes:
+            if not self.ensure_loaded():
+                return []
+            market = node.split('_')[0]
+            return [security['code'] for security in self.securities if security['code'].startswith(market)]
+        try:
+            return [security['code'] for security in self._fetch_node(node)]
+        except Exception as e:
+            logger.error(f"下载证券列表失败：{node}，{str(e)}")
+            return []
+
+
+def _split_code(code: str) -> Tuple[str, str]:
+    """
+    拆分证券代码为市场前缀和数字部分
+
+    参数：
+        code: 证券代码，如'sh600000'、'600000.XSHG'或'600000'
+
+    返回值：
+        Tuple[str, str]: (市场前缀, 数字代码)，无法识别市场时前缀为空字符串
+    """
+    match = _CODE_PATTERN.match(code.lower())
+    if not match:
+        return '', code.lower()
+    market = match.group('market') or match.group('suffix') or ''
+    return _SUFFIX_MARKETS.get(market, market), match.group('digits')
@@ -5,14 +5,89 @@
 股票数据获取模块，用于获取股票信息
 """
 
-import json
+import os
+import time
 import logging
-import requests
-from typing import Dict, List
+from typing import Any, Dict, List, Optional
 from ..core.module import ModuleBase
+from ..utils.file_utils import save_to_json, load_from_json
+from .security_master import SecurityMaster
 
 logger = logging.getLogger(__name__)
 
+# 每次行情请求包含的代码数量
+QUOTE_BATCH_SIZE = 60
+# 名称缓存的有效期（秒），名称变化（如加上ST）后最迟在此之后更新
+NAME_CACHE_TTL = 7 * 24 * 3600
+
+def _normalize_code(code: str) -> str:
+    """
+    统一为带市场前缀的代码，如'300718.XSHE'、'300718'转为'sz300718'
+    """
+    if '.XSHG' in code or '.XSHE' in code:
+        market = 'sh' if '.XSHG' in code else 'sz'
+        return f"{market}{code.replace('.XSHG', '').replace('.XSHE', '')}"
+    if code.startswith('sh') or code.startswith('sz'):
+        return code
+    return f"sz{code}" if code.startswith(('0', '2', '3')) else f"sh{code}"
+
+def _to_float(value: str) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+def _quote_lines(text: str, prefix: str):
+    """拆分批量行情响应，逐行返回(代码, 字段字符串)"""
+    for line in text.split(';'):
+        line = line.strip()
+        if not line.startswith(prefix) or '="' not in line:
+            continue
+        code, _, body = line[len(prefix):].partition('="')
+        body = body.rstrip('"')
+        if body:
+            yield code, body
+
+def _parse_tencent(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    解析腾讯行情：v_sh600000="1~名称~代码~现价~昨收~今开~成交量(手)~...~时间~...~最高~最低~...~成交额(万)~..."
+    """
+    quotes = {}
+    for code, body in _quote_lines(text, 'v_'):
+        fields = body.split('~')
+        if len(fields) < 2 or not fields[1]:
+            continue
+        quote = {'name': fields[1]}
+        if len(fields) > 37:
+            volume, amount = _to_float(fields[6]), _to_float(fields[37])
+            stamp = fields[30]
+            quote.update(price=_to_float(fields[3]), prev_close=_to_float(fields[4]), open=_to_float(fields[5]),
+                         high=_to_float(fields[33]), low=_to_float(fields[34]),
+                         volume=None if volume is None else volume * 100,
+                         amount=None if amount is None else amount * 10000,
+                         time=f"{stamp[:4]}-{stamp[4:6]}-{stamp[6:8]} {stamp[8:10]}:{stamp[10:12]}:{stamp[12:14]}"
+                         if len(stamp) == 14 else None)
+        quotes[code] = quote
+    return quotes
+
+def _parse_sina(text: str) -> Dict[str, Dict[str, Any]]:
+    """
+    解析新浪行情：var hq_str_sh600000="名称,今开,昨收,现价,最高,最低,买一,卖一,成交量(股),成交额(元),...,日期,时间,..."
+    """
+    quotes = {}
+    for code, body in _quote_lines(text, 'var hq_str_'):
+        fields = body.split(',')
+        if not fields[0]:
+            continue
+        quote = {'name': fields[0]}
+        if len(fields) > 31:
+            quote.update(price=_to_float(fields[3]), prev_close=_to_float(fields[2]), open=_to_float(fields[1]),
+                         high=_to_float(fields[4]), low=_to_float(fields[5]),
+                         volume=_to_float(fields[8]), amount=_to_float(fields[9]),
+                         time=f"{fields[30]} {fields[31]}")
+        quotes[code] = quote
+    return quotes
+
 class StockDataFetcher(ModuleBase):
     """股票数据获取类，用于与外部API交互获取数据"""
     
@@ -26,49 +101,127 @@ class StockDataFetcher(ModuleBase):
             '30m': '30分钟线',
             '60m': '60分钟线'
         }
+        self.security_master = SecurityMaster()
+        # 代码 -> {'name': 名称, 'updated_at': 时间戳}，首次使用时从本地文件加载
+        self._names: Optional[Dict[str, Dict[str, Any]]] = None
     
-    def get_stock_name(self, code: str) -> str:
+    def initialize(self, config: Dict = None) -> bool:
         """
-        根据股票代码获取股票名称
+        初始化数据获取器
         
         参数：
-            code: 股票代码（如'sz300718'或'300718.XSHE'）
+            config: 配置字典，'security_master'项作为证券主数据的配置，
+                    'name_cache_path'项为股票名称缓存文件，默认与证券列表在同一目录，
+                    'name_cache_ttl'项为名称缓存的有效期（秒），
+                    'quote_batch_size'项为每次行情请求包含的代码数量
             
         返回值：
-            str: 股票名称
+            bool: 如果初始化成功返回True，否则返回False
         """
-        try:
-            # 统一股票代码格式
-            if '.XSHG' in code or '.XSHE' in code:
-                market = 'sh' if '.XSHG' in code else 'sz'
-                code = code.replace('.XSHG', '').replace('.XSHE', '')
-                code = f"{market}{code}"
-            elif not (code.startswith('sh') or code.startswith('sz')):
-                code = f"sz{code}" if code.startswith('3') else f"sh{code}"
-            
-            # 尝试使用腾讯接口
-            url = f'http://qt.gtimg.cn/q={code}'
-            response = requests.get(url)
-            if response.status_code == 200:
-                text = response.text
-                if text and '~' in text:
-                    stock_name = text.split('~')[1]
-                    return stock_name
+        if not super().initialize(config):
+            return False
+        master_config = dict(self.get_config('security_master') or {})
+        master_config.setdefault('http_pool', self.get_http_pool())
+        return self.security_master.initialize(master_config)
+    
+    def _name_cache_path(self) -> str:
+        return self.get_config('name_cache_path') or \
+            os.path.join(os.path.dirname(self.security_master.path), "stock_names.json")
+    
+    def _load_names(self):
+        """首次使用时从本地文件加载名称缓存"""
+        if self._names is not None:
+            return
+        data = load_from_json(self._name_cache_path()) if os.path.exists(self._name_cache_path()) else None
+        self._names = dict(data.get('names', {})) if data else {}
+    
+    def _cached_name(self, code: str) -> Optional[str]:
+        entry = self._names.get(code)
+        if entry is None or time.time() - entry.get('updated_at', 0) > self.get_config('name_cache_ttl', NAME_CACHE_TTL):
+            return None
+        return entry['name']
+    
+    def _remember_names(self, quotes: Dict[str, Dict[str, Any]]):
+        """把行情中的名称写入缓存文件"""
+        now = time.time()
+        for code, quote in quotes.items():
+            if quote.get('name'):
+                self._names[code] = {'name': quote['name'], 'updated_at': now}
+        if quotes and not save_to_json(self._name_cache_path(), {'names': self._names}):
+            logger.warning(f"保存股票名称缓存失败：{self._name_cache_path()}")
+    
+    def _request_quotes(self, url: str, codes: List[str], parser) -> Dict[str, Dict[str, Any]]:
+        """按批量请求行情，单批失败时记录日志并跳过"""
+        http = self.get_http_pool()
+        quotes = {}
+        batch_size = self.get_config('quote_batch_size', QUOTE_BATCH_SIZE)
+        for start in range(0, len(codes), batch_size):
+            try:
+                response = http.get(url + ','.join(codes[start:start + batch_size]))
+                if response.status_code == 200 and response.text:
+                    quotes.update(parser(response.text))
+            except Exception as e:
+                logger.error(f"获取行情失败：{str(e)}")
+        return quotes
+    
+    def get_quotes(self, codes: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        批量获取实时行情
+        
+        代码按批合并为一次请求，优先使用腾讯接口，腾讯未返回的代码再请求新浪接口，
+        获取到的名称同时写入名称缓存
+        
+        参数：
+            codes: 股票代码列表（如'sz300718'、'300718.XSHE'或'300718'）
             
-            # 如果腾讯接口失败，尝试新浪接口
-            code = code[2:]  # 移除 sh/sz 前缀
-            url = f'http://hq.sinajs.cn/list={code}'
-            response = requests.get(url)
-            if response.status_code == 200:
-                text = response.text
-                if text and ',' in text:
-                    stock_name = text.split('"')[1].split(',')[0]
-                    return stock_name
+        返回值：
+            Dict[str, Dict[str, Any]]: 以传入代码为键的行情，包含name、price、prev_close、open、high、low、
+                                       volume（股）、amount（元）和time，未获取到的代码不在结果中
+        """
+        normalized = {code: _normalize_code(code) for code in codes}
+        wanted = list(dict.fromkeys(normalized.values()))
+        quotes = self._request_quotes('http://qt.gtimg.cn/q=', wanted, _parse_tencent)
+        missing = [code for code in wanted if code not in quotes]
+        if missing:
+            quotes.update(self._request_quotes('http://hq.sinajs.cn/list=', missing, _parse_sina))
+        self._load_names()
+        self._remember_names(quotes)
+        return {code: quotes[full] for code, full in normalized.items() if full in quotes}
+    
+    def get_stock_names(self, codes: List[str]) -> Dict[str, str]:
+        """
+        批量获取股票名称，优先使用本地名称缓存，其余代码通过批量行情请求获取
+        
+        参数：
+            codes: 股票代码列表（如'sz300718'、'300718.XSHE'或'300718'）
             
-            return "未知股票"
+        返回值：
+            Dict[str, str]: 以传入代码为键的股票名称，未获取到的为"未知股票"
+        """
+        try:
+            self._load_names()
+            normalized = {code: _normalize_code(code) for code in codes}
+            names = {full: self._cached_name(full) for full in set(normalized.values())}
+            missing = [full for full, name in names.items() if name is None]
+            if missing:
+                for full, quote in self.get_quotes(missing).items():
+                    names[full] = quote['name']
+            return {code: names.get(full) or "未知股票" for code, full in normalized.items()}
         except Exception as e:
             logger.error(f"获取股票名称失败：{str(e)}")
-            return "未知股票"
+            return {code: "未知股票" for code in codes}
+    
+    def get_stock_name(self, code: str) -> str:
+        """
+        根据股票代码获取股票名称
+        
+        参数：
+            code: 股票代码（如'sz300718'或'300718.XSHE'）
+            
+        返回值：
+            str: 股票名称
+        """
+        return self.get_stock_names([code])[code]
     
     def fuzzy_match_stock(self, company_name: str) -> List[Dict[str, str]]:
         """
@@ -81,31 +234,7 @@ class StockDataFetcher(ModuleBase):
             List[Dict[str, str]]: 包含匹配到的股票信息的列表
         """
         try:
-            urls = [
-                'http://vip.stock.finance.sina.com.cn/quotes_service/api/json_v2.php/Market_Center.getHQNodeData?page=1&num=3000&sort=symbol&asc=1&node=sz_a',
-                'http://vip.stock.finance.sina.com.cn/quotes_service/api/json_v2.php/Market_Center.getHQNodeData?page=1&num=3000&sort=symbol&asc=1&node=sh_a'
-            ]
-            
-            matched_stocks = []
-            for url in urls:
-                response = requests.get(url)
-                if response.status_code == 200 and response.text:
-                    try:
-                        stocks = json.loads(response.text)
-                        if isinstance(stocks, list):
-                            for stock in stocks:
-                                # 确保股票数据包含必要的字段
-                                if isinstance(stock, dict) and 'name' in stock and 'symbol' in stock:
-                                    if company_name.lower() in stock['name'].lower():
-                                        matched_stocks.append({
-                                            'code': stock['symbol'],
-                                            'name': stock['name']
-                                        })
-                    except json.JSONDecodeError as e:
-                        logger.error(f"解析JSON响应失败：{str(e)}")
-                        continue
-            
-            return matched_stocks
+            return self.security_master.search(company_name)
         except Exception as e:
             logger.error(f"匹配股票失败：{str(e)}")
             return []
@@ -7,15 +7,50 @@
 
 import os
 import logging
-from typing import Dict, Any, Tuple
+from typing import Callable, Dict, Any, Iterable, List, Optional, Tuple
 import pandas as pd
 from datetime import datetime
 from ..core.module import ModuleBase
-from ..lib.Ashare import get_price
-from ..utils.file_utils import save_to_json, load_from_json
+from ..core.process import WorkerPool
+from ..lib.Ashare import get_price, get_prices
+from .storage import StorageBackend, JsonBackend, SqlBarStore, create_backend
+from .storage.json_backend import serialize_dataframe, deserialize_dataframe
+from .storage.blob_store import BlobStore
+from .storage.frame_cache import FrameCache, DEFAULT_MAX_BYTES, file_signature
+from .storage.indicator_cache import IndicatorCache, DEFAULT_MAX_BYTES as INDICATOR_CACHE_BYTES
+from .storage.shared_bars import SharedBarReader
+from ..utils.trading_time import count_bars_between
 
 logger = logging.getLogger(__name__)
 
+# 下载工作进程中的数据管理器和下载参数，由_init_download_worker在每个工作进程中创建
+_worker_manager: Optional['StockDataManager'] = None
+_worker_options: Dict[str, Any] = {}
+
+def _init_download_worker(config: Dict, options: Dict):
+    """下载工作进程的初始化函数，每个进程创建自己的数据管理器"""
+    global _worker_manager, _worker_options
+    _worker_manager = StockDataManager()
+    _worker_manager.initialize(config)
+    _worker_options = options
+
+def _download_task(task: Tuple[str, str]) -> Dict[str, Any]:
+    """
+    下载并保存一只股票一个频率的数据，失败时抛出异常以便工作池重试
+
+    返回值：
+        Dict[str, Any]: 保存的文件路径、K线数量和文件字节数
+    """
+    code, frequency = task
+    data = _worker_manager._fetch_bars(code, frequency, **_worker_options)
+    if data is None:
+        raise RuntimeError("未获取到数据")
+    success, result = _worker_manager._save_stock_data(code, frequency, data)
+    if not success:
+        raise RuntimeError(result)
+    return {'path': result, 'bars': len(data),
+            'bytes': os.path.getsize(result) if os.path.isfile(result) else 0}
+
 class StockDataManager(ModuleBase):
     """股票数据管理类，用于处理股票数据的获取和存储"""
     
@@ -24,18 +59,62 @@ class StockDataManager(ModuleBase):
         self.data_dir = "data"
         self.cache_dir = os.path.join(self.data_dir, "cache")
         self.stock_dir = os.path.join(self.data_dir, "stocks")
+        self.storage: StorageBackend = JsonBackend()
+        self.legacy_storage: StorageBackend = JsonBackend()
+        self.bar_store: Optional[SqlBarStore] = None
+        self.frame_cache = FrameCache()
+        self.blob_store: Optional[BlobStore] = BlobStore(os.path.join(self.data_dir, "blobs"))
+        self.indicator_cache = IndicatorCache(os.path.join(self.data_dir, "indicators"))
+        self.shared_bars: Optional[SharedBarReader] = None
+        # (股票代码, 频率) -> 本进程保存时共享内存的版本号，只有更新的版本才包含保存的K线
+        self._saved_versions: Dict[Tuple[str, str], int] = {}
     
     def initialize(self, config: Dict = None) -> bool:
         """
         初始化数据管理器
         
         参数：
-            config: 配置字典
+            config: 配置字典，'data_dir'项可指定数据根目录，
+                    'storage'项选择存储后端（'json'、'columnar'、'mmap'或'sql'），
+                    'storage_options'项为存储后端的参数，
+                    'sql_url'项为'sql'模式的数据库地址，默认为数据目录下的bars.db，
+                    'frame_cache_bytes'项为内存中DataFrame缓存的字节上限，0表示不缓存，
+                    'content_addressed'项为False时缓存和数据文件各自写入，不共享数据块，
+                    'indicator_cache_bytes'项为指标结果缓存占用磁盘的上限，
+                    'shared_bars'项为SharedBarPublisher的共享内存名称，设置后优先从共享内存快照加载K线
             
         返回值：
             bool: 如果初始化成功返回True，否则返回False
         """
         try:
+            if not super().initialize(config):
+                return False
+            
+            data_dir = self.get_config('data_dir')
+            if data_dir:
+                self.data_dir = data_dir
+                self.cache_dir = os.path.join(self.data_dir, "cache")
+                self.stock_dir = os.path.join(self.data_dir, "stocks")
+            
+            storage = self.get_config('storage', 'json')
+            if storage == 'sql' and self.bar_store is None:
+                sql_url = self.get_config('sql_url') or f"sqlite:///{os.path.join(self.data_dir, 'bars.db')}"
+                self.bar_store = SqlBarStore(sql_url)
+            elif storage != 'sql':
+                self.storage = create_backend(storage, **(self.get_config('storage_options') or {}))
+            self.frame_cache.max_bytes = self.get_config('frame_cache_bytes', DEFAULT_MAX_BYTES)
+            self.blob_store = None
+            if self.get_config('content_addressed', True):
+                self.blob_store = BlobStore(os.path.join(self.data_dir, "blobs"))
+            self.indicator_cache = IndicatorCache(os.path.join(self.data_dir, "indicators"),
+                                                  self.get_config('indicator_cache_bytes', INDICATOR_CACHE_BYTES))
+            shared_name = self.get_config('shared_bars')
+            if shared_name:
+                try:
+                    self.shared_bars = SharedBarReader(shared_name)
+                except FileNotFoundError:
+                    logger.warning(f"K线共享内存{shared_name}不存在，从缓存文件加载")
+            
             # 创建所需的目录
             for directory in [self.data_dir, self.cache_dir, self.stock_dir]:
                 if not os.path.exists(directory):
@@ -55,21 +134,7 @@ class StockDataManager(ModuleBase):
         返回值：
             Dict: 可JSON化的字典
         """
-        if df is None or df.empty:
-            return {}
-        
-        # 将时间戳转换为字符串
-        df_copy = df.copy()
-        if not df_copy.empty and df_copy.index.dtype.kind == 'M':  # 检查是否为时间戳类型
-            df_copy.index = df_copy.index.strftime('%Y-%m-%d %H:%M:%S')
-        
-        # 转换为字典并确保所有值都是JSON可序列化的
-        data_dict = {
-            'index': df_copy.index.tolist(),
-            'columns': df_copy.columns.tolist(),
-            'data': df_copy.values.tolist()
-        }
-        return data_dict
+        return serialize_dataframe(df)
     
     def _deserialize_dataframe(self, data_dict: Dict) -> pd.DataFrame:
         """
@@ -81,19 +146,39 @@ class StockDataManager(ModuleBase):
         返回值：
             pd.DataFrame: 反序列化后的DataFrame
         """
-        if not data_dict or not all(k in data_dict for k in ['index', 'columns', 'data']):
-            return pd.DataFrame()
+        return deserialize_dataframe(data_dict)
+    
+    def _get_cache_file_path(self, code: str, frequency: str) -> str:
+        """
+        获取股票数据缓存文件的路径
         
-        try:
-            df = pd.DataFrame(
-                data=data_dict['data'],
-                index=pd.to_datetime(data_dict['index']),
-                columns=data_dict['columns']
-            )
-            return df
-        except Exception as e:
-            logger.error(f"反序列化DataFrame失败：{str(e)}")
-            return pd.DataFrame()
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            
+        返回值：
+            str: 缓存文件路径
+        """
+        return self.storage.path_for(os.path.join(self.cache_dir, f"{code}_{frequency}"))
+    
+    def _locate_cache(self, code: str, frequency: str) -> Tuple[StorageBackend, str]:
+        """
+        确定读取缓存使用的存储后端和文件路径
+        
+        切换存储后端后，尚未迁移的旧JSON缓存仍可读取
+        
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            
+        返回值：
+            Tuple[StorageBackend, str]: (存储后端, 缓存文件路径)
+        """
+        cache_file = self._get_cache_file_path(code, frequency)
+        if os.path.exists(cache_file) or self.storage.name == self.legacy_storage.name:
+            return self.storage, cache_file
+        legacy_file = self.legacy_storage.path_for(os.path.join(self.cache_dir, f"{code}_{frequency}"))
+        return self.legacy_storage, legacy_file
     
     def _get_stock_file_path(self, code: str, frequency: str) -> str:
         """
@@ -113,11 +198,128 @@ class StockDataManager(ModuleBase):
             os.makedirs(stock_date_dir)
         
         # 生成文件名
-        filename = f"{code}_{frequency}_{date_str}.json"
-        return os.path.join(stock_date_dir, filename)
+        filename = f"{code}_{frequency}_{date_str}"
+        return self.storage.path_for(os.path.join(stock_date_dir, filename))
+    
+    def _save_stock_data(self, code: str, frequency: str, data: pd.DataFrame) -> Tuple[bool, Any]:
+        """
+        保存已获取的股票数据到缓存和数据文件夹
+        
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            data: 股票数据
+            
+        返回值：
+            Tuple[bool, Any]: (成功标志, 保存的文件路径或错误信息)
+        """
+        if data is None or data.empty:
+            return False, "数据序列化失败"
+        
+        if self.shared_bars is not None:
+            self._saved_versions[(code, frequency)] = self.shared_bars.current_version()[0]
+        
+        # 数据库模式下K线按(code, frequency, ts)写入同一张表
+        if self.bar_store is not None:
+            self.bar_store.upsert(code, frequency, data)
+            return True, self.bar_store.url
+        
+        cache_file = self._get_cache_file_path(code, frequency)
+        stock_file = self._get_stock_file_path(code, frequency)
+        
+        # 缓存文件和数据文件内容相同，只写一次数据块，两处均为指向它的硬链接
+        if self.blob_store is not None and not self.storage.append_only:
+            try:
+                self.blob_store.save(self.storage.encode(data), self.storage.extension,
+                                     cache_file, stock_file)
+            except Exception as e:
+                return False, f"保存数据失败：{str(e)}"
+            finally:
+                self.frame_cache.invalidate((code, frequency))
+            return True, stock_file
+        
+        # 保存到缓存
+        save_cache = self.storage.append if self.storage.append_only else self.storage.save
+        if not save_cache(cache_file, data):
+            logger.warning(f"保存数据到缓存失败：{cache_file}")
+        self.frame_cache.invalidate((code, frequency))
+        
+        # 保存到数据文件夹
+        if not self.storage.save(stock_file, data):
+            return False, f"保存数据失败：{stock_file}"
+        
+        return True, stock_file  # 返回保存的文件路径
+    
+    def _merge_bars(self, existing: pd.DataFrame, data: pd.DataFrame) -> pd.DataFrame:
+        """
+        合并已有数据和新获取的数据，时间戳重复时以新数据为准（覆盖可能未走完的最后一根K线）
+        
+        参数：
+            existing: 已保存的数据
+            data: 新获取的数据
+            
+        返回值：
+            pd.DataFrame: 按时间排序的合并结果
+        """
+        if existing is None or existing.empty:
+            return data
+        merged = pd.concat([existing, data[existing.columns.intersection(data.columns)]])
+        merged = merged[~merged.index.duplicated(keep='last')]
+        return merged.sort_index()
+    
+    def _incremental_count(self, code: str, frequency: str, count: int) -> Tuple[int, pd.DataFrame]:
+        """
+        根据已保存数据的最后时间戳计算需要获取的K线数量
+        
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            count: 全量获取时的数据点数量
+            
+        返回值：
+            Tuple[int, pd.DataFrame]: (需要获取的数量, 已保存的数据)，没有已保存数据时返回全量数量
+        """
+        existing = self.load_cached_data(code, frequency)
+        if existing.empty:
+            return count, existing
+        
+        # 多取一根以覆盖已保存的最后一根K线
+        missing = count_bars_between(existing.index[-1].to_pydatetime(), datetime.now(), frequency)
+        fetch_count = min(count, missing + 1)
+        if missing + 1 > count:
+            logger.warning(f"{code} {frequency} 缺失 {missing} 根K线，超过单次获取数量 {count}")
+        return fetch_count, existing
+    
+    def _fetch_bars(self, code: str, frequency: str, count: int, end_date: str = '',
+                    incremental: bool = False) -> Optional[pd.DataFrame]:
+        """
+        获取股票数据，增量获取时与已保存的数据合并
+        
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            count: 数据点数量
+            end_date: 结束日期
+            incremental: 是否只下载已保存数据之后的K线
+            
+        返回值：
+            Optional[pd.DataFrame]: 待保存的数据，未获取到数据时返回None
+        """
+        existing = None
+        if incremental and not end_date:
+            count, existing = self._incremental_count(code, frequency, count)
+        
+        data = get_price(code, frequency=frequency, count=count, end_date=end_date,
+                         session=self.get_http_pool())
+        if data is None or data.empty:
+            return None
+        if existing is not None:
+            data = self._merge_bars(existing, data)
+        return data
     
     def get_and_save_stock_data(self, code: str, frequency: str = '1d',
-                               count: int = 5, end_date: str = '') -> Tuple[bool, Any]:
+                               count: int = 5, end_date: str = '',
+                               incremental: bool = False) -> Tuple[bool, Any]:
         """
         获取并保存股票数据
         
@@ -126,41 +328,91 @@ class StockDataManager(ModuleBase):
             frequency: 数据频率
             count: 数据点数量
             end_date: 结束日期
+            incremental: 是否增量获取，只下载已保存数据之后的K线并与已有数据合并
             
         返回值：
             Tuple[bool, Any]: (成功标志, 数据或错误信息)
         """
         try:
-            # 获取股票数据
-            data = get_price(code, frequency=frequency, count=count, end_date=end_date)
-            if data is None or data.empty:
+            data = self._fetch_bars(code, frequency, count, end_date, incremental)
+            if data is None:
                 return False, "未获取到数据"
-            
-            # 序列化数据
-            data_dict = self._serialize_dataframe(data)
-            if not data_dict:
-                return False, "数据序列化失败"
-            
-            # 保存到缓存
-            cache_file = os.path.join(self.cache_dir, f"{code}_{frequency}.json")
-            if not save_to_json(cache_file, data_dict):
-                logger.warning(f"保存数据到缓存失败：{cache_file}")
-            
-            # 保存到数据文件夹
-            stock_file = self._get_stock_file_path(code, frequency)
-            if not save_to_json(stock_file, data_dict):
-                return False, f"保存数据失败：{stock_file}"
-            
-            return True, stock_file  # 返回保存的文件路径
+            return self._save_stock_data(code, frequency, data)
         except Exception as e:
             error_msg = f"获取或保存股票数据失败：{str(e)}"
             logger.error(error_msg)
             return False, error_msg
     
+    def get_and_save_stock_data_batch(self, codes: List[str], frequency: str = '1d',
+                                      count: int = 5, end_date: str = '',
+                                      incremental: bool = False) -> Dict[str, Tuple[bool, Any]]:
+        """
+        并发获取并保存多只股票的数据
+        
+        参数：
+            codes: 股票代码列表
+            frequency: 数据频率
+            count: 数据点数量
+            end_date: 结束日期
+            incremental: 是否增量获取，见get_and_save_stock_data
+            
+        返回值：
+            Dict[str, Tuple[bool, Any]]: 每只股票的(成功标志, 文件路径或错误信息)
+        """
+        try:
+            # 增量模式下按需要获取的数量分组，每组一次并发请求
+            groups: Dict[int, List[str]] = {}
+            existing: Dict[str, pd.DataFrame] = {}
+            for code in dict.fromkeys(codes):
+                fetch_count = count
+                if incremental and not end_date:
+                    fetch_count, existing[code] = self._incremental_count(code, frequency, count)
+                groups.setdefault(fetch_count, []).append(code)
+            
+            data, errors = {}, {}
+            for fetch_count, group in groups.items():
+                group_data, group_errors = get_prices(group, frequency=frequency, count=fetch_count,
+                                                      end_date=end_date, session=self.get_http_pool(),
+                                                      host_limits=self.get_config('host_limits'))
+                data.update(group_data)
+                errors.update(group_errors)
+        except Exception as e:
+            error_msg = f"批量获取股票数据失败：{str(e)}"
+            logger.error(error_msg)
+            return {code: (False, error_msg) for code in codes}
+        
+        results = {}
+        for code in dict.fromkeys(codes):
+            if code in errors:
+                error_msg = f"获取或保存股票数据失败：{errors[code]}"
+                logger.error(f"{code} {error_msg}")
+                results[code] = (False, error_msg)
+                continue
+            
+            df = data.get(code)
+            if df is None or df.empty:
+                results[code] = (False, "未获取到数据")
+                continue
+            
+            try:
+                if code in existing:
+                    df = self._merge_bars(existing[code], df)
+                results[code] = self._save_stock_data(code, frequency, df)
+            except Exception as e:
+                error_msg = f"获取或保存股票数据失败：{str(e)}"
+                logger.error(f"{code} {error_msg}")
+                results[code] = (False, error_msg)
+        return results
+    
     def load_cached_data(self, code: str, frequency: str = '1d') -> pd.DataFrame:
         """
         从缓存加载股票数据
         
+        反序列化后的DataFrame保存在内存缓存中，缓存文件未变化时直接返回同一个对象；
+        附加了K线共享内存时优先返回共享内存快照中的只读视图，调用方不应原地修改返回值。
+        本进程保存过K线（包括原地更新未走完的最后一根K线）而快照尚未重新发布时，改为从缓存文件加载；
+        其他进程写入的K线只能通过发布方重新发布快照得到
+        
         参数：
             code: 股票代码
             frequency: 数据频率
@@ -169,11 +421,145 @@ class StockDataManager(ModuleBase):
             pd.DataFrame: 股票数据，如果加载失败则返回空DataFrame
         """
         try:
-            cache_file = os.path.join(self.cache_dir, f"{code}_{frequency}.json")
-            data_dict = load_from_json(cache_file)
-            if data_dict:
-                return self._deserialize_dataframe(data_dict)
+            if self.shared_bars is not None:
+                snapshot = self.shared_bars.snapshot()
+                saved_version = self._saved_versions.get((code, frequency))
+                if snapshot is not None and (saved_version is None or snapshot.version > saved_version):
+                    df = snapshot.frame(code, frequency)
+                    if df is not None:
+                        return df
+            if self.bar_store is not None:
+                return self.bar_store.load(code, frequency)
+            storage, cache_file = self._locate_cache(code, frequency)
+            signature = file_signature(cache_file)
+            if signature is None:
+                return storage.load(cache_file)
+            
+            key = (code, frequency)
+            df = self.frame_cache.get(key, signature)
+            if df is None:
+                df = storage.load(cache_file)
+                if not df.empty:
+                    self.frame_cache.put(key, signature, df)
+            return df
+        except Exception as e:
+            logger.error(f"加载缓存数据失败：{str(e)}")
             return pd.DataFrame()
+    
+    def load_range(self, code: str, frequency: str = '1d',
+                   start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """
+        从缓存加载[start, end)时间区间内的股票数据
+        
+        使用'mmap'存储后端时通过内存映射和二分查找只读取区间内的K线，
+        使用'sql'存储时通过索引查询
+        
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            start: 起始时间（包含），None表示不限
+            end: 结束时间（不包含），None表示不限
+            
+        返回值：
+            pd.DataFrame: 区间内的股票数据，如果加载失败则返回空DataFrame
+        """
+        try:
+            if self.bar_store is not None:
+                return self.bar_store.load(code, frequency, start, end)
+            storage, cache_file = self._locate_cache(code, frequency)
+            return storage.read_range(cache_file, start, end)
         except Exception as e:
             logger.error(f"加载缓存数据失败：{str(e)}")
             return pd.DataFrame()
+    
+    def load_cross_section(self, frequency: str, ts: str,
+                           codes: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        加载某一时刻所有股票的K线，如某日15:00的收盘价，仅支持'sql'存储
+        
+        参数：
+            frequency: 数据频率
+            ts: K线时间，如'2025-02-24 15:00'
+            codes: 只查询这些股票，None表示全部
+            
+        返回值：
+            pd.DataFrame: 以股票代码为索引的K线数据，如果加载失败则返回空DataFrame
+        """
+        try:
+            if self.bar_store is None:
+                logger.error("截面查询需要使用'sql'存储")
+                return pd.DataFrame()
+            return self.bar_store.cross_section(frequency, ts, codes)
+        except Exception as e:
+            logger.error(f"加载截面数据失败：{str(e)}")
+            return pd.DataFrame()
+    
+    def get_indicator(self, code: str, indicator: str, frequency: str = '1d', **params):
+        """
+        基于缓存的K线计算指标，结果保存在指标缓存中
+        
+        K线只在末尾追加时，MACD、KDJ、BOLL、ATR、RSI从保存的状态增量计算新K线，
+        其他指标在K线变化后重新计算
+        
+        参数：
+            code: 股票代码
+            indicator: 指标名称（MyTT函数名，如'MACD'）
+            frequency: 数据频率
+            **params: 指标参数，如N=20
+            
+        返回值：
+            与对应MyTT函数相同的单个数组或数组元组，如果计算失败则返回None
+        """
+        try:
+            bars = self.load_cached_data(code, frequency)
+            if bars.empty:
+                logger.error(f"没有缓存数据：{code} {frequency}")
+                return None
+            return self.indicator_cache.compute(code, frequency, indicator, bars, **params)
+        except Exception as e:
+            logger.error(f"计算指标失败：{str(e)}")
+            return None
+    
+    def backfill(self, codes: List[str], frequencies: List[str] = ('1d',), count: int = 800,
+                 workers: Optional[int] = None, retries: int = 2, incremental: bool = False,
+                 progress: Optional[Callable[[int, int, Any, bool], None]] = None,
+                 on_result: Optional[Callable[[Tuple[str, str], bool, Any], None]] = None,
+                 skip: Iterable[Tuple[str, str]] = ()) -> Dict[Tuple[str, str], Tuple[bool, Any]]:
+        """
+        用多个工作进程批量下载并保存数据
+        
+        (股票, 频率)任务分片到各工作进程，每个进程使用独立的数据管理器和HTTP连接池，
+        失败的任务换一个进程重试
+        
+        参数：
+            codes: 股票代码列表
+            frequencies: 数据频率列表
+            count: 每只股票获取的数据点数量
+            workers: 工作进程数，默认为CPU核数
+            retries: 每个任务失败后的最多重试次数
+            incremental: 是否增量获取，见get_and_save_stock_data
+            progress: 进度回调，以(已完成数, 总数, (股票, 频率), 是否成功)调用
+            on_result: 结果回调，每个任务最终完成时以((股票, 频率), 是否成功, 结果)调用，
+                       成功时结果为包含path、bars、bytes的字典，失败时为错误信息
+            skip: 不需要下载的(股票, 频率)，如检查点日志中已完成的任务
+            
+        返回值：
+            Dict[Tuple[str, str], Tuple[bool, Any]]: 每个(股票, 频率)的(成功标志, 文件路径或错误信息)
+        """
+        # 连接池等对象不能传给其他进程，工作进程按配置自行创建
+        config = {key: value for key, value in (self.config or {}).items() if key != 'http_pool'}
+        config['data_dir'] = self.data_dir
+        options = {'count': count, 'incremental': incremental}
+        pool = WorkerPool(_download_task, workers=workers, retries=retries,
+                          initializer=_init_download_worker, initargs=(config, options),
+                          http_config=self.get_config('http'), name='download')
+        skip = set(skip)
+        tasks = [(code, frequency) for code in dict.fromkeys(codes) for frequency in frequencies
+                 if (code, frequency) not in skip]
+        results = {}
+        for task, success, value in pool.run(tasks, progress):
+            results[task] = (success, value['path'] if success else value)
+            if on_result is not None:
+                on_result(task, success, value)
+        self.logger.info(f"批量下载完成：{pool.stats()}")
+        return results
@@ -0,0 +1,34 @@
+"""Storage backends for bar data."""
+
+from .base import StorageBackend
+from .json_backend import JsonBackend
+from .columnar import ColumnarBackend
+from .mmap_store import MmapBarStore
+from .sql_store import SqlBarStore
+from .frame_cache import FrameCache
+from .blob_store import BlobStore
+from .indicator_cache import IndicatorCache
+from .shared_bars import SharedBarPublisher, SharedBarReader, SharedBarSnapshot
+
+BACKENDS = {
+    JsonBackend.name: JsonBackend,
+    ColumnarBackend.name: ColumnarBackend,
+    MmapBarStore.name: MmapBarStore,
+}
+
+def create_backend(name: str = 'json', **options) -> StorageBackend:
+    """
+    按名称创建存储后端
+    
+    参数：
+        name: 后端名称，'json'、'columnar'或'mmap'
+        **options: 传递给后端构造函数的参数
+        
+    返回值：
+        StorageBackend: 存储后端实例
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"未知的存储后端：{name}")
+    return BACKENDS[name](**options)
+
+__all__ = ['StorageBackend', 'JsonBackend', 'ColumnarBackend', 'MmapBarStore', 'SqlBarStore', 'FrameCache', 'BlobStore', 'IndicatorCache', 'SharedBarPublisher', 'SharedBarReader', 'SharedBarSnapshot', 'BACKENDS', 'create_backend']
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+K线存储后端基类
+"""
+
+import os
+import threading
+import logging
+from typing import Optional
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+def write_atomic(file_path: str, buffer: bytes):
+    """
+    先写临时文件再原子替换，读取方不会看到写了一半的文件，
+    替换后文件为新的inode，不影响指向旧文件的硬链接
+    
+    参数：
+        file_path: 文件路径
+        buffer: 文件内容
+    """
+    directory = os.path.dirname(file_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(buffer)
+        os.replace(temp_path, file_path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+class StorageBackend:
+    """存储后端基类，负责将K线DataFrame保存到文件和从文件加载"""
+    
+    name = ''
+    extension = ''
+    append_only = False  # 为True时缓存文件按时间顺序追加，而不是整体覆盖
+    
+    def save(self, file_path: str, df: pd.DataFrame) -> bool:
+        """
+        保存K线数据
+        
+        参数：
+            file_path: 文件路径（包含扩展名）
+            df: 以时间为索引的K线数据
+            
+        返回值：
+            bool: 如果保存成功返回True，否则返回False
+        """
+        raise NotImplementedError
+    
+    def load(self, file_path: str) -> pd.DataFrame:
+        """
+        加载K线数据
+        
+        参数：
+            file_path: 文件路径（包含扩展名）
+            
+        返回值：
+            pd.DataFrame: K线数据，如果加载失败则返回空DataFrame
+        """
+        raise NotImplementedError
+    
+    def encode(self, df: pd.DataFrame) -> bytes:
+        """
+        将K线数据编码为文件内容，与save写出的文件逐字节相同
+        
+        参数：
+            df: 以时间为索引的K线数据
+            
+        返回值：
+            bytes: 文件内容
+        """
+        raise NotImplementedError
+    
+    def path_for(self, stem: str) -> str:
+        """
+        为不含扩展名的路径加上本后端的扩展名
+        
+        参数：
+            stem: 不含扩展名的文件路径
+            
+        返回值：
+            str: 完整文件路径
+        """
+        return f"{stem}{self.extension}"
+    
+    def append(self, file_path: str, df: pd.DataFrame) -> bool:
+        """
+        追加K线数据，时间戳与已有数据重复时以新数据为准
+        
+        参数：
+            file_path: 文件路径（包含扩展名）
+            df: 以时间为索引的K线数据
+            
+        返回值：
+            bool: 如果保存成功返回True，否则返回False
+        """
+        existing = self.load(file_path)
+        if not existing.empty:
+            df = pd.concat([existing, df])
+            df = df[~df.index.duplicated(keep='last')].sort_index()
+        return self.save(file_path, df)
+    
+    def read_range(self, file_path: str, start: Optional[pd.Timestamp] = None,
+                   end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        读取[start, end)时间区间内的K线数据
+        
+        参数：
+            file_path: 文件路径（包含扩展名）
+            start: 起始时间（包含），None表示不限
+            end: 结束时间（不包含），None表示不限
+            
+        返回值：
+            pd.DataFrame: 区间内的K线数据
+        """
+        df = self.load(file_path)
+        if df.empty:
+            return df
+        lo = 0 if start is None else df.index.searchsorted(pd.Timestamp(start), side='left')
+        hi = len(df) if end is None else df.index.searchsorted(pd.Timestamp(end), side='left')
+        return df.iloc[lo:hi]
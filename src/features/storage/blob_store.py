@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+内容寻址的数据块存储
+
+文件内容按SHA-256哈希保存为只写一次的数据块，缓存文件和按日期保存的数据文件
+都是指向同一数据块的硬链接，同一份数据只写一次磁盘、只占一份空间
+"""
+
+import os
+import shutil
+import hashlib
+import threading
+import logging
+from .base import write_atomic
+
+logger = logging.getLogger(__name__)
+
+class BlobStore:
+    """内容寻址数据块存储，数据块路径为 root/哈希前两位/哈希+扩展名"""
+
+    def __init__(self, root: str):
+        """
+        参数：
+            root: 数据块根目录
+        """
+        self.root = root
+
+    def path_for(self, digest: str, extension: str = '') -> str:
+        """
+        获取数据块路径
+
+        参数：
+            digest: 内容的SHA-256十六进制摘要
+            extension: 文件扩展名
+
+        返回值：
+            str: 数据块路径
+        """
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+
+    def put(self, buffer: bytes, extension: str = '') -> str:
+        """
+        保存数据块，内容相同的数据块已存在时不再写入
+
+        参数：
+            buffer: 文件内容
+            extension: 文件扩展名
+
+        返回值：
+            str: 数据块路径
+        """
+        blob_path = self.path_for(hashlib.sha256(buffer).hexdigest(), extension)
+        if not os.path.exists(blob_path):
+            write_atomic(blob_path, buffer)
+        return blob_path
+
+    def link(self, blob_path: str, file_path: str):
+        """
+        将文件原子地替换为指向数据块的硬链接，文件系统不支持硬链接时退化为复制
+
+        参数：
+            blob_path: 数据块路径
+            file_path: 目标文件路径
+        """
+        directory = os.path.dirname(file_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            try:
+                os.link(blob_path, temp_path)
+            except OSError as e:
+                logger.debug(f"无法创建硬链接，改为复制：{str(e)}")
+                shutil.copyfile(blob_path, temp_path)
+            os.replace(temp_path, file_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def save(self, buffer: bytes, extension: str, *file_paths: str) -> str:
+        """
+        写入一次数据块并链接到所有目标文件
+
+        参数：
+            buffer: 文件内容
+            extension: 文件扩展名
+            *file_paths: 目标文件路径
+
+        返回值：
+            str: 数据块路径
+        """
+        blob_path = self.put(buffer, extension)
+        for file_path in file_paths:
+            self.link(blob_path, file_path)
+        return blob_path
+
+    def collect_garbage(self) -> int:
+        """
+        删除已没有任何文件引用（硬链接数为1）的数据块
+
+        返回值：
+            int: 删除的数据块数量
+        """
+        removed = 0
+        if not os.path.isdir(self.root):
+            return removed
+        for directory, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                blob_path = os.path.join(directory, filename)
+                if filename.endswith('.tmp') or os.stat(blob_path).st_nlink > 1:
+                    continue
+                os.remove(blob_path)
+                removed += 1
+        return removed
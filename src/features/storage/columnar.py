@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+二进制列式存储后端
+
+文件格式：
+    MAGIC(6字节) | 头部长度(uint32, 小端) | 头部(UTF-8 JSON) | 数据体
+数据体依次为int64时间戳索引和各列的定长数组（float64或int64），可选zlib压缩
+"""
+
+import os
+import json
+import zlib
+import struct
+import logging
+from typing import Dict, Optional
+import numpy as np
+import pandas as pd
+from .base import StorageBackend, write_atomic
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QBCOL\x01'
+_HEADER_LENGTH = struct.Struct('<I')
+
+def _column_dtype(series: pd.Series) -> str:
+    """
+    确定列的存储类型
+
+    参数：
+        series: 数据列
+
+    返回值：
+        str: 'float64'或'int64'
+    """
+    kind = series.dtype.kind
+    if kind == 'f':
+        return 'float64'
+    if kind in 'iub':
+        return 'int64'
+    raise ValueError(f"不支持的列类型：{series.name} ({series.dtype})")
+
+class ColumnarBackend(StorageBackend):
+    """二进制列式存储后端，按列保存定长数值数组"""
+
+    name = 'columnar'
+    extension = '.qbc'
+
+    def __init__(self, compression: Optional[str] = 'zlib', level: int = 1):
+        """
+        参数：
+            compression: 压缩方式，'zlib'或None
+            level: zlib压缩级别
+        """
+        if compression not in (None, 'zlib'):
+            raise ValueError(f"不支持的压缩方式：{compression}")
+        self.compression = compression
+        self.level = level
+
+    def encode(self, df: pd.DataFrame) -> bytes:
+        """
+        将DataFrame编码为二进制格式
+
+        参数：
+            df: 以时间为索引的K线数据
+
+        返回值：
+            bytes: 编码后的数据
+        """
+        if not isinstance(df.index, pd.DatetimeIndex):
+            raise ValueError("索引必须为时间类型")
+
+        dtypes = [_column_dtype(df[column]) for column in df.columns]
+        header: Dict = {
+            'rows': len(df),
+            'columns': [str(column) for column in df.columns],
+            'dtypes': dtypes,
+            'index_unit': getattr(df.index, 'unit', 'ns'),
+            'compression': self.compression,
+        }
+        parts = [np.ascontiguousarray(df.index.asi8, dtype='<i8').tobytes()]
+        for column, dtype in zip(df.columns, dtypes):
+            parts.append(np.ascontiguousarray(df[column].to_numpy(), dtype=f'<{dtype[0]}8').tobytes())
+        body = b''.join(parts)
+        if self.compression == 'zlib':
+            body = zlib.compress(body, self.level)
+
+        header_bytes = json.dumps(header).encode('utf-8')
+        return MAGIC + _HEADER_LENGTH.pack(len(header_bytes)) + header_bytes + body
+
+    @staticmethod
+    def decode(buffer: bytes) -> pd.DataFrame:
+        """
+        将二进制数据解码为DataFrame
+
+        参数：
+            buffer: 编码后的数据
+
+        返回值：
+            pd.DataFrame: K线数据
+        """
+        if not buffer.startswith(MAGIC):
+            raise ValueError("不是有效的列式存储文件")
+        offset = len(MAGIC)
+        (header_length,) = _HEADER_LENGTH.unpack_from(buffer, offset)
+        offset += _HEADER_LENGTH.size
+        header = json.loads(buffer[offset:offset + header_length].decode('utf-8'))
+        body = buffer[offset + header_length:]
+        if header['compression'] == 'zlib':
+            body = zlib.decompress(body)
+
+        rows = header['rows']
+        index = np.frombuffer(body, dtype='<i8', count=rows)
+        offset = index.nbytes
+        data = {}
+        for column, dtype in zip(header['columns'], header['dtypes']):
+            values = np.frombuffer(body, dtype=f'<{dtype[0]}8', count=rows, offset=offset)
+            data[column] = values.astype(dtype)
+            offset += values.nbytes
+
+        unit = header.get('index_unit', 'ns')
+        return pd.DataFrame(data, index=pd.DatetimeIndex(index.astype(f'datetime64[{unit}]')),
+                            columns=header['columns'])
+
+    def save(self, file_path: str, df: pd.DataFrame) -> bool:
+        try:
+            if df is None or df.empty:
+                logger.error("数据为空，无法保存")
+                return False
+            write_atomic(file_path, self.encode(df))
+            return True
+        except Exception as e:
+            logger.error(f"保存列式文件失败：{str(e)}")
+            return False
+
+    def load(self, file_path: str) -> pd.DataFrame:
+        try:
+            if not os.path.exists(file_path):
+                logger.warning(f"文件不存在：{file_path}")
+                return pd.DataFrame()
+            with open(file_path, 'rb') as f:
+                return self.decode(f.read())
+        except Exception as e:
+            logger.error(f"加载列式文件失败：{str(e)}")
+            return pd.DataFrame()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程内的K线DataFrame缓存
+
+按(code, frequency)缓存反序列化后的DataFrame，以文件路径、inode、大小和修改时间作为签名，
+文件被其他进程改写后自动失效；总内存超过预算时按最近最少使用的顺序淘汰
+"""
+
+import os
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+def file_signature(file_path: str) -> Optional[Tuple[str, int, int, int]]:
+    """
+    获取文件签名，文件被原子替换或重新链接时inode随之变化
+
+    参数：
+        file_path: 文件路径
+
+    返回值：
+        Optional[Tuple[str, int, int, int]]: (路径, inode, 文件大小, 修改时间纳秒)，文件不存在时返回None
+    """
+    try:
+        stat = os.stat(file_path)
+    except OSError:
+        return None
+    return file_path, stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+class FrameCache:
+    """内存预算受限的LRU DataFrame缓存，返回的DataFrame为共享对象，调用方不应原地修改"""
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        参数：
+            max_bytes: 缓存占用内存的上限（字节），0表示不缓存
+        """
+        self.max_bytes = max_bytes
+        self._entries: 'OrderedDict[Hashable, Tuple[Tuple, pd.DataFrame, int]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._invalidations = 0
+
+    def get(self, key: Hashable, signature: Tuple) -> Optional[pd.DataFrame]:
+        """
+        查找缓存，签名不一致的条目视为过期并删除
+
+        参数：
+            key: 缓存键
+            signature: 当前文件签名
+
+        返回值：
+            Optional[pd.DataFrame]: 命中时返回缓存的DataFrame，否则返回None
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == signature:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[1]
+            if entry is not None:
+                self._remove(key)
+                self._invalidations += 1
+            self._misses += 1
+            return None
+
+    def put(self, key: Hashable, signature: Tuple, df: pd.DataFrame):
+        """
+        写入缓存，超过预算时淘汰最久未使用的条目
+
+        参数：
+            key: 缓存键
+            signature: 文件签名
+            df: 要缓存的DataFrame
+        """
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (signature, df, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._evictions += 1
+
+    def invalidate(self, key: Hashable):
+        """
+        删除一个缓存条目
+
+        参数：
+            key: 缓存键
+        """
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+                self._invalidations += 1
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key: Hashable):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计
+
+        返回值：
+            Dict[str, int]: 命中、未命中、淘汰、失效次数以及当前条目数和占用字节数
+        """
+        with self._lock:
+            return {
+                'hits': self._hits,
+                'misses': self._misses,
+                'evictions': self._evictions,
+                'invalidations': self._invalidations,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+持久化的指标计算结果缓存
+
+按(code, frequency, 指标, 参数)保存指标结果数组，并记录计算时所用K线的指纹
+（逐行哈希的前缀摘要和最后一根K线）。再次请求时：
+    K线未变化         直接返回缓存结果
+    只在末尾追加了K线  有增量实现的指标从保存的状态继续计算新K线，
+                      最后一根K线被修正时先revise_last
+    历史K线发生变化    从头重新计算
+未命中时用MyTT批量计算结果，增量状态只回放末尾有限数量的K线
+缓存目录的总大小超过预算时，按最近使用时间淘汰最久未用的条目；
+目录总大小在内存中累计，只在超过预算时扫描目录
+"""
+
+import os
+import io
+import json
+import hashlib
+import inspect
+import threading
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+from ...lib import MyTT
+from ...lib.incremental import INDICATORS, IncrementalIndicator
+from .base import write_atomic
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# 未命中时批量计算结果，增量状态只回放最后(最大参数+1)×WARMUP_FACTOR根K线
+WARMUP_FACTOR = 40
+# 超过预算时淘汰到预算的这个比例，两次扫描目录之间至少写入预算的10%
+EVICT_RATIO = 0.9
+
+# MyTT函数中表示行情序列的参数名及对应的K线字段，通用序列参数S取收盘价
+INPUT_FIELDS = {'CLOSE': 'close', 'OPEN': 'open', 'HIGH': 'high', 'LOW': 'low', 'VOL': 'volume', 'S': 'close'}
+
+def _row_hashes(bars: pd.DataFrame, fields: List[str]) -> np.ndarray:
+    """每根K线（时间和所用字段）的64位哈希"""
+    return pd.util.hash_pandas_object(bars[fields], index=True).to_numpy()
+
+def _digest(hashes: np.ndarray) -> str:
+    return hashlib.sha1(np.ascontiguousarray(hashes).tobytes()).hexdigest()
+
+class IndicatorCache:
+    """指标结果的磁盘缓存，每个条目为一个.npz文件"""
+
+    def __init__(self, root: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        """
+        参数：
+            root: 缓存目录
+            max_bytes: 缓存目录占用磁盘的上限（字节）
+        """
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._extensions = 0
+        self._computes = 0
+        self._evictions = 0
+        # 缓存目录的总大小，None表示尚未扫描；其他进程写入的条目在下一次扫描时计入
+        self._total: Optional[int] = None
+
+    def _signature(self, indicator: str, params: Dict) -> Tuple[Any, List[str], Dict]:
+        """
+        查找MyTT函数，区分行情序列参数和指标参数，未给出的指标参数取默认值
+        """
+        function = getattr(MyTT, indicator, None)
+        if indicator.startswith('_') or not callable(function):
+            raise ValueError(f"未知的指标：{indicator}")
+        inputs, full_params = [], {}
+        for name, parameter in inspect.signature(function).parameters.items():
+            if name in INPUT_FIELDS:
+                inputs.append(name)
+            elif name == 'out':
+                continue
+            elif name in params:
+                full_params[name] = params[name]
+            elif parameter.default is not inspect.Parameter.empty:
+                full_params[name] = parameter.default
+        unknown = set(params) - set(full_params)
+        if unknown:
+            raise ValueError(f"指标{indicator}没有参数：{', '.join(sorted(unknown))}")
+        return function, inputs, full_params
+
+    def path_for(self, code: str, frequency: str, indicator: str, params: Dict) -> str:
+        """
+        获取缓存条目的文件路径
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            indicator: 指标名称（MyTT函数名）
+            params: 完整的指标参数
+
+        返回值：
+            str: 缓存文件路径
+        """
+        digest = hashlib.sha1(json.dumps(params, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.root, f"{code}_{frequency}_{indicator}_{digest}.npz")
+
+    def _read(self, file_path: str) -> Optional[Tuple[Dict, np.ndarray]]:
+        try:
+            with np.load(file_path, allow_pickle=False) as entry:
+                return json.loads(str(entry['meta'])), entry['values']
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"读取指标缓存失败：{file_path}，{str(e)}")
+            return None
+
+    def _write(self, file_path: str, meta: Dict, values: np.ndarray):
+        buffer = io.BytesIO()
+        np.savez(buffer, meta=np.array(json.dumps(meta)), values=values)
+        try:
+            replaced = os.path.getsize(file_path)
+        except OSError:
+            replaced = 0
+        write_atomic(file_path, buffer.getvalue())
+        with self._lock:
+            if self._total is not None:
+                self._total += buffer.getbuffer().nbytes - replaced
+            scan = self._total is None or self._total > self.max_bytes
+        if scan:
+            self._evict(keep=file_path)
+
+    def compute(self, code: str, frequency: str, indicator: str, bars: pd.DataFrame, **params):
+        """
+        计算指标，尽量复用或增量扩展缓存的结果
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            indicator: 指标名称（MyTT函数名，如'MACD'）
+            bars: 以时间为索引的K线数据
+            **params: 指标参数，如SHORT=12
+
+        返回值：
+            与对应MyTT函数相同：单个数组，或多个数组组成的元组
+        """
+        function, inputs, params = self._signature(indicator, params)
+        fields = [INPUT_FIELDS[name] for name in inputs]
+        file_path = self.path_for(code, frequency, indicator, params)
+        hashes = _row_hashes(bars, fields)
+        rows = len(bars)
+        incremental = INDICATORS.get(f"Incremental{indicator}")
+
+        cached = self._read(file_path)
+        start, values, state = 0, None, None
+        if cached is not None and rows:
+            meta, old_values = cached
+            cached_rows = meta['rows']
+            if 0 < cached_rows <= rows and _digest(hashes[:cached_rows - 1]) == meta['prefix']:
+                same_last = int(hashes[cached_rows - 1]) == meta['last']
+                if same_last and cached_rows == rows:
+                    with self._lock:
+                        self._hits += 1
+                    os.utime(file_path)
+                    return self._result(old_values, meta['outputs'])
+                if incremental is not None and meta.get('snapshot'):
+                    start = cached_rows - (0 if same_last else 1)
+                    values, state = old_values, IncrementalIndicator.restore(meta['snapshot'])
+
+        if state is not None:
+            values, outputs = self._extend(state, bars, fields, start, values)
+        else:
+            start = 0
+            result = function(*[bars[field].to_numpy(dtype='float64') for field in fields], **params)
+            outputs = len(result) if isinstance(result, tuple) else 0
+            values = np.vstack([np.asarray(r, dtype='float64') for r in (result if outputs else (result,))])
+            if incremental is not None:
+                state = self._warm_up(incremental(**params), bars, fields)
+        snapshot = state.snapshot() if state is not None else None
+
+        with self._lock:
+            if start:
+                self._extensions += 1
+            else:
+                self._computes += 1
+        if rows:
+            meta = {'code': code, 'frequency': frequency, 'indicator': indicator, 'params': params,
+                    'rows': rows, 'prefix': _digest(hashes[:rows - 1]), 'last': int(hashes[-1]),
+                    'last_ts': str(bars.index[-1]), 'outputs': outputs, 'snapshot': snapshot}
+            try:
+                self._write(file_path, meta, values)
+            except Exception as e:
+                logger.warning(f"保存指标缓存失败：{file_path}，{str(e)}")
+        return self._result(values, outputs)
+
+    @staticmethod
+    def _warm_up(state: IncrementalIndicator, bars: pd.DataFrame, fields: List[str]) -> IncrementalIndicator:
+        """
+        回放最后(最大参数+1)×WARMUP_FACTOR根K线建立增量状态，供之后追加的K线继续计算
+
+        递推状态中更早K线的权重按指数衰减，回放的K线数为最大参数的WARMUP_FACTOR倍时
+        已低于双精度的分辨率，K线不超过这个数量时回放全部历史，与批量计算逐位相同
+        """
+        periods = [value for value in state.params.values() if isinstance(value, (int, float))]
+        window = WARMUP_FACTOR * int(max(periods, default=1)) + WARMUP_FACTOR
+        rows = len(bars)
+        columns = {field: bars[field].to_numpy(dtype='float64')[-window:] for field in fields}
+        for i in range(min(window, rows)):
+            state.update({field: column[i] for field, column in columns.items()})
+        state.bars = rows
+        return state
+
+    def _extend(self, state: IncrementalIndicator, bars: pd.DataFrame, fields: List[str],
+                start: int, values: Optional[np.ndarray]) -> Tuple[np.ndarray, int]:
+        """
+        用增量指标计算第start根及之后的K线，start等于已计算的根数时为追加，
+        小1时先修正最后一根
+        """
+        columns = {field: bars[field].to_numpy(dtype='float64') for field in fields}
+        rows = len(bars)
+        revise = start < state.bars
+        outputs = 0
+        new_values = None
+        for i in range(start, rows):
+            bar = {field: column[i] for field, column in columns.items()}
+            result = state.revise_last(bar) if revise else state.update(bar)
+            revise = False
+            if new_values is None:
+                outputs = len(result) if isinstance(result, tuple) else 0
+                new_values = np.empty((max(outputs, 1), rows))
+                if values is not None:
+                    new_values[:, :start] = values[:, :start]
+            new_values[:, i] = result
+        if new_values is None:
+            new_values = np.empty((1, 0)) if values is None else values
+        return new_values, outputs
+
+    @staticmethod
+    def _result(values: np.ndarray, outputs: int):
+        return tuple(values) if outputs else values[0]
+
+    def _evict(self, keep: Optional[str] = None):
+        """扫描目录重新统计总大小，超过预算时删除最久未使用的条目，直到总大小不超过预算的EVICT_RATIO"""
+        try:
+            entries = [entry for entry in os.scandir(self.root) if entry.name.endswith('.npz')]
+        except FileNotFoundError:
+            entries = []
+        stats = sorted(((entry.stat().st_mtime_ns, entry.stat().st_size, entry.path) for entry in entries))
+        total = sum(size for _, size, _ in stats)
+        target = self.max_bytes * EVICT_RATIO if total > self.max_bytes else total
+        for _, size, path in stats:
+            if total <= target:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            with self._lock:
+                self._evictions += 1
+        with self._lock:
+            self._total = total
+
+    def invalidate(self, code: str, frequency: Optional[str] = None):
+        """
+        删除一只股票的缓存结果
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率，None表示全部频率
+        """
+        prefix = f"{code}_{frequency}_" if frequency else f"{code}_"
+        try:
+            for entry in os.scandir(self.root):
+                if entry.name.startswith(prefix) and entry.name.endswith('.npz'):
+                    size = entry.stat().st_size
+                    os.remove(entry.path)
+                    with self._lock:
+                        if self._total is not None:
+                            self._total -= size
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        """
+        获取缓存统计
+
+        返回值：
+            Dict[str, int]: 命中、增量扩展、完整计算和淘汰的次数
+        """
+        with self._lock:
+            return {'hits': self._hits, 'extensions': self._extensions,
+                    'computes': self._computes, 'evictions': self._evictions}
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+JSON存储后端，保留原有的可读JSON格式，用于兼容旧数据和调试
+"""
+
+import json
+import logging
+from typing import Dict
+import pandas as pd
+from .base import StorageBackend, write_atomic
+from ...utils.file_utils import load_from_json
+
+logger = logging.getLogger(__name__)
+
+def serialize_dataframe(df: pd.DataFrame) -> Dict:
+    """
+    将DataFrame序列化为可JSON化的字典
+    
+    参数：
+        df: pandas DataFrame对象
+        
+    返回值：
+        Dict: 可JSON化的字典
+    """
+    if df is None or df.empty:
+        return {}
+    
+    # 将时间戳转换为字符串
+    df_copy = df.copy()
+    if not df_copy.empty and df_copy.index.dtype.kind == 'M':  # 检查是否为时间戳类型
+        df_copy.index = df_copy.index.strftime('%Y-%m-%d %H:%M:%S')
+    
+    # 转换为字典并确保所有值都是JSON可序列化的
+    data_dict = {
+        'index': df_copy.index.tolist(),
+        'columns': df_copy.columns.tolist(),
+        'data': df_copy.values.tolist()
+    }
+    return data_dict
+
+def deserialize_dataframe(data_dict: Dict) -> pd.DataFrame:
+    """
+    将字典反序列化为DataFrame
+    
+    参数：
+        data_dict: 序列化的数据字典
+        
+    返回值：
+        pd.DataFrame: 反序列化后的DataFrame
+    """
+    if not data_dict or not all(k in data_dict for k in ['index', 'columns', 'data']):
+        return pd.DataFrame()
+    
+    try:
+        df = pd.DataFrame(
+            data=data_dict['data'],
+            index=pd.to_datetime(data_dict['index']),
+            columns=data_dict['columns']
+        )
+        return df
+    except Exception as e:
+        logger.error(f"反序列化DataFrame失败：{str(e)}")
+        return pd.DataFrame()
+
+class JsonBackend(StorageBackend):
+    """JSON存储后端，每根K线的数值按缩进格式逐行写出"""
+    
+    name = 'json'
+    extension = '.json'
+    
+    def encode(self, df: pd.DataFrame) -> bytes:
+        data_dict = serialize_dataframe(df)
+        if not data_dict:
+            raise ValueError("数据序列化失败")
+        return json.dumps(data_dict, ensure_ascii=False, indent=4).encode('utf-8')
+    
+    def save(self, file_path: str, df: pd.DataFrame) -> bool:
+        try:
+            write_atomic(file_path, self.encode(df))
+            return True
+        except Exception as e:
+            logger.error(f"保存JSON文件失败：{str(e)}")
+            return False
+    
+    def load(self, file_path: str) -> pd.DataFrame:
+        data_dict = load_from_json(file_path)
+        if data_dict:
+            return deserialize_dataframe(data_dict)
+        return pd.DataFrame()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+存储格式迁移工具，将数据目录下的K线文件从一种存储后端转换为另一种
+
+用法：
+    python -m src.features.storage.migrate --data-dir data --to columnar [--from json] [--remove]
+"""
+
+import os
+import sys
+import logging
+import argparse
+from typing import Dict, List, Optional
+from . import create_backend, StorageBackend
+
+logger = logging.getLogger(__name__)
+
+def migrate_tree(root: str, source: StorageBackend, target: StorageBackend,
+                 remove_source: bool = False) -> Dict[str, int]:
+    """
+    转换目录树中的所有K线文件，输出文件与源文件同名、位于同一目录
+
+    无法作为K线数据加载的文件（如证券列表）会被跳过
+
+    参数：
+        root: 根目录
+        source: 源存储后端
+        target: 目标存储后端
+        remove_source: 转换成功后是否删除源文件
+
+    返回值：
+        Dict[str, int]: 转换、跳过、失败的文件数和读写字节数
+    """
+    stats = {'converted': 0, 'skipped': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+    for directory, _, files in os.walk(root):
+        for filename in sorted(files):
+            if not filename.endswith(source.extension):
+                continue
+            source_path = os.path.join(directory, filename)
+            target_path = target.path_for(source_path[:-len(source.extension)])
+
+            df = source.load(source_path)
+            if df.empty:
+                stats['skipped'] += 1
+                continue
+            if not target.save(target_path, df):
+                stats['failed'] += 1
+                continue
+
+            stats['converted'] += 1
+            stats['bytes_in'] += os.path.getsize(source_path)
+            stats['bytes_out'] += os.path.getsize(target_path)
+            if remove_source:
+                os.remove(source_path)
+    return stats
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="转换K线数据的存储格式")
+    parser.add_argument('--data-dir', default='data', help="数据根目录")
+    parser.add_argument('--from', dest='source', default='json', help="源存储后端")
+    parser.add_argument('--to', dest='target', default='columnar', help="目标存储后端")
+    parser.add_argument('--remove', action='store_true', help="转换成功后删除源文件")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    source = create_backend(args.source)
+    target = create_backend(args.target)
+
+    total_failed = 0
+    for sub_dir in ('cache', 'stocks'):
+        root = os.path.join(args.data_dir, sub_dir)
+        if not os.path.isdir(root):
+            continue
+        stats = migrate_tree(root, source, target, args.remove)
+        total_failed += stats['failed']
+        logger.info(f"{root}：转换 {stats['converted']} 个，跳过 {stats['skipped']} 个，"
+                    f"失败 {stats['failed']} 个，{stats['bytes_in']} 字节 -> {stats['bytes_out']} 字节")
+    return 1 if total_failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+追加写入的内存映射K线存储
+
+每个(代码, 周期)一个文件：64字节文件头之后是按时间顺序排列的定长K线记录，
+读取时通过内存映射访问文件，按时间戳二分查找区间，返回零拷贝的NumPy视图
+"""
+
+import os
+import struct
+import logging
+from collections import OrderedDict
+from typing import Optional, Tuple
+import numpy as np
+import pandas as pd
+from .base import StorageBackend
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'QBBAR\x01\x00\x00'
+HEADER_SIZE = 64
+_HEADER = struct.Struct('<8sII')
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+BAR_DTYPE = np.dtype([('ts', '<i8')] + [(column, '<f8') for column in BAR_COLUMNS])
+
+# 默认最多保持打开的内存映射数，每个映射占用一个文件描述符和一段虚拟地址空间
+DEFAULT_MAX_MAPS = 256
+
+def _to_records(df: pd.DataFrame) -> np.ndarray:
+    """
+    将DataFrame转换为定长记录数组，缺失的列填充为NaN
+
+    参数：
+        df: 以时间为索引的K线数据
+
+    返回值：
+        np.ndarray: BAR_DTYPE结构化数组
+    """
+    records = np.empty(len(df), dtype=BAR_DTYPE)
+    records['ts'] = pd.DatetimeIndex(df.index).values.astype('datetime64[ns]').view('int64')
+    for column in BAR_COLUMNS:
+        records[column] = df[column].to_numpy(dtype='float64') if column in df.columns else np.nan
+    return records
+
+def records_to_frame(records: np.ndarray) -> pd.DataFrame:
+    """
+    将记录数组转换为DataFrame
+
+    参数：
+        records: BAR_DTYPE结构化数组或其视图
+
+    返回值：
+        pd.DataFrame: 以时间为索引的K线数据
+    """
+    index = pd.DatetimeIndex(records['ts'].view('datetime64[ns]'))
+    return pd.DataFrame({column: records[column] for column in BAR_COLUMNS},
+                        index=index, columns=BAR_COLUMNS)
+
+class MmapBarStore(StorageBackend):
+    """内存映射K线存储后端，缓存文件只追加新K线"""
+
+    name = 'mmap'
+    extension = '.bars'
+    append_only = True
+
+    def __init__(self, max_maps: int = DEFAULT_MAX_MAPS):
+        """
+        参数：
+            max_maps: 最多缓存的内存映射数，超出时关闭最久未使用的映射，0表示不缓存
+        """
+        self.max_maps = max_maps
+        # 文件路径 -> ((文件大小, 修改时间), 内存映射)，按最近使用排序
+        self._maps: 'OrderedDict[str, Tuple[Tuple[int, int], np.memmap]]' = OrderedDict()
+
+    @staticmethod
+    def _write_header(f):
+        header = _HEADER.pack(MAGIC, BAR_DTYPE.itemsize, len(BAR_COLUMNS))
+        f.write(header.ljust(HEADER_SIZE, b'\x00'))
+
+    @staticmethod
+    def _check_header(f):
+        magic, record_size, column_count = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or record_size != BAR_DTYPE.itemsize or column_count != len(BAR_COLUMNS):
+            raise ValueError("不是有效的K线记录文件")
+
+    def records(self, file_path: str) -> np.ndarray:
+        """
+        以内存映射方式打开文件中的全部记录
+
+        参数：
+            file_path: 文件路径
+
+        返回值：
+            np.ndarray: 只读的记录数组（内存映射），文件不存在时返回空数组
+        """
+        if not os.path.exists(file_path):
+            return np.empty(0, dtype=BAR_DTYPE)
+
+        stat = os.stat(file_path)
+        key = (stat.st_size, stat.st_mtime_ns)
+        cached = self._maps.get(file_path)
+        if cached and cached[0] == key:
+            self._maps.move_to_end(file_path)
+            return cached[1]
+
+        with open(file_path, 'rb') as f:
+            self._check_header(f)
+        count = (stat.st_size - HEADER_SIZE) // BAR_DTYPE.itemsize
+        if count <= 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        records = np.memmap(file_path, dtype=BAR_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+        if self.max_maps > 0:
+            self._maps[file_path] = (key, records)
+            self._maps.move_to_end(file_path)
+            while len(self._maps) > self.max_maps:
+                # 已返回给调用方的视图仍持有映射，不受影响
+                self._maps.popitem(last=False)
+        return records
+
+    def read_records(self, file_path: str, start: Optional[pd.Timestamp] = None,
+                     end: Optional[pd.Timestamp] = None) -> np.ndarray:
+        """
+        二分查找读取[start, end)区间的记录，返回内存映射上的零拷贝视图
+
+        参数：
+            file_path: 文件路径
+            start: 起始时间（包含），None表示不限
+            end: 结束时间（不包含），None表示不限
+
+        返回值：
+            np.ndarray: 区间内的记录视图
+        """
+        records = self.records(file_path)
+        ts = records['ts']
+        lo = 0 if start is None else int(np.searchsorted(ts, pd.Timestamp(start).value, side='left'))
+        hi = len(records) if end is None else int(np.searchsorted(ts, pd.Timestamp(end).value, side='left'))
+        return records[lo:hi]
+
+    def read_range(self, file_path: str, start: Optional[pd.Timestamp] = None,
+                   end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        try:
+            return records_to_frame(self.read_records(file_path, start, end))
+        except Exception as e:
+            logger.error(f"读取K线记录失败：{str(e)}")
+            return pd.DataFrame()
+
+    def load(self, file_path: str) -> pd.DataFrame:
+        if not os.path.exists(file_path):
+            logger.warning(f"文件不存在：{file_path}")
+            return pd.DataFrame()
+        return self.read_range(file_path)
+
+    def save(self, file_path: str, df: pd.DataFrame) -> bool:
+        try:
+            if df is None or df.empty:
+                logger.error("数据为空，无法保存")
+                return False
+            df = df.sort_index()
+            records = _to_records(df[~df.index.duplicated(keep='last')])
+            directory = os.path.dirname(file_path)
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+            temp_path = f"{file_path}.tmp"
+            with open(temp_path, 'wb') as f:
+                self._write_header(f)
+                f.write(records.tobytes())
+            os.replace(temp_path, file_path)
+            return True
+        except Exception as e:
+            logger.error(f"保存K线记录失败：{str(e)}")
+            return False
+
+    def append(self, file_path: str, df: pd.DataFrame) -> bool:
+        """
+        按时间顺序追加K线：晚于最后一根K线的记录追加到文件末尾，
+        与最后一根K线时间相同的记录原地覆盖（更新未走完的K线），更早的记录被忽略
+
+        参数：
+            file_path: 文件路径
+            df: 以时间为索引的K线数据
+
+        返回值：
+            bool: 如果保存成功返回True，否则返回False
+        """
+        try:
+            if df is None or df.empty:
+                return True
+            if not os.path.exists(file_path):
+                return self.save(file_path, df)
+
+            df = df.sort_index()
+            new = _to_records(df[~df.index.duplicated(keep='last')])
+            existing = self.records(file_path)
+            last_ts = int(existing['ts'][-1]) if len(existing) else None
+
+            with open(file_path, 'r+b') as f:
+                self._check_header(f)
+                if last_ts is not None:
+                    stale = new['ts'] < last_ts
+                    if stale.any():
+                        # 增量更新时重新获取的数据总是包含已保存的K线，属于正常情况
+                        logger.debug(f"忽略 {int(stale.sum())} 根早于已有数据的K线：{file_path}")
+                    same = new[new['ts'] == last_ts]
+                    if len(same):
+                        f.seek(HEADER_SIZE + (len(existing) - 1) * BAR_DTYPE.itemsize)
+                        f.write(same[-1:].tobytes())
+                    new = new[new['ts'] > last_ts]
+                f.seek(0, os.SEEK_END)
+                f.write(new.tobytes())
+            return True
+        except Exception as e:
+            logger.error(f"追加K线记录失败：{str(e)}")
+            return False
@@ -0,0 +1,382 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+共享内存中的全市场K线快照
+
+发布进程把一批(代码, 周期)的K线打包进multiprocessing.shared_memory段，
+多个分析进程附加到同一个段，直接得到指向共享内存的NumPy视图和DataFrame，
+物理内存占用与附加的进程数无关
+
+共享内存段：
+    控制段   {name}            魔数、序号（seqlock）、当前版本号和数据段名称
+    数据段   {name}_v{version} 文件头、JSON目录、各条目的K线数据
+
+每个条目的数据是时间戳数组(int64)之后接(字段 × K线)的float64块，
+每个字段连续存放，可以零拷贝地构造单块的DataFrame；目录中记录各条目的字段名，
+读取时按发布时的字段和顺序恢复。
+数据段发布后不再修改，更新时写入新版本的数据段再切换控制段中的版本号，
+读取方持有的快照始终是一致的；旧版本的段名在保留数量之外被删除，
+已经附加的进程在关闭前仍可访问
+"""
+
+import json
+import struct
+import time
+import logging
+from multiprocessing import shared_memory, resource_tracker
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_NAME = 'quant_bars'
+MAGIC = b'QBSHM\x01\x00\x00'
+ALIGNMENT = 64
+# 魔数、序号、版本号、数据段名称
+_CONTROL = struct.Struct('<8sQQ64s')
+# 魔数、版本号、目录长度、数据区起始偏移
+_HEADER = struct.Struct('<8sQQQ')
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    """
+    附加到已有的共享内存段，不在resource_tracker中登记
+
+    Python 3.13之前附加方也会登记共享内存段，登记所在的resource_tracker退出时会删除
+    发布方仍在使用的段；而multiprocessing启动的子进程与父进程共用resource_tracker，
+    附加后取消登记又会删掉发布方自己的登记，所以附加期间跳过对这个段的登记，
+    段的生命周期只由发布方管理
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+
+    def skip(resource: str, rtype: str):
+        if rtype != 'shared_memory' or resource.lstrip('/') != name:
+            register(resource, rtype)
+
+    resource_tracker.register = skip
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+def _release(segment: shared_memory.SharedMemory):
+    """
+    关闭共享内存段；仍有NumPy视图引用时把映射留给这些视图，随最后一个视图释放
+    """
+    try:
+        segment.close()
+    except BufferError:
+        segment._buf = None
+        segment._mmap = None
+        segment.close()
+
+def _views(buffer: np.ndarray, offset: int, rows: int, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """条目在段内的时间戳数组(int64)和(字段 × K线)数值块，width为字段数"""
+    ts = buffer[offset:offset + rows * 8].view('int64')
+    start = _align(offset + rows * 8)
+    values = buffer[start:start + width * rows * 8].view('float64').reshape(width, rows)
+    return ts, values
+
+def _entry_size(rows: int, width: int) -> int:
+    return _align(_align(rows * 8) + width * rows * 8)
+
+def _key(code: str, frequency: str) -> str:
+    return f"{code}|{frequency}"
+
+class SharedBarSnapshot:
+    """一个版本的K线快照，返回的数组和DataFrame都是共享内存的只读视图"""
+
+    def __init__(self, segment: shared_memory.SharedMemory):
+        """
+        参数：
+            segment: 已附加的数据段，构造后由快照接管
+        """
+        magic, version, directory_size, data_offset = _HEADER.unpack_from(segment.buf, 0)
+        if magic != MAGIC:
+            _release(segment)
+            raise ValueError(f"不是有效的K线共享内存段：{segment.name}")
+        self.version = version
+        self.name = segment.name
+        directory = bytes(segment.buf[_HEADER.size:_HEADER.size + directory_size])
+        # 条目 -> (偏移, K线数, 字段名)
+        self._directory: Dict[str, Tuple[int, int, List[str]]] = {
+            key: (offset, rows, columns) for key, offset, rows, columns in json.loads(directory.decode('utf-8'))}
+        # 映射交给NumPy数组持有，随快照和最后一个视图释放
+        self._buffer = np.frombuffer(segment.buf, dtype=np.uint8)
+        self._buffer.flags.writeable = False
+        _release(segment)
+
+    def keys(self) -> List[Tuple[str, str]]:
+        """
+        获取快照中的全部(代码, 周期)
+
+        返回值：
+            List[Tuple[str, str]]: (代码, 周期)列表
+        """
+        return [tuple(key.split('|', 1)) for key in self._directory]
+
+    def __contains__(self, item: Tuple[str, str]) -> bool:
+        return _key(*item) in self._directory
+
+    def __len__(self) -> int:
+        return len(self._directory)
+
+    def columns(self, code: str, frequency: str) -> Optional[List[str]]:
+        """
+        获取一个条目的字段名
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+
+        返回值：
+            Optional[List[str]]: 发布时DataFrame的字段名，不存在时返回None
+        """
+        entry = self._directory.get(_key(code, frequency))
+        return None if entry is None else list(entry[2])
+
+    def arrays(self, code: str, frequency: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        获取一个条目的零拷贝视图
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+
+        返回值：
+            Optional[Tuple[np.ndarray, np.ndarray]]: 时间戳数组(datetime64[ns])和
+                (字段 × K线)的数值块，字段顺序同columns()；不存在时返回None
+        """
+        entry = self._directory.get(_key(code, frequency))
+        if entry is None:
+            return None
+        offset, rows, columns = entry
+        ts, values = _views(self._buffer, offset, rows, len(columns))
+        return ts.view('datetime64[ns]'), values
+
+    def frame(self, code: str, frequency: str) -> Optional[pd.DataFrame]:
+        """
+        获取一个条目的DataFrame，字段和顺序与发布时相同，数据不复制，调用方不能修改
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+
+        返回值：
+            Optional[pd.DataFrame]: 以时间为索引的K线数据，不存在时返回None
+        """
+        arrays = self.arrays(code, frequency)
+        if arrays is None:
+            return None
+        ts, values = arrays
+        return pd.DataFrame(values.T, index=pd.DatetimeIndex(ts, copy=False),
+                            columns=self.columns(code, frequency), copy=False)
+
+    def close(self):
+        """释放快照，仍有视图引用共享内存时映射保持到视图释放为止"""
+        self._buffer = None
+
+class SharedBarPublisher:
+    """把K线发布到共享内存的进程，负责创建和删除全部共享内存段"""
+
+    def __init__(self, name: str = DEFAULT_NAME, keep_versions: int = 2):
+        """
+        参数：
+            name: 控制段名称，数据段名称以它为前缀
+            keep_versions: 保留的最近版本数，更早的数据段被删除，至少为1
+        """
+        self.name = name
+        self.keep_versions = max(1, keep_versions)
+        self._control = shared_memory.SharedMemory(name=name, create=True, size=_CONTROL.size)
+        self._control.buf[:_CONTROL.size] = _CONTROL.pack(MAGIC, 0, 0, b'')
+        self._segments: List[shared_memory.SharedMemory] = []
+        self.version = 0
+
+    def publish(self, frames: Dict[Tuple[str, str], pd.DataFrame]) -> int:
+        """
+        发布一个新版本的快照
+
+        参数：
+            frames: (代码, 周期) -> 以时间为索引的K线数据，全部字段需可转换为float64
+
+        返回值：
+            int: 新版本号
+        """
+        version = self.version + 1
+        entries, layout = [], []
+        offset = 0
+        for (code, frequency), df in frames.items():
+            if df is None or df.empty:
+                continue
+            rows = len(df)
+            columns = [str(column) for column in df.columns]
+            layout.append((offset, rows, df))
+            entries.append([_key(code, frequency), offset, rows, columns])
+            offset += _entry_size(rows, len(columns))
+
+        # 目录中的偏移相对于数据区，数据区起始位置确定后再修正
+        directory_size = len(json.dumps(entries).encode('utf-8'))
+        data_offset = _align(_HEADER.size + directory_size + 16 * len(entries) + 64)
+        for entry in entries:
+            entry[1] += data_offset
+        directory = json.dumps(entries).encode('utf-8')
+        if _HEADER.size + len(directory) > data_offset:
+            raise ValueError("共享内存目录超出预留空间")
+
+        segment = shared_memory.SharedMemory(name=f"{self.name}_v{version}", create=True,
+                                             size=max(data_offset + offset, 1))
+        try:
+            self._fill(segment, layout, data_offset)
+            segment.buf[_HEADER.size:_HEADER.size + len(directory)] = directory
+            segment.buf[:_HEADER.size] = _HEADER.pack(MAGIC, version, len(directory), data_offset)
+        except Exception:
+            segment.unlink()
+            _release(segment)
+            raise
+
+        self._switch(version, segment.name)
+        self._segments.append(segment)
+        while len(self._segments) > self.keep_versions:
+            old = self._segments.pop(0)
+            old.unlink()
+            _release(old)
+        self.version = version
+        logger.info(f"发布K线共享内存快照：{segment.name}，{len(entries)}个条目，{segment.size}字节")
+        return version
+
+    @staticmethod
+    def _fill(segment: shared_memory.SharedMemory, layout: List[Tuple[int, int, pd.DataFrame]], data_offset: int):
+        """把各条目的K线写入数据段"""
+        buffer = np.frombuffer(segment.buf, dtype=np.uint8)
+        for relative, rows, df in layout:
+            ts, values = _views(buffer, data_offset + relative, rows, df.shape[1])
+            ts[:] = pd.DatetimeIndex(df.index).values.astype('datetime64[ns]').view('int64')
+            for i in range(df.shape[1]):
+                values[i] = df.iloc[:, i].to_numpy(dtype='float64')
+
+    def publish_from(self, manager, codes: Iterable[str], frequencies: Iterable[str] = ('1d',)) -> int:
+        """
+        从数据管理器的缓存加载K线并发布
+
+        参数：
+            manager: StockDataManager实例
+            codes: 股票代码列表
+            frequencies: 数据频率列表
+
+        返回值：
+            int: 新版本号
+        """
+        frequencies = list(frequencies)
+        return self.publish({(code, frequency): manager.load_cached_data(code, frequency)
+                             for code in codes for frequency in frequencies})
+
+    def _switch(self, version: int, segment_name: str):
+        """按seqlock方式更新控制段：序号为奇数时表示正在写入"""
+        buf = self._control.buf
+        _, sequence, _, _ = _CONTROL.unpack_from(buf, 0)
+        struct.pack_into('<Q', buf, 8, sequence + 1)
+        struct.pack_into('<Q64s', buf, 16, version, segment_name.encode('utf-8'))
+        struct.pack_into('<Q', buf, 8, sequence + 2)
+
+    def close(self):
+        """删除全部共享内存段，已附加的进程在关闭前仍可访问各自的快照"""
+        for segment in self._segments + [self._control]:
+            try:
+                segment.unlink()
+            except FileNotFoundError:
+                pass
+            _release(segment)
+        self._segments = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+class SharedBarReader:
+    """附加到发布进程的共享内存，自动切换到最新版本"""
+
+    def __init__(self, name: str = DEFAULT_NAME, retries: int = 50):
+        """
+        参数：
+            name: 控制段名称
+            retries: 读取控制段或附加数据段失败时的重试次数
+        """
+        self.name = name
+        self.retries = retries
+        self._control = _attach(name)
+        magic, _, _, _ = _CONTROL.unpack_from(self._control.buf, 0)
+        if magic != MAGIC:
+            self._control.close()
+            raise ValueError(f"不是有效的K线共享内存控制段：{name}")
+        self._snapshot: Optional[SharedBarSnapshot] = None
+
+    def current_version(self) -> Tuple[int, str]:
+        """
+        读取控制段中的当前版本
+
+        返回值：
+            Tuple[int, str]: 版本号和数据段名称，尚未发布时版本号为0
+        """
+        for _ in range(self.retries):
+            _, before, version, segment_name = _CONTROL.unpack_from(self._control.buf, 0)
+            after = struct.unpack_from('<Q', self._control.buf, 8)[0]
+            if before == after and before % 2 == 0:
+                return version, segment_name.rstrip(b'\x00').decode('utf-8')
+            time.sleep(0.001)
+        raise RuntimeError(f"读取共享内存控制段{self.name}超时")
+
+    def snapshot(self) -> Optional[SharedBarSnapshot]:
+        """
+        获取最新版本的快照，版本未变化时返回同一个对象
+
+        返回值：
+            Optional[SharedBarSnapshot]: 快照，尚未发布时返回None
+        """
+        for _ in range(self.retries):
+            version, segment_name = self.current_version()
+            if version == 0:
+                return None
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+            try:
+                snapshot = SharedBarSnapshot(_attach(segment_name))
+            except FileNotFoundError:
+                # 读取版本号之后发布方又发布了新版本并删除了这个段
+                continue
+            # 旧快照的视图可能仍被调用方持有，映射随最后一个视图释放
+            if self._snapshot is not None:
+                self._snapshot.close()
+            self._snapshot = snapshot
+            return snapshot
+        raise RuntimeError(f"附加共享内存段{self.name}失败")
+
+    def frame(self, code: str, frequency: str) -> Optional[pd.DataFrame]:
+        """
+        从最新快照获取一个条目的DataFrame
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+
+        返回值：
+            Optional[pd.DataFrame]: 以时间为索引的K线数据，不存在时返回None
+        """
+        snapshot = self.snapshot()
+        return None if snapshot is None else snapshot.frame(code, frequency)
+
+    def close(self):
+        """断开与控制段和当前快照的映射"""
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._control.close()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基于SQLAlchemy的K线数据库存储
+
+所有股票的K线保存在同一张表中，主键为(code, frequency, ts)，
+支持批量upsert、单只股票的时间区间查询和某一时刻的全市场截面查询
+
+StorageBackend按文件路径读写一只股票的完整缓存文件，而这里按(股票, 频率)和时间区间
+读写同一个数据库，因此不注册到BACKENDS，由StockDataManager的bar_store单独使用；
+upsert依赖各数据库的冲突更新语法，只支持SQLite、PostgreSQL和MySQL
+"""
+
+import os
+import logging
+from typing import List, Optional
+import pandas as pd
+from sqlalchemy import (create_engine, event, select, MetaData, Table, Column, Index,
+                        String, BigInteger, Float, PrimaryKeyConstraint)
+from sqlalchemy.engine import make_url
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+
+logger = logging.getLogger(__name__)
+
+BAR_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# 数据库方言 -> 支持冲突更新的insert构造函数
+UPSERT_DIALECTS = {'sqlite': sqlite.insert, 'postgresql': postgresql.insert, 'mysql': mysql.insert}
+
+def _to_epoch_seconds(value) -> int:
+    """将时间转换为Unix时间戳（秒）"""
+    return int(pd.Timestamp(value).value // 10**9)
+
+class SqlBarStore:
+    """K线数据库存储类，默认使用本地SQLite数据库并开启WAL模式"""
+
+    def __init__(self, url: str = 'sqlite:///data/bars.db', echo: bool = False):
+        """
+        参数：
+            url: 数据库连接地址
+            echo: 是否输出SQL日志
+        """
+        dialect = make_url(url).get_backend_name()
+        if dialect not in UPSERT_DIALECTS:
+            raise ValueError(f"不支持的数据库：{dialect}，可选{', '.join(UPSERT_DIALECTS)}")
+        if url.startswith('sqlite:///'):
+            directory = os.path.dirname(url[len('sqlite:///'):])
+            if directory and not os.path.exists(directory):
+                os.makedirs(directory)
+
+        self.url = url
+        self.engine = create_engine(url, echo=echo)
+        if self.engine.dialect.name == 'sqlite':
+            event.listen(self.engine, 'connect', self._configure_sqlite)
+
+        self.metadata = MetaData()
+        self.bars = Table(
+            'bars', self.metadata,
+            Column('code', String(16), nullable=False),
+            Column('frequency', String(8), nullable=False),
+            Column('ts', BigInteger, nullable=False),
+            *[Column(column, Float) for column in BAR_COLUMNS],
+            PrimaryKeyConstraint('code', 'frequency', 'ts'),
+            Index('ix_bars_frequency_ts', 'frequency', 'ts'),
+        )
+        self.metadata.create_all(self.engine)
+
+    @staticmethod
+    def _configure_sqlite(dbapi_connection, connection_record):
+        """为每个SQLite连接开启WAL日志模式"""
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA journal_mode=WAL')
+        cursor.execute('PRAGMA synchronous=NORMAL')
+        cursor.close()
+
+    def upsert(self, code: str, frequency: str, df: pd.DataFrame) -> int:
+        """
+        批量写入K线，主键冲突时更新已有记录
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            df: 以时间为索引的K线数据
+
+        返回值：
+            int: 写入的记录数
+        """
+        if df is None or df.empty:
+            return 0
+        df = df[~df.index.duplicated(keep='last')]
+        ts_values = pd.DatetimeIndex(df.index).values.astype('datetime64[s]').astype('int64')
+        columns = {column: df[column].astype('float64').tolist() if column in df.columns
+                   else [None] * len(df) for column in BAR_COLUMNS}
+        rows = [
+            dict({'code': code, 'frequency': frequency, 'ts': int(ts)},
+                 **{column: columns[column][i] for column in BAR_COLUMNS})
+            for i, ts in enumerate(ts_values)
+        ]
+
+        with self.engine.begin() as conn:
+            conn.execute(self._upsert_statement(), rows)  # 参数列表触发executemany
+        return len(rows)
+
+    def _upsert_statement(self):
+        """按数据库方言构造主键冲突时更新K线字段的insert语句"""
+        stmt = UPSERT_DIALECTS[self.engine.dialect.name](self.bars)
+        if self.engine.dialect.name == 'mysql':
+            return stmt.on_duplicate_key_update({column: stmt.inserted[column] for column in BAR_COLUMNS})
+        return stmt.on_conflict_do_update(
+            index_elements=['code', 'frequency', 'ts'],
+            set_={column: stmt.excluded[column] for column in BAR_COLUMNS},
+        )
+
+    def load(self, code: str, frequency: str, start: Optional[pd.Timestamp] = None,
+             end: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        查询一只股票[start, end)区间的K线
+
+        参数：
+            code: 股票代码
+            frequency: 数据频率
+            start: 起始时间（包含），None表示不限
+            end: 结束时间（不包含），None表示不限
+
+        返回值：
+            pd.DataFrame: 以时间为索引的K线数据
+        """
+        bars = self.bars
+        query = select(bars.c.ts, *[bars.c[column] for column in BAR_COLUMNS]).where(
+            bars.c.code == code, bars.c.frequency == frequency)
+        if start is not None:
+            query = query.where(bars.c.ts >= _to_epoch_seconds(start))
+        if end is not None:
+            query = query.where(bars.c.ts < _to_epoch_seconds(end))
+        query = query.order_by(bars.c.ts)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        if not rows:
+            return pd.DataFrame()
+        df = pd.DataFrame.from_records(rows, columns=['ts'] + BAR_COLUMNS)
+        df.index = pd.to_datetime(df.pop('ts'), unit='s')
+        df.index.name = None
+        return df
+
+    def cross_section(self, frequency: str, ts, codes: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        查询某一时刻所有股票的K线，如某日15:00的收盘价
+
+        参数：
+            frequency: 数据频率
+            ts: K线时间
+            codes: 只查询这些股票，None表示全部
+
+        返回值：
+            pd.DataFrame: 以股票代码为索引的K线数据
+        """
+        bars = self.bars
+        query = select(bars.c.code, *[bars.c[column] for column in BAR_COLUMNS]).where(
+            bars.c.frequency == frequency, bars.c.ts == _to_epoch_seconds(ts))
+        if codes is not None:
+            query = query.where(bars.c.code.in_(list(codes)))
+        query = query.order_by(bars.c.code)
+
+        with self.engine.connect() as conn:
+            rows = conn.execute(query).fetchall()
+        return pd.DataFrame.from_records(rows, columns=['code'] + BAR_COLUMNS, index='code')
+
+    def codes(self, frequency: str) -> List[str]:
+        """
+        获取保存了某个频率数据的全部股票代码
+
+        参数：
+            frequency: 数据频率
+
+        返回值：
+            List[str]: 股票代码列表
+        """
+        query = select(self.bars.c.code).where(self.bars.c.frequency == frequency).distinct()
+        with self.engine.connect() as conn:
+            return [row[0] for row in conn.execute(query.order_by(self.bars.c.code))]
+
+    def close(self):
+        """释放数据库连接"""
+        self.engine.dispose()
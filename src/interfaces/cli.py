@@ -5,11 +5,15 @@
 股票数据操作的命令行界面
 """
 
-import logging
-import sys
+import os
 import io
-from typing import Optional
+import sys
+import time
+import logging
+import argparse
+from typing import Any, List, Optional, Tuple
 from src.controllers.data_controller import DataController
+from src.features.fetch_journal import FetchJournal
 
 logger = logging.getLogger(__name__)
 
@@ -91,6 +95,103 @@ class StockDataCLI:
             except Exception as e:
                 logger.error(f"意外错误：{str(e)}")
     
+    def execute(self, argv: List[str]) -> int:
+        """
+        执行非交互的子命令
+        
+        参数：
+            argv: 命令行参数，如['fetch', '--universe', 'sh_a,sz_a', '--freq', '1d,5m']
+            
+        返回值：
+            int: 退出码
+        """
+        parser = argparse.ArgumentParser(prog='main.py', description="股票数据命令行工具，不带参数时进入交互界面")
+        subparsers = parser.add_subparsers(dest='command', required=True)
+        fetch = subparsers.add_parser('fetch', help="批量下载股票数据，中断后重新运行从检查点继续")
+        fetch.add_argument('--universe', required=True,
+                           help="市场节点（如sh_a、sz_a）或股票代码，逗号分隔")
+        fetch.add_argument('--freq', default='1d', help="数据频率，逗号分隔，默认1d")
+        fetch.add_argument('--count', type=int, default=800, help="每只股票获取的数据点数量")
+        fetch.add_argument('--jobs', type=int, help="工作进程数，默认为CPU核数")
+        fetch.add_argument('--journal', help="检查点日志路径，默认为缓存目录下的fetch_journal.jsonl")
+        fetch.add_argument('--incremental', action='store_true', help="只获取已保存数据之后的新K线")
+        fetch.add_argument('--restart', action='store_true', help="忽略已有的检查点重新下载")
+        args = parser.parse_args(argv)
+        
+        if not self.controller.initialize():
+            logger.error("初始化数据控制器失败")
+            return 1
+        frequencies = [freq for freq in args.freq.split(',') if freq]
+        unknown = [freq for freq in frequencies if freq not in self.frequencies]
+        if unknown:
+            parser.error(f"不支持的数据频率：{', '.join(unknown)}")
+        return self.fetch([name for name in args.universe.split(',') if name], frequencies,
+                          args.count, args.jobs, args.journal, args.incremental, args.restart)
+    
+    def fetch(self, universe: List[str], frequencies: List[str], count: int = 800,
+              jobs: Optional[int] = None, journal: Optional[str] = None,
+              incremental: bool = False, restart: bool = False) -> int:
+        """
+        批量下载股票数据并输出吞吐量统计
+        
+        每完成一个(股票, 频率)记录到检查点日志，相同参数再次运行时跳过已成功的任务，
+        全部成功后删除检查点日志
+        
+        参数：
+            universe: 市场节点或股票代码
+            frequencies: 数据频率列表
+            count: 每只股票获取的数据点数量
+            jobs: 工作进程数，默认为CPU核数
+            journal: 检查点日志路径，默认为缓存目录下的fetch_journal.jsonl
+            incremental: 是否只获取已保存数据之后的新K线
+            restart: 是否忽略已有的检查点
+            
+        返回值：
+            int: 退出码，有任务失败时为1
+        """
+        codes = self.controller.resolve_universe(universe)
+        if not codes:
+            logger.error("股票列表为空")
+            return 1
+        
+        journal = journal or os.path.join(self.controller.manager.cache_dir, "fetch_journal.jsonl")
+        params = {'universe': universe, 'frequencies': frequencies, 'count': count, 'incremental': incremental}
+        checkpoint = FetchJournal(journal, params)
+        resumed = checkpoint.open(restart)
+        if resumed:
+            logger.info(f"从检查点继续，跳过已完成的 {resumed} 个任务：{journal}")
+        
+        total = len(codes) * len(frequencies) - resumed
+        summary = {'succeeded': 0, 'bars': 0, 'bytes': 0}
+        symbols = set()
+        
+        def on_result(task: Tuple[str, str], success: bool, value: Any):
+            checkpoint.record(task, success, value)
+            if success:
+                summary['succeeded'] += 1
+                summary['bars'] += value['bars']
+                summary['bytes'] += value['bytes']
+                symbols.add(task[0])
+            else:
+                logger.error(f"{task[0]} {task[1]} 下载失败：{value}")
+        
+        print(f"\n下载 {len(codes)} 只股票的 {','.join(frequencies)} 数据，共 {total} 个任务")
+        started_at = time.perf_counter()
+        try:
+            self.controller.backfill(codes, frequencies, count, jobs, incremental,
+                                     on_result=on_result, skip=list(checkpoint.completed))
+        finally:
+            elapsed = max(time.perf_counter() - started_at, 1e-9)
+            failed = total - summary['succeeded']
+            checkpoint.close(remove=failed == 0)
+        
+        print(f"完成 {summary['succeeded']}/{total} 个任务，失败 {failed} 个，耗时 {elapsed:.1f} 秒")
+        print(f"吞吐量：{len(symbols) / elapsed:.1f} 只股票/秒，{summary['bars'] / elapsed:.0f} 根K线/秒，"
+              f"写入 {summary['bytes'] / 1024 / 1024:.1f} MB（{summary['bytes'] / elapsed / 1024:.0f} KB/秒）")
+        if failed:
+            print(f"检查点已保存到 {journal}，重新运行相同的命令继续下载")
+        return 1 if failed else 0
+    
     def _get_valid_input(self, prompt: str, min_val: int, max_val: int) -> Optional[int]:
         """
         获取有效的用户输入
@@ -10,11 +10,29 @@ Ashare - A股票行情数据双核心版
 """
 
 import json
-import requests
+import asyncio
 import datetime
+import functools
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
+try:
+    from ..core.http_pool import get_default_pool
+except ImportError:  # 作为独立文件使用时没有包内的连接池，退回到requests的共享会话
+    import requests
+    get_default_pool = functools.lru_cache(maxsize=None)(requests.Session)
 
-def get_price_day_tx(code, end_date='', count=10, frequency='1d'):
+SINA_HOST = 'money.finance.sina.com.cn'
+TX_DAY_HOST = 'web.ifzq.gtimg.cn'
+TX_MIN_HOST = 'ifzq.gtimg.cn'
+
+# get_prices 每个主机的默认最大并发请求数
+DEFAULT_HOST_LIMITS = {SINA_HOST: 8, TX_DAY_HOST: 8, TX_MIN_HOST: 8}
+
+def _http_get(url, session=None):
+    """通过连接池发送GET请求，未指定session时使用共享的默认连接池"""
+    return (session or get_default_pool()).get(url)
+
+def get_price_day_tx(code, end_date='', count=10, frequency='1d', session=None):
     """从腾讯接口获取日线数据
     
     Args:
@@ -22,6 +40,7 @@ def get_price_day_tx(code, end_date='', count=10, frequency='1d'):
         end_date: 结束日期，默认为空（当前日期）
         count: 获取数据的条数
         frequency: 数据周期，支持 '1d'（日线）, '1w'（周线）, '1M'（月线）
+        session: HTTP连接池，默认使用共享连接池
     
     Returns:
         DataFrame包含columns: ['time', 'open', 'close', 'high', 'low', 'volume']
@@ -36,7 +55,7 @@ def get_price_day_tx(code, end_date='', count=10, frequency='1d'):
     
     # 构建请求URL并获取数据
     URL = f'http://web.ifzq.gtimg.cn/appstock/app/fqkline/get?param={code},{unit},,{end_date},{count},qfq'
-    response = json.loads(requests.get(URL).content)
+    response = json.loads(_http_get(URL, session).content)
     
     # 解析数据
     ms = 'qfq' + unit #"前复权"（forward adjusted quote）
@@ -54,7 +73,7 @@ def get_price_day_tx(code, end_date='', count=10, frequency='1d'):
     
     return df
 
-def get_price_min_tx(code, end_date=None, count=10, frequency='1d'):
+def get_price_min_tx(code, end_date=None, count=10, frequency='1d', session=None):
     """从腾讯接口获取分钟线数据
     
     Args:
@@ -62,6 +81,7 @@ def get_price_min_tx(code, end_date=None, count=10, frequency='1d'):
         end_date: 结束日期，默认为None
         count: 获取数据的条数
         frequency: 数据周期，如 '1m', '5m', '15m', '30m', '60m'
+        session: HTTP连接池，默认使用共享连接池
     
     Returns:
         DataFrame包含columns: ['time', 'open', 'close', 'high', 'low', 'volume']
@@ -75,7 +95,7 @@ def get_price_min_tx(code, end_date=None, count=10, frequency='1d'):
     
     # 获取数据
     URL = f'http://ifzq.gtimg.cn/appstock/app/kline/mkline?param={code},m{ts},,{count}'
-    response = json.loads(requests.get(URL).content)
+    response = json.loads(_http_get(URL, session).content)
     buf = response['data'][code]['m'+str(ts)]
     
     # 创建DataFrame并处理数据
@@ -91,7 +111,7 @@ def get_price_min_tx(code, end_date=None, count=10, frequency='1d'):
     
     return df
 
-def get_price_sina(code, end_date='', count=10, frequency='60m'):
+def get_price_sina(code, end_date='', count=10, frequency='60m', session=None):
     """从新浪接口获取全周期数据
     
     Args:
@@ -99,6 +119,7 @@ def get_price_sina(code, end_date='', count=10, frequency='60m'):
         end_date: 结束日期
         count: 获取数据的条数
         frequency: 数据周期，支持分钟线(5m,15m,30m,60m)和日线(1d=240m)、周线(1w=1200m)、月线(1M=7200m)
+        session: HTTP连接池，默认使用共享连接池
     
     Returns:
         DataFrame包含columns: ['day', 'open', 'high', 'low', 'close', 'volume']
@@ -118,7 +139,7 @@ def get_price_sina(code, end_date='', count=10, frequency='60m'):
     
     # 获取数据
     URL = f'http://money.finance.sina.com.cn/quotes_service/api/json_v2.php/CN_MarketData.getKLineData?symbol={code}&scale={ts}&ma=5&datalen={count}'
-    dstr = json.loads(requests.get(URL).content)
+    dstr = json.loads(_http_get(URL, session).content)
     
     # 创建DataFrame并处理数据类型
     df = pd.DataFrame(dstr, columns=['day', 'open', 'high', 'low', 'close', 'volume'])
@@ -135,7 +156,25 @@ def get_price_sina(code, end_date='', count=10, frequency='60m'):
         return df[df.index <= end_date][-mcount:]
     return df
 
-def get_price(code, end_date='', count=10, frequency='1d', fields=[]):
+def _normalize_code(code):
+    """统一股票代码格式，将'000001.XSHG'转换为'sh000001'"""
+    xcode = code.replace('.XSHG', '').replace('.XSHE', '')
+    return 'sh'+xcode if ('XSHG' in code) else 'sz'+xcode if ('XSHE' in code) else code
+
+def _price_sources(frequency):
+    """按优先级返回数据源列表[(主机, 获取函数), ...]，前一个失败时依次使用后一个"""
+    # 处理日线、周线、月线数据
+    if frequency in ['1d', '1w', '1M']:
+        return [(SINA_HOST, get_price_sina), (TX_DAY_HOST, get_price_day_tx)]  # 主力数据源, 备用数据源
+
+    # 处理分钟线数据
+    if frequency in ['1m', '5m', '15m', '30m', '60m']:
+        if frequency in '1m':
+            return [(TX_MIN_HOST, get_price_min_tx)]
+        return [(SINA_HOST, get_price_sina), (TX_MIN_HOST, get_price_min_tx)]  # 主力数据源, 备用数据源
+    return []
+
+def get_price(code, end_date='', count=10, frequency='1d', fields=[], session=None):
     """统一接口函数，用于获取股票行情数据
     
     Args:
@@ -148,29 +187,74 @@ def get_price(code, end_date='', count=10, frequency='1d', fields=[]):
                   - 日线'1d'、周线'1w'、月线'1M'
                   - 分钟线'1m','5m','15m','30m','60m'
         fields: 保留参数，用于未来扩展
+        session: HTTP连接池，默认使用共享连接池
     
     Returns:
         DataFrame格式的股票行情数据
     """
-    # 统一股票代码格式
-    xcode = code.replace('.XSHG', '').replace('.XSHE', '')
-    xcode = 'sh'+xcode if ('XSHG' in code) else 'sz'+xcode if ('XSHE' in code) else code
-
-    # 处理日线、周线、月线数据
-    if frequency in ['1d', '1w', '1M']:
+    xcode = _normalize_code(code)
+    sources = _price_sources(frequency)
+    for i, (host, func) in enumerate(sources):
         try:
-            return get_price_sina(xcode, end_date=end_date, count=count, frequency=frequency)  # 主力数据源
+            return func(xcode, end_date=end_date, count=count, frequency=frequency, session=session)
         except:
-            return get_price_day_tx(xcode, end_date=end_date, count=count, frequency=frequency)  # 备用数据源
+            if i == len(sources) - 1:
+                raise
 
-    # 处理分钟线数据
-    if frequency in ['1m', '5m', '15m', '30m', '60m']:
-        if frequency in '1m':
-            return get_price_min_tx(xcode, end_date=end_date, count=count, frequency=frequency)
-        try:
-            return get_price_sina(xcode, end_date=end_date, count=count, frequency=frequency)  # 主力数据源
-        except:
-            return get_price_min_tx(xcode, end_date=end_date, count=count, frequency=frequency)  # 备用数据源
+async def get_prices_async(codes, end_date='', count=10, frequency='1d', session=None, host_limits=None):
+    """并发获取多只股票的行情数据（协程版本）
+    
+    每只股票按与get_price相同的数据源顺序依次尝试，每个主机的并发请求数受host_limits限制
+    
+    Args:
+        codes: 股票代码列表
+        end_date: 结束日期，默认为当前日期
+        count: 获取的数据条数
+        frequency: 数据周期，同get_price
+        session: HTTP连接池，默认使用共享连接池
+        host_limits: 每个主机的最大并发请求数，如 {SINA_HOST: 4}，未指定的主机使用默认值
+    
+    Returns:
+        (data, errors): data为{代码: DataFrame}，errors为{代码: 错误信息}
+    """
+    limits = dict(DEFAULT_HOST_LIMITS)
+    limits.update(host_limits or {})
+    semaphores = {host: asyncio.Semaphore(n) for host, n in limits.items()}
+    loop = asyncio.get_running_loop()
+    codes = list(dict.fromkeys(codes))  # 去重并保持顺序
+
+    async def fetch_one(executor, code):
+        xcode = _normalize_code(code)
+        sources = _price_sources(frequency)
+        if not sources:
+            raise ValueError(f'不支持的数据周期：{frequency}')
+        for i, (host, func) in enumerate(sources):
+            async with semaphores[host]:
+                try:
+                    return await loop.run_in_executor(executor, functools.partial(
+                        func, xcode, end_date=end_date, count=count, frequency=frequency, session=session))
+                except Exception:
+                    if i == len(sources) - 1:
+                        raise
+
+    with ThreadPoolExecutor(max_workers=max(sum(limits.values()), 1)) as executor:
+        results = await asyncio.gather(*(fetch_one(executor, code) for code in codes), return_exceptions=True)
+
+    data, errors = {}, {}
+    for code, result in zip(codes, results):
+        if isinstance(result, BaseException):
+            errors[code] = str(result) or type(result).__name__
+        else:
+            data[code] = result
+    return data, errors
+
+def get_prices(codes, end_date='', count=10, frequency='1d', session=None, host_limits=None):
+    """并发获取多只股票的行情数据，参数与返回值同get_prices_async
+    
+    在已运行的事件循环中请直接 await get_prices_async
+    """
+    return asyncio.run(get_prices_async(codes, end_date=end_date, count=count, frequency=frequency,
+                                        session=session, host_limits=host_limits))
 
 if __name__ == '__main__':
     df = get_price('sh000001', frequency='1d', count=10)  # 支持'1d'日, '1w'周, '1M'月
@@ -1,56 +1,98 @@
 # MyTT 麦语言-通达信-同花顺指标实现    https://github.com/mpquant/MyTT
 # V2.1 2021-6-6 新增 BARSLAST函数
 # V2.2 2021-6-8 新增 SLOPE,FORCAST线性回归，和回归预测函数
+# 所有函数同时支持一维序列和(K线 × 股票)的二维面板，面板沿时间轴(第0维)对每只股票计算；宽表DataFrame可用PANEL调用
+# 0级函数接受并返回NumPy数组：float32输入返回float32，out=参数可传入预先分配的结果数组(不能与输入共享内存)
   
 import numpy as np; import pandas as pd
+from .rolling import rolling_max, rolling_min, rolling_sum, rolling_mean, rolling_std, rolling_mad, rolling_linreg  #O(N)滑动窗口内核
+from .rolling import as_float, output_array
+
+#------------------ 递推滤波内核 Y[i]=(A*X[i]+B*Y[i-1])/C，运算顺序与逐点递推完全一致，结果逐位相同 ------
+def _recursive_py(X, Y, START, A, B, C):  #纯Python浮点递推，避免逐个索引NumPy/pandas元素
+    if X.ndim > 1:                         #二维面板逐行递推，每一步对所有股票同时计算
+        Y = Y.copy()
+        for i in range(START, len(X)):  Y[i] = (A*X[i] + B*Y[i-1]) / C
+        return Y
+    y = float(Y[START-1]);  out = Y[:START].tolist();  append = out.append
+    for ax in (A*X[START:]).tolist():  y = (ax + B*y) / C;  append(y)   #A*X[i]先整体相乘，与逐点计算结果相同
+    return np.array(out)
+
+try:                                       #安装了numba时编译递推内核（不开启fastmath，保证逐位相同）
+    from numba import njit as _njit
+    @_njit(cache=True)
+    def _recursive_nb(X, Y, START, A, B, C):
+        Y = Y.copy()
+        for i in range(START, len(X)):  Y[i] = (A*X[i] + B*Y[i-1]) / C
+        return Y
+except ImportError:  _recursive_nb = None
+
+def _RECURSIVE(X, Y, START, A, B, C):     #X输入序列,Y初始值(START之前的值有效),从START开始递推,返回新数组
+    if _recursive_nb is not None:  return _recursive_nb(X, Y, START, A, B, C)
+    return _recursive_py(X, Y, START, A, B, C)
+
+def _PD(S):  return pd.DataFrame(S) if np.ndim(S)==2 else pd.Series(S)    #二维面板用DataFrame按列计算
+
+def _OUT(R, X, out):                       #计算结果R按输入X的类型返回(pandas返回的只读数组需复制)，或写入out
+    if out is None:  return R.astype(X.dtype, copy=not R.flags.writeable)
+    out[...] = R;  return out
 
 #------------------ 0级：核心工具函数 --------------------------------------------      
-def RD(N,D=3):   return np.round(N,D)        #四舍五入取3位小数 
+def RD(N,D=3,out=None):   return np.round(N,D,out=out)        #四舍五入取3位小数 
 def RET(S,N=1):  return np.array(S)[-N]      #返回序列倒数第N个值,默认返回最后一个
-def ABS(S):      return np.abs(S)            #返回N的绝对值
-def MAX(S1,S2):  return np.maximum(S1,S2)    #序列max
-def MIN(S1,S2):  return np.minimum(S1,S2)    #序列min
+def ABS(S,out=None):      return np.abs(S,out=out)            #返回N的绝对值
+def MAX(S1,S2,out=None):  return np.maximum(S1,S2,out=out)    #序列max
+def MIN(S1,S2,out=None):  return np.minimum(S1,S2,out=out)    #序列min
          
-def MA(S,N):           #求序列的N日平均值，返回序列                    
-    return pd.Series(S).rolling(N).mean().values
+def MA(S,N,out=None):           #求序列的N日平均值，返回序列                    
+    return rolling_mean(S,N,out)
 
-def REF(S, N=1):       #对序列整体下移动N,返回序列(shift后会产生NAN)    
-    return pd.Series(S).shift(N).values  
+def REF(S, N=1, out=None):       #对序列整体下移动N,返回序列(shift后会产生NAN)    
+    X=as_float(S);  R=output_array(X,out)
+    if abs(N)>=len(X): return R                          #序列不足N根时全部为NAN
+    if N>=0:  R[N:]=X[:len(X)-N]
+    else:     R[:N]=X[-N:]
+    return R
 
-def DIFF(S, N=1):      #前一个值减后一个值,前面会产生nan 
-    return pd.Series(S).diff(N)  #np.diff(S)直接删除nan，会少一行
+def DIFF(S, N=1, out=None):      #前一个值减后一个值,前面会产生nan (np.diff(S)直接删除nan，会少一行)
+    X=as_float(S);  R=REF(X,N,out)
+    return np.subtract(X,R,out=R)
 
-def STD(S,N):           #求序列的N日标准差，返回序列    
-    return  pd.Series(S).rolling(N).std(ddof=0).values     
+def STD(S,N,out=None):           #求序列的N日标准差，返回序列    
+    return  rolling_std(S,N,ddof=0,out=out)     
 
 def IF(S_BOOL,S_TRUE,S_FALSE):          #序列布尔判断 res=S_TRUE if S_BOOL==True  else  S_FALSE
     return np.where(S_BOOL, S_TRUE, S_FALSE)
 
-def SUM(S, N):                          #对序列求N天累计和，返回序列         
-    return pd.Series(S).rolling(N).sum().values
+def SUM(S, N, out=None):                          #对序列求N天累计和，返回序列         
+    return rolling_sum(S,N,out)
 
-def HHV(S,N):                           # HHV(C, 5)  # 最近5天收盘最高价        
-    return pd.Series(S).rolling(N).max().values
+def HHV(S,N,out=None):                           # HHV(C, 5)  # 最近5天收盘最高价        
+    return rolling_max(S,N,out)
 
-def LLV(S,N):                           # LLV(C, 5)  # 最近5天收盘最低价     
-    return pd.Series(S).rolling(N).min().values
+def LLV(S,N,out=None):                           # LLV(C, 5)  # 最近5天收盘最低价     
+    return rolling_min(S,N,out)
 
-def EMA(S,N):         #指数移动平均,为了精度 S>4*N  EMA至少需要120周期       
-    return pd.Series(S).ewm(span=N, adjust=False).mean().values    
+def EMA(S,N,out=None):         #指数移动平均,为了精度 S>4*N  EMA至少需要120周期，使用pandas编译的ewm递推(数组视图，不复制输入)
+    X=as_float(S)
+    return _OUT(_PD(X).ewm(span=N, adjust=False).mean().to_numpy(), X, out)
 
-def SMA(S, N, M=1):   #中国式的SMA,至少需要120周期才精确         
-    K = pd.Series(S).rolling(N).mean()    #先求出平均值 (下面如果有不用循环的办法，能提高性能，望告知)
-    for i in range(N+1, len(S)):  K[i] = (M * S[i] + (N -M) * K[i-1]) / N  # 因为要取K[i-1]，所以 range(N+1, len(S))        
-    return K
+def SMA(S, N, M=1, out=None):   #中国式的SMA,至少需要120周期才精确         
+    X=np.asarray(S,dtype=float);  K=np.full(X.shape,np.nan)   #先求出平均值，从第N+1个值开始递推 K[i]=(M*S[i]+(N-M)*K[i-1])/N
+    K[:N+1]=_PD(X[:N+1]).rolling(N).mean().to_numpy()          #只有前N+1个均值会被用到
+    if len(K) > N+1: K = _RECURSIVE(X, K, N+1, M, N-M, N)
+    return _OUT(K, as_float(S), out)
+
+def AVEDEV(S,N,out=None):      #平均绝对偏差  (序列与其平均值的绝对差的平均值)   
+    return rolling_mad(S,N,out)
 
-def AVEDEV(S,N):      #平均绝对偏差  (序列与其平均值的绝对差的平均值)   
-    avedev=pd.Series(S).rolling(N).apply(lambda x: (np.abs(x - x.mean())).mean())    
-    return avedev.values
+def LINREG(S,N):                       #N周期滚动线性回归,返回每个周期的(斜率,截距,下一周期预测值,R²)序列,截距为窗口第一个点的拟合值
+    return rolling_linreg(S,N)
 
 def SLOPE(S,N,RS=False):               #返S序列N周期回线性回归斜率 (默认只返回斜率,不返回整个直线序列)
-    M=pd.Series(S[-N:]);   poly = np.polyfit(M.index, M.values,deg=1);    Y=np.polyval(poly, M.index); 
-    if RS: return Y[1]-Y[0],Y
-    return Y[1]-Y[0]
+    M=np.asarray(S,dtype=float)[-N:];   K,B,_,_=(R[-1] for R in rolling_linreg(M,len(M)));   
+    if RS: return K,B+np.multiply.outer(np.arange(len(M)),K)
+    return K
 
   
 #------------------   1级：应用层函数(通过0级核心函数实现） ----------------------------------
@@ -61,21 +103,39 @@ def EVERY(S_BOOL, N):                  # EVERY(CLOSE>O, 5)   最近N天是否都
     R=SUM(S_BOOL, N)
     return  IF(R==N, True, False)
   
-def LAST(S_BOOL, A, B):                #从前A日到前B日一直满足S_BOOL条件   
-    if A<B: A=B                        #要求A>B    例：LAST(CLOSE>OPEN,5,3)  5天前到3天前是否都收阳线     
-    return S_BOOL[-A:-B].sum()==(A-B)  #返回单个布尔值    
+def _INDEX(M):  return np.arange(len(M)).reshape((-1,)+(1,)*(M.ndim-1))   #沿时间轴的位置，可与面板广播
+
+def _LASTINDEX(S_BOOL):                #每个周期上一次条件成立(含当前周期)的位置，从未成立为-1
+    M=np.asarray(S_BOOL,dtype=bool);   I=_INDEX(M)
+    return M,I,np.maximum.accumulate(np.where(M,I,-1),axis=0)
+
+def LAST(S_BOOL, A, B):                #每个周期判断从前A日到前B日(当前周期为0)是否一直满足S_BOOL条件，返回布尔序列   
+    if A<B: A=B                        #要求A>=B   例：LAST(CLOSE>OPEN,5,3)  5天前到3天前是否都收阳线     
+    M=np.asarray(S_BOOL,dtype=bool)
+    C=np.concatenate((np.zeros((1,)+M.shape[1:],dtype=int),np.cumsum(M,axis=0)))   #前缀计数，窗口内成立的次数由差值求得
+    R=np.zeros(M.shape,dtype=bool)
+    if len(M)>A: R[A:]=(C[A-B+1:len(M)-B+1]-C[:len(M)-A])==(A-B+1)
+    return R
 
 def EXIST(S_BOOL, N=5):                # EXIST(CLOSE>3010, N=5)  n日内是否存在一天大于3000点
     R=SUM(S_BOOL,N)    
     return IF(R>0, True ,False)
 
-def BARSLAST(S_BOOL):                  #上一次条件成立到当前的周期  
-    M=np.argwhere(S_BOOL);             # BARSLAST(CLOSE/REF(CLOSE)>=1.1) 上一次涨停到今天的天数
-    return len(S_BOOL)-int(M[-1])-1  if M.size>0 else -1
+def BARSLAST(S_BOOL):                  #每个周期上一次条件成立到当前的周期数，当前成立为0，此前从未成立为NAN  
+    M,I,L=_LASTINDEX(S_BOOL)           # BARSLAST(CLOSE/REF(CLOSE)>=1.1)<=3 最近3天内涨停过
+    return np.where(L>=0, I-L, np.nan)
+
+def BARSCOUNT(S):                      #第一个有效数据到当前的周期数(含当前)，之前为NAN  BARSCOUNT(CLOSE)>=120 上市满120个周期
+    V=~np.isnan(as_float(S));   I=_INDEX(V);   F=V.argmax(axis=0)
+    return np.where(V.any(axis=0) & (I>=F), I-F+1, np.nan)
+
+def VALUEWHEN(S_BOOL, S):              #条件成立时取S的当前值，否则取上一次成立时的值，从未成立为NAN  VALUEWHEN(CROSS(MA(C,5),MA(C,10)),C)
+    M,I,L=_LASTINDEX(S_BOOL);   X=np.broadcast_to(as_float(S),M.shape)
+    return np.where(L>=0, np.take_along_axis(X,np.maximum(L,0),axis=0), np.nan)
 
 def FORCAST(S,N):                      #返S序列N周期回线性回归后的预测值
-    K,Y=SLOPE(S,N,RS=True)
-    return Y[-1]+K
+    M=np.asarray(S,dtype=float)[-N:]
+    return rolling_linreg(M,len(M))[2][-1]
   
 def CROSS(S1,S2):                      #判断穿越 CROSS(MA(C,5),MA(C,10))               
     CROSS_BOOL=IF(S1>S2, True ,False)   
@@ -85,18 +145,20 @@ def CROSS(S1,S2):                      #判断穿越 CROSS(MA(C,5),MA(C,10))
 
 #------------------   2级：技术指标函数(全部通过0级，1级函数实现） ------------------------------
 def MACD(CLOSE,SHORT=12,LONG=26,M=9):            # EMA的关系，S取120日，和雪球小数点2位相同
-    DIF = EMA(CLOSE,SHORT)-EMA(CLOSE,LONG);  
-    DEA = EMA(DIF,M);      MACD=(DIF-DEA)*2
-    return RD(DIF),RD(DEA),RD(MACD)
+    DIF = EMA(CLOSE,SHORT);  DIF -= EMA(CLOSE,LONG)           #原地运算，不产生中间数组
+    DEA = EMA(DIF,M);      MACD=np.subtract(DIF,DEA);  MACD *= 2
+    return RD(DIF,out=DIF),RD(DEA,out=DEA),RD(MACD,out=MACD)
 
 def KDJ(CLOSE,HIGH,LOW, N=9,M1=3,M2=3):         # KDJ指标
-    RSV = (CLOSE - LLV(LOW, N)) / (HHV(HIGH, N) - LLV(LOW, N)) * 100
+    LL = LLV(LOW, N);  HH = HHV(HIGH, N);  HH -= LL
+    RSV = np.subtract(as_float(CLOSE), LL, out=LL);  RSV /= HH;  RSV *= 100
     K = EMA(RSV, (M1*2-1));    D = EMA(K,(M2*2-1));        J=K*3-D*2
     return K, D, J
 
 def RSI(CLOSE, N=24):      
-    DIF = CLOSE-REF(CLOSE,1) 
-    return RD(SMA(MAX(DIF,0), N) / SMA(ABS(DIF), N) * 100)  
+    DIF = DIFF(CLOSE)
+    R = SMA(MAX(DIF,0), N);  R /= SMA(ABS(DIF,out=DIF), N);  R *= 100
+    return RD(R,out=R)
 
 def WR(CLOSE, HIGH, LOW, N=10, N1=6):            #W&R 威廉指标
     WR = (HHV(HIGH, N) - CLOSE) / (HHV(HIGH, N) - LLV(LOW, N)) * 100
@@ -110,10 +172,9 @@ def BIAS(CLOSE,L1=6, L2=12, L3=24):              # BIAS乖离率
     return RD(BIAS1), RD(BIAS2), RD(BIAS3)
 
 def BOLL(CLOSE,N=20, P=2):                       #BOLL指标，布林带    
-    MID = MA(CLOSE, N); 
-    UPPER = MID + STD(CLOSE, N) * P
-    LOWER = MID - STD(CLOSE, N) * P
-    return RD(UPPER), RD(MID), RD(LOWER)    
+    MID = MA(CLOSE, N);  SD = STD(CLOSE, N);  SD *= P
+    UPPER = MID + SD;    LOWER = np.subtract(MID, SD, out=SD)
+    return RD(UPPER,out=UPPER), RD(MID,out=MID), RD(LOWER,out=LOWER)    
 
 def PSY(CLOSE,N=12, M=6):  
     PSY=COUNT(CLOSE>REF(CLOSE,1),N)/N*100
@@ -182,4 +243,13 @@ def ROC(CLOSE,N=12,M=6):                             #变动率指标
     ROC=100*(CLOSE-REF(CLOSE,N))/REF(CLOSE,N);    MAROC=MA(ROC,M)
     return ROC,MAROC  
   
+def PANEL(FUNC,*ARGS,**KWARGS):                      #宽表计算 PANEL(MACD,CLOSE_DF)：DataFrame参数(行=K线,列=股票)转为数组调用FUNC,
+    FRAMES=[A for A in ARGS if isinstance(A,pd.DataFrame)]   #与输入形状相同的结果按原索引和列名还原为DataFrame
+    if not FRAMES: return FUNC(*ARGS,**KWARGS)
+    F=FRAMES[0]
+    if any(not (A.index.equals(F.index) and A.columns.equals(F.columns)) for A in FRAMES): raise ValueError("DataFrame参数的索引和列必须一致")
+    R=FUNC(*[A.values if isinstance(A,pd.DataFrame) else A for A in ARGS],**KWARGS)
+    WRAP=lambda X: pd.DataFrame(X,index=F.index,columns=F.columns) if np.shape(X)==F.shape else X
+    return tuple(WRAP(X) for X in R) if isinstance(R,tuple) else WRAP(R)
+
   #望大家能提交更多指标和函数  https://github.com/mpquant/MyTT
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+麦语言/通达信公式编译器
+
+将公式文本解析为表达式DAG：相同的子表达式（如多个公式中的EMA(CLOSE,12)）只保留
+一个节点，按拓扑顺序每个节点只计算一次，中间结果在最后一次使用后释放或被原地复用。
+函数调用映射到MyTT中的同名函数，因此既可以对单只股票的一维序列求值，
+也可以对(K线 × 股票)的二维面板一次求值
+
+公式语法：
+    DIF:EMA(CLOSE,12)-EMA(CLOSE,26);    输出行，名称:表达式
+    MID:=MA(C,20);                      中间变量，名称:=表达式，不输出
+    C>MID AND V>MA(V,5);                未命名的输出行，依次命名为OUT1、OUT2...
+语句以分号结束，表达式未写完时可以换行继续书写
+支持 + - * / > < >= <= = <> AND OR 运算符、NOT函数以及{}和//注释
+"""
+
+import re
+import logging
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+import pandas as pd
+from . import MyTT
+
+logger = logging.getLogger(__name__)
+
+# 行情变量及其在数据中的字段名
+INPUTS = {
+    'CLOSE': 'close', 'C': 'close',
+    'OPEN': 'open', 'O': 'open',
+    'HIGH': 'high', 'H': 'high',
+    'LOW': 'low', 'L': 'low',
+    'VOL': 'volume', 'V': 'volume', 'VOLUME': 'volume',
+}
+
+_OPERATORS = {
+    '+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide,
+    '>': np.greater, '<': np.less, '>=': np.greater_equal, '<=': np.less_equal,
+    '=': np.equal, '<>': np.not_equal,
+    'AND': np.logical_and, 'OR': np.logical_or, 'NOT': np.logical_not,
+}
+_ALIASES = {'==': '=', '!=': '<>', '&&': 'AND', '||': 'OR'}
+_COMMUTATIVE = {'+', '*', '=', '<>', 'AND', 'OR'}
+_ARITHMETIC = {'+', '-', '*', '/'}
+_PRECEDENCE = [('OR',), ('AND',), ('=', '<>', '>', '<', '>=', '<='), ('+', '-'), ('*', '/')]
+
+_TOKEN = re.compile(r"""\s*(?:
+    (?P<number>\d+\.\d*|\.\d+|\d+)|
+    (?P<name>[A-Za-z_一-鿿][A-Za-z0-9_一-鿿]*)|
+    (?P<op>:=|>=|<=|<>|!=|==|&&|\|\||[-+*/()<>=,:;])
+)""", re.VERBOSE)
+_COMMENT = re.compile(r'\{[^}]*\}|//[^\n]*')
+# 出现在行首时表示接续上一行的记号
+_CONTINUATIONS = {('op', op) for level in _PRECEDENCE for op in level} | {('op', ')'), ('op', ',')}
+
+def _tokenize(text: str) -> List[Tuple[str, Any]]:
+    """
+    将公式文本切分为(类型, 值)记号序列
+
+    语句以分号结束；省略分号时，只有括号已闭合、上一行以操作数结尾且下一行
+    不以二元运算符开头的换行才视为语句结束，一条语句可以跨多行书写
+    """
+    tokens = []
+    depth = 0
+    line_break = False
+    for line in _COMMENT.sub(' ', text).splitlines():
+        position = 0
+        line = line.rstrip()
+        while position < len(line):
+            match = _TOKEN.match(line, position)
+            if not match or match.end() == position:
+                raise ValueError(f"无法识别的字符：{line[position:].strip()[:10]}")
+            position = match.end()
+            if match.group('number'):
+                number = match.group('number')
+                token = ('number', float(number) if '.' in number else int(number))
+            elif match.group('name'):
+                name = match.group('name').upper()
+                token = ('op', name) if name in ('AND', 'OR') else ('name', name)
+            else:
+                op = match.group('op')
+                token = ('op', _ALIASES.get(op, op))
+            if line_break and depth == 0 and _complete(tokens) and token not in _CONTINUATIONS:
+                tokens.append(('op', ';'))
+            line_break = False
+            if token == ('op', '('):
+                depth += 1
+            elif token == ('op', ')'):
+                depth = max(depth - 1, 0)
+            tokens.append(token)
+        line_break = True
+    return tokens
+
+def _complete(tokens: List[Tuple[str, Any]]) -> bool:
+    """已有记号是否以一个完整的操作数结尾"""
+    return bool(tokens) and (tokens[-1][0] != 'op' or tokens[-1][1] == ')')
+
+class _Parser:
+    """递归下降解析器，生成嵌套元组形式的语法树"""
+
+    def __init__(self, tokens: List[Tuple[str, Any]]):
+        self.tokens = tokens
+        self.position = 0
+
+    def peek(self) -> Tuple[str, Any]:
+        return self.tokens[self.position] if self.position < len(self.tokens) else ('end', None)
+
+    def take(self, value: Optional[str] = None) -> Tuple[str, Any]:
+        token = self.peek()
+        if value is not None and token != ('op', value):
+            raise ValueError(f"公式语法错误：期望'{value}'，实际为'{token[1]}'")
+        self.position += 1
+        return token
+
+    def statements(self) -> List[Tuple[Optional[str], bool, Tuple]]:
+        """
+        解析全部语句
+
+        返回值：
+            List[Tuple[Optional[str], bool, Tuple]]: (名称, 是否输出, 语法树)
+        """
+        statements = []
+        while self.peek()[0] != 'end':
+            if self.peek() == ('op', ';'):
+                self.take()
+                continue
+            name, output = None, True
+            following = self.tokens[self.position + 1] if self.position + 1 < len(self.tokens) else None
+            if self.peek()[0] == 'name' and following in (('op', ':'), ('op', ':=')):
+                name = self.take()[1]
+                output = self.take()[1] == ':'
+            statements.append((name, output, self.expression(0)))
+            if self.peek()[0] != 'end':
+                self.take(';')
+        return statements
+
+    def expression(self, level: int) -> Tuple:
+        if level == len(_PRECEDENCE):
+            return self.unary()
+        node = self.expression(level + 1)
+        while self.peek()[0] == 'op' and self.peek()[1] in _PRECEDENCE[level]:
+            op = self.take()[1]
+            node = ('op', op, node, self.expression(level + 1))
+        return node
+
+    def unary(self) -> Tuple:
+        if self.peek() == ('op', '-'):
+            self.take()
+            return ('op', '-', ('number', 0), self.unary())
+        if self.peek() == ('op', '+'):
+            self.take()
+            return self.unary()
+        return self.primary()
+
+    def primary(self) -> Tuple:
+        kind, value = self.take()
+        if kind == 'number':
+            return ('number', value)
+        if kind == 'name':
+            if self.peek() != ('op', '('):
+                return ('name', value)
+            self.take('(')
+            args = []
+            if self.peek() != ('op', ')'):
+                args.append(self.expression(0))
+                while self.peek() == ('op', ','):
+                    self.take()
+                    args.append(self.expression(0))
+            self.take(')')
+            return ('call', value, args)
+        if (kind, value) == ('op', '('):
+            node = self.expression(0)
+            self.take(')')
+            return node
+        raise ValueError(f"公式语法错误：意外的'{value}'")
+
+class FormulaProgram:
+    """编译后的一组公式，所有公式共享同一个去重后的表达式DAG"""
+
+    def __init__(self, formulas: Union[str, Dict[str, str]]):
+        """
+        参数：
+            formulas: 公式文本，或公式名称到公式文本的映射；
+                      多个公式时输出名称为"公式名.输出名"
+        """
+        self._ids: Dict[Tuple, int] = {}
+        self._nodes: List[Tuple] = []
+        self.outputs: Dict[str, int] = {}
+
+        named = formulas if isinstance(formulas, dict) else {'': formulas}
+        for formula_name, text in named.items():
+            self._compile(formula_name, text)
+
+        self._output_ids = set(self.outputs.values())
+        self._order, self._last_use = self._schedule()
+
+    def _node(self, key: Tuple) -> int:
+        """哈希合并：结构相同的节点只创建一次"""
+        node_id = self._ids.get(key)
+        if node_id is None:
+            node_id = len(self._nodes)
+            self._ids[key] = node_id
+            self._nodes.append(key)
+        return node_id
+
+    def _compile(self, formula_name: str, text: str):
+        variables: Dict[str, int] = {}
+        unnamed = 0
+        for name, output, tree in _Parser(_tokenize(text)).statements():
+            node_id = self._build(tree, variables)
+            if name is None:
+                unnamed += 1
+                name = f"OUT{unnamed}"
+            variables[name] = node_id
+            if output:
+                self.outputs[f"{formula_name}.{name}" if formula_name else name] = node_id
+
+    def _build(self, tree: Tuple, variables: Dict[str, int]) -> int:
+        kind = tree[0]
+        if kind == 'number':
+            return self._node(('const', type(tree[1]).__name__, tree[1]))
+        if kind == 'name':
+            name = tree[1]
+            if name in variables:
+                return variables[name]
+            if name in INPUTS:
+                return self._node(('input', INPUTS[name]))
+            raise ValueError(f"未定义的变量：{name}")
+        if kind == 'op':
+            children = [self._build(tree[2], variables), self._build(tree[3], variables)]
+            if tree[1] in _COMMUTATIVE:
+                children.sort()
+            return self._node(('op', tree[1], tuple(children)))
+
+        name, args = tree[1], tree[2]
+        children = tuple(self._build(arg, variables) for arg in args)
+        if name == 'NOT':
+            if len(children) != 1:
+                raise ValueError("NOT只接受一个参数")
+            return self._node(('op', 'NOT', children))
+        function = getattr(MyTT, name, None)
+        if name.startswith('_') or name == 'PANEL' or not callable(function):
+            raise ValueError(f"未知的函数：{name}")
+        return self._node(('call', name, children))
+
+    def _schedule(self) -> Tuple[List[int], Dict[int, int]]:
+        """
+        确定求值顺序和每个节点最后一次被使用的位置
+
+        节点编号按后序创建，子节点编号总小于父节点，编号顺序即为拓扑顺序；
+        只计算输出实际依赖的节点
+        """
+        needed = set()
+        stack = list(self.outputs.values())
+        while stack:
+            node_id = stack.pop()
+            if node_id in needed:
+                continue
+            needed.add(node_id)
+            if self._nodes[node_id][0] in ('op', 'call'):
+                stack.extend(self._nodes[node_id][2])
+        order = sorted(needed)
+        last_use = {}
+        for position, node_id in enumerate(order):
+            if self._nodes[node_id][0] in ('op', 'call'):
+                for child in self._nodes[node_id][2]:
+                    last_use[child] = position
+        return order, last_use
+
+    @property
+    def node_count(self) -> int:
+        """去重后需要计算的节点数"""
+        return len(self._order)
+
+    @property
+    def inputs(self) -> List[str]:
+        """公式用到的行情字段"""
+        return sorted({self._nodes[i][1] for i in self._order if self._nodes[i][0] == 'input'})
+
+    def _load_inputs(self, data) -> Dict[str, np.ndarray]:
+        inputs = {}
+        for field in self.inputs:
+            try:
+                value = data[field]
+            except (KeyError, IndexError):
+                raise ValueError(f"缺少输入数据：{field}")
+            inputs[field] = value.to_numpy(dtype='float64') if isinstance(value, (pd.Series, pd.DataFrame)) \
+                else np.asarray(value, dtype='float64')
+        return inputs
+
+    def _reusable(self, value: Any, node_id: int, position: int, shape: Tuple,
+                  inputs: Dict[str, np.ndarray]) -> bool:
+        """中间结果在本节点之后不再使用、且不与输入共享内存时，可作为本节点的输出缓冲区"""
+        return (self._last_use.get(node_id) == position
+                and node_id not in self._output_ids
+                and self._nodes[node_id][0] in ('op', 'call')
+                and isinstance(value, np.ndarray) and value.dtype == np.float64
+                and value.base is None and value.shape == shape
+                and not any(np.may_share_memory(value, array) for array in inputs.values()))
+
+    def evaluate(self, data) -> Dict[str, Any]:
+        """
+        对一只股票或一个面板求值
+
+        参数：
+            data: 单只股票的K线DataFrame（列为close、high等），或字段名到一维序列、
+                  二维面板数组、宽表DataFrame的映射
+
+        返回值：
+            Dict[str, Any]: 输出名称到结果序列（或面板）的映射
+        """
+        inputs = self._load_inputs(data)
+        values: Dict[int, Any] = {}
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for position, node_id in enumerate(self._order):
+                kind, name = self._nodes[node_id][:2]
+                if kind == 'input':
+                    values[node_id] = inputs[name]
+                elif kind == 'const':
+                    values[node_id] = self._nodes[node_id][2]
+                else:
+                    children = self._nodes[node_id][2]
+                    args = [values[child] for child in children]
+                    if kind == 'call':
+                        result = getattr(MyTT, name)(*args)
+                        if isinstance(result, tuple):
+                            raise ValueError(f"函数{name}返回多个序列，不能用于公式")
+                    elif name in _ARITHMETIC:
+                        shape = np.broadcast_shapes(*(np.shape(arg) for arg in args))
+                        out = next((arg for child, arg in zip(children, args)
+                                    if self._reusable(arg, child, position, shape, inputs)), None)
+                        result = _OPERATORS[name](*args, out=out) if out is not None else _OPERATORS[name](*args)
+                    else:
+                        result = _OPERATORS[name](*args)
+                    if isinstance(result, (pd.Series, pd.DataFrame)):
+                        result = result.to_numpy()
+                    values[node_id] = result
+
+                    for child in set(children):
+                        if self._last_use.get(child) == position and child not in self._output_ids:
+                            del values[child]
+        return {name: values[node_id] for name, node_id in self.outputs.items()}
+
+def compile_formula(formulas: Union[str, Dict[str, str]]) -> FormulaProgram:
+    """
+    编译公式
+
+    参数：
+        formulas: 公式文本，或公式名称到公式文本的映射（多个公式共享公共子表达式）
+
+    返回值：
+        FormulaProgram: 编译后的公式
+    """
+    return FormulaProgram(formulas)
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量计算的技术指标
+
+每个指标只保存递推所需的最少状态（递推值或长度为N的环形缓冲区），新K线到来时
+update的耗时与历史长度无关；盘中尚未走完的K线用revise_last反复修正最后一根。
+状态按与MyTT批量计算完全相同的运算顺序更新，结果与从同一根K线开始的批量计算逐位相同；
+snapshot/restore可将状态保存为JSON，服务重启时无需重放历史即可继续计算
+"""
+
+import math
+import logging
+from collections import deque
+from typing import Any, Dict, Mapping, Optional, Tuple, Type
+import numpy as np
+import pandas as pd
+from ..utils.helpers import save_to_json, load_from_json
+
+logger = logging.getLogger(__name__)
+
+NAN = math.nan
+
+def _field(bar: Any, name: str) -> float:
+    """
+    从K线中取出字段值，bar可以是字典、pandas行或单个数值（单输入指标）
+    """
+    if isinstance(bar, (Mapping, pd.Series)):
+        return float(bar[name])
+    return float(bar)
+
+def _maximum(a: float, b: float) -> float:
+    """与np.maximum一致：任一值为NaN时结果为NaN"""
+    if a != a or b != b:
+        return NAN
+    return a if a >= b else b
+
+def _divide(a: float, b: float) -> float:
+    """与NumPy数组除法一致：除以0得到inf或NaN而不是抛出异常"""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return float(np.float64(a) / np.float64(b))
+
+def _round(value: float, decimals: int = 3) -> float:
+    """与MyTT.RD一致的四舍五入"""
+    return float(np.round(value, decimals))
+
+class _State:
+    """可序列化的增量状态，属性中的deque和嵌套状态在快照中转换为列表和字典"""
+
+    def state(self) -> Dict:
+        result = {}
+        for key, value in self.__dict__.items():
+            if isinstance(value, _State):
+                value = value.state()
+            elif isinstance(value, deque):
+                value = list(value)
+            result[key] = value
+        return result
+
+    def load(self, state: Dict):
+        for key, value in state.items():
+            current = getattr(self, key, None)
+            if isinstance(current, _State):
+                current.load(value)
+            elif isinstance(current, deque):
+                setattr(self, key, deque(value, maxlen=current.maxlen))
+            else:
+                setattr(self, key, value)
+
+class _EMA(_State):
+    """指数移动平均，按pandas ewm(span=N, adjust=False)的递推公式计算"""
+
+    def __init__(self, N: int):
+        com = (N - 1) / 2.0
+        self.alpha = 1.0 / (1.0 + com)
+        self.weighted = NAN
+        self.old_wt = 1.0
+        self.nobs = 0
+        self.previous = None
+
+    def update(self, value: float) -> float:
+        self.previous = [self.weighted, self.old_wt, self.nobs]
+        return self._apply(value)
+
+    def revise_last(self, value: float) -> float:
+        self.weighted, self.old_wt, self.nobs = self.previous
+        return self._apply(value)
+
+    def _apply(self, value: float) -> float:
+        observed = value == value
+        self.nobs += int(observed)
+        if self.weighted == self.weighted:
+            self.old_wt *= 1.0 - self.alpha
+            if observed:
+                if self.weighted != value:
+                    self.weighted = self.old_wt * self.weighted + self.alpha * value
+                    self.weighted /= (self.old_wt + self.alpha)
+                self.old_wt = 1.0
+        elif observed:
+            self.weighted = value
+        return self.weighted if self.nobs >= 1 else NAN
+
+class _SMA(_State):
+    """中国式SMA：前N+1个值为N周期滚动均值，之后按K=(M*X+(N-M)*K')/N递推"""
+
+    def __init__(self, N: int, M: int = 1):
+        self.N = N
+        self.M = M
+        self.warmup = []  # 前N+1个输入值，滚动均值与批量计算共用pandas实现
+        self.value = NAN
+        self.previous = None
+
+    def update(self, value: float) -> float:
+        if len(self.warmup) <= self.N:
+            self.warmup.append(value)
+        else:
+            self.previous = self.value
+            self.value = (self.M * value + (self.N - self.M) * self.value) / self.N
+            return self.value
+        return self._seed()
+
+    def revise_last(self, value: float) -> float:
+        if self.previous is None:
+            self.warmup[-1] = value
+            return self._seed()
+        self.value = (self.M * value + (self.N - self.M) * self.previous) / self.N
+        return self.value
+
+    def _seed(self) -> float:
+        self.value = float(pd.Series(self.warmup).rolling(self.N).mean().iloc[-1])
+        return self.value
+
+class _WindowSum(_State):
+    """与rolling_sum相同的补偿前缀和，保存最近N+1个前缀和以求窗口和"""
+
+    def __init__(self, N: int):
+        self.N = N
+        self.totals = deque([0.0], maxlen=N + 1)
+        self.errors = deque([0.0], maxlen=N + 1)
+        self.missing = deque(maxlen=N)
+        self.missing_count = 0
+        self.undo = None
+
+    def update(self, value: float) -> float:
+        # 窗口已满时追加会挤出最早的前缀和，记录下来以便修正最后一根K线时恢复
+        full = len(self.totals) == self.N + 1
+        self.undo = [self.totals[0], self.errors[0], self.missing[0]] if full else None
+        return self._apply(value)
+
+    def revise_last(self, value: float) -> float:
+        self.totals.pop()
+        self.errors.pop()
+        self.missing_count -= self.missing.pop()
+        if self.undo is not None:
+            total, error, missing = self.undo
+            self.totals.appendleft(total)
+            self.errors.appendleft(error)
+            self.missing.appendleft(missing)
+            self.missing_count += missing
+        return self._apply(value)
+
+    def load(self, state: Dict):
+        super().load(state)
+        self.missing_count = sum(self.missing)
+
+    def _apply(self, value: float) -> float:
+        missing = value != value
+        value = 0.0 if missing else value
+        previous = self.totals[-1]
+        current = previous + value
+        virtual = current - previous
+        error = (previous - (current - virtual)) + (value - virtual)
+        self.totals.append(current)
+        self.errors.append(self.errors[-1] + error)
+        if len(self.missing) == self.N:
+            self.missing_count -= self.missing[0]
+        self.missing.append(missing)
+        self.missing_count += missing
+        if len(self.totals) <= self.N or self.missing_count:
+            return NAN
+        return (self.totals[-1] - self.totals[0]) + (self.errors[-1] - self.errors[0])
+
+class _WindowStd(_State):
+    """与rolling_std相同：以第一个有效值为中心，由补偿窗口和求总体标准差"""
+
+    def __init__(self, N: int):
+        self.N = N
+        self.center = None
+        self.center_set_last = False
+        self.sums = _WindowSum(N)
+        self.squares = _WindowSum(N)
+
+    def update(self, value: float) -> float:
+        self.center_set_last = False
+        return self._apply(value, self.sums.update, self.squares.update)
+
+    def revise_last(self, value: float) -> float:
+        if self.center_set_last:
+            self.center = None
+            self.center_set_last = False
+        return self._apply(value, self.sums.revise_last, self.squares.revise_last)
+
+    def _apply(self, value: float, update_sums, update_squares) -> float:
+        if self.center is None and value == value:
+            self.center = value
+            self.center_set_last = True
+        centered = value - (self.center if self.center is not None else 0.0)
+        sums = update_sums(centered)
+        squares = update_squares(centered * centered)
+        if sums != sums:
+            return NAN
+        return math.sqrt(max(squares - sums * sums / self.N, 0.0) / self.N)
+
+class _Extreme(_State):
+    """
+    最近N个值的最大值或最小值，窗口含NaN时为NaN
+
+    单调队列中保存窗口内可能成为极值的(序号, 值)，队首即为极值，每个值只入队出队一次，
+    update均摊O(1)；revise_last替换最后一个值后重建队列，耗时O(N)
+    """
+
+    def __init__(self, N: int, highest: bool = True):
+        self.highest = highest
+        self.values = deque(maxlen=N)
+        self.count = 0  # 已输入的值的个数，最后一个值的序号为count-1
+        self.nan_count = 0
+        self.candidates = deque()
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.values.maxlen:
+            self.nan_count -= self.values[0] != self.values[0]
+        self.values.append(value)
+        self.count += 1
+        self._push(self.count - 1, value)
+        oldest = self.count - self.values.maxlen
+        while self.candidates and self.candidates[0][0] < oldest:
+            self.candidates.popleft()
+        return self._value()
+
+    def revise_last(self, value: float) -> float:
+        self.values[-1] = value
+        self._rebuild()
+        return self._value()
+
+    def load(self, state: Dict):
+        super().load(state)
+        self._rebuild()
+
+    def _push(self, index: int, value: float):
+        if value != value:
+            self.nan_count += 1
+            return
+        # 队尾不优于新值的候选不会再成为极值
+        while self.candidates and (self.candidates[-1][1] <= value if self.highest
+                                   else self.candidates[-1][1] >= value):
+            self.candidates.pop()
+        self.candidates.append([index, value])
+
+    def _rebuild(self):
+        self.nan_count = 0
+        self.candidates = deque()
+        first = self.count - len(self.values)
+        for offset, value in enumerate(self.values):
+            self._push(first + offset, value)
+
+    def _value(self) -> float:
+        if len(self.values) < self.values.maxlen or self.nan_count:
+            return NAN
+        return self.candidates[0][1]
+
+class IncrementalIndicator(_State):
+    """增量指标基类"""
+
+    def __init__(self, **params):
+        self.params = params
+        self.bars = 0
+
+    def update(self, bar: Any):
+        """
+        追加一根新K线
+
+        参数：
+            bar: K线，包含指标需要的字段（如close、high、low）的字典或pandas行
+
+        返回值：
+            与对应MyTT函数在最后一根K线上的结果相同
+        """
+        self.bars += 1
+        return self._update(bar, revise=False)
+
+    def revise_last(self, bar: Any):
+        """
+        用新数据替换最后一根K线（盘中尚未走完的K线）
+
+        参数：
+            bar: 最后一根K线的最新数据
+
+        返回值：
+            修正后最后一根K线的指标值
+        """
+        if self.bars == 0:
+            raise ValueError("尚未输入K线，无法修正")
+        return self._update(bar, revise=True)
+
+    def _update(self, bar: Any, revise: bool):
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict:
+        """
+        导出指标状态
+
+        返回值：
+            Dict: 可JSON序列化的状态
+        """
+        return {'indicator': type(self).__name__, 'params': dict(self.params), 'state': self.state()}
+
+    @staticmethod
+    def restore(snapshot: Dict) -> 'IncrementalIndicator':
+        """
+        由快照恢复指标
+
+        参数：
+            snapshot: snapshot()导出的状态
+
+        返回值：
+            IncrementalIndicator: 恢复后的指标对象
+        """
+        cls = INDICATORS.get(snapshot.get('indicator'))
+        if cls is None:
+            raise ValueError(f"未知的指标：{snapshot.get('indicator')}")
+        indicator = cls(**snapshot['params'])
+        indicator.load(snapshot['state'])
+        return indicator
+
+def _step(primitive: _State, value: float, revise: bool) -> float:
+    return primitive.revise_last(value) if revise else primitive.update(value)
+
+class IncrementalMACD(IncrementalIndicator):
+    """增量MACD，返回(DIF, DEA, MACD)"""
+
+    def __init__(self, SHORT: int = 12, LONG: int = 26, M: int = 9):
+        super().__init__(SHORT=SHORT, LONG=LONG, M=M)
+        self.short = _EMA(SHORT)
+        self.long = _EMA(LONG)
+        self.dea = _EMA(M)
+
+    def _update(self, bar: Any, revise: bool) -> Tuple[float, float, float]:
+        close = _field(bar, 'close')
+        dif = _step(self.short, close, revise) - _step(self.long, close, revise)
+        dea = _step(self.dea, dif, revise)
+        return _round(dif), _round(dea), _round((dif - dea) * 2)
+
+class IncrementalKDJ(IncrementalIndicator):
+    """增量KDJ，返回(K, D, J)"""
+
+    def __init__(self, N: int = 9, M1: int = 3, M2: int = 3):
+        super().__init__(N=N, M1=M1, M2=M2)
+        self.highest = _Extreme(N, highest=True)
+        self.lowest = _Extreme(N, highest=False)
+        self.k = _EMA(M1 * 2 - 1)
+        self.d = _EMA(M2 * 2 - 1)
+
+    def _update(self, bar: Any, revise: bool) -> Tuple[float, float, float]:
+        close = _field(bar, 'close')
+        hhv = _step(self.highest, _field(bar, 'high'), revise)
+        llv = _step(self.lowest, _field(bar, 'low'), revise)
+        rsv = _divide(close - llv, hhv - llv) * 100
+        k = _step(self.k, rsv, revise)
+        d = _step(self.d, k, revise)
+        return k, d, k * 3 - d * 2
+
+class IncrementalBOLL(IncrementalIndicator):
+    """增量布林带，返回(UPPER, MID, LOWER)"""
+
+    def __init__(self, N: int = 20, P: float = 2):
+        super().__init__(N=N, P=P)
+        self.sums = _WindowSum(N)
+        self.std = _WindowStd(N)
+
+    def _update(self, bar: Any, revise: bool) -> Tuple[float, float, float]:
+        close = _field(bar, 'close')
+        mid = _step(self.sums, close, revise) / self.params['N']
+        std = _step(self.std, close, revise)
+        P = self.params['P']
+        return _round(mid + std * P), _round(mid), _round(mid - std * P)
+
+class IncrementalATR(IncrementalIndicator):
+    """增量ATR（真实波动的N周期均值）"""
+
+    def __init__(self, N: int = 20):
+        super().__init__(N=N)
+        self.sums = _WindowSum(N)
+        self.last_close = NAN
+        self.previous_close = NAN
+
+    def _update(self, bar: Any, revise: bool) -> float:
+        if not revise:
+            self.previous_close = self.last_close
+        high, low = _field(bar, 'high'), _field(bar, 'low')
+        ref = self.previous_close
+        tr = _maximum(_maximum(high - low, abs(ref - high)), abs(ref - low))
+        self.last_close = _field(bar, 'close')
+        return _step(self.sums, tr, revise) / self.params['N']
+
+class IncrementalRSI(IncrementalIndicator):
+    """增量RSI"""
+
+    def __init__(self, N: int = 24):
+        super().__init__(N=N)
+        self.up = _SMA(N)
+        self.total = _SMA(N)
+        self.last_close = NAN
+        self.previous_close = NAN
+
+    def _update(self, bar: Any, revise: bool) -> float:
+        if not revise:
+            self.previous_close = self.last_close
+        close = _field(bar, 'close')
+        self.last_close = close
+        dif = close - self.previous_close
+        up = _step(self.up, _maximum(dif, 0.0), revise)
+        total = _step(self.total, abs(dif), revise)
+        return _round(_divide(up, total) * 100)
+
+INDICATORS: Dict[str, Type[IncrementalIndicator]] = {
+    cls.__name__: cls for cls in (IncrementalMACD, IncrementalKDJ, IncrementalBOLL,
+                                  IncrementalATR, IncrementalRSI)
+}
+
+def save_snapshots(file_path: str, indicators: Dict[str, IncrementalIndicator]) -> bool:
+    """
+    将一组指标的状态保存到JSON文件
+
+    参数：
+        file_path: 文件路径
+        indicators: 名称到指标对象的映射，如{'sh600000_1m_macd': IncrementalMACD()}
+
+    返回值：
+        bool: 如果保存成功返回True，否则返回False
+    """
+    return save_to_json(file_path, {name: indicator.snapshot() for name, indicator in indicators.items()})
+
+def load_snapshots(file_path: str) -> Dict[str, IncrementalIndicator]:
+    """
+    从JSON文件恢复一组指标
+
+    参数：
+        file_path: 文件路径
+
+    返回值：
+        Dict[str, IncrementalIndicator]: 名称到指标对象的映射，文件不存在或无效时返回空字典
+    """
+    data: Optional[Dict] = load_from_json(file_path)
+    if not data:
+        return {}
+    indicators = {}
+    for name, snapshot in data.items():
+        try:
+            indicators[name] = IncrementalIndicator.restore(snapshot)
+        except Exception as e:
+            logger.error(f"恢复指标状态失败：{name}，{str(e)}")
+    return indicators
@@ -0,0 +1,352 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+O(N)滑动窗口计算内核
+
+所有函数直接处理NumPy数组，返回与输入形状相同的数组，前N-1个值以及
+包含NaN的窗口结果为NaN，与pandas的rolling(N)语义一致。输入可以是一维序列，
+也可以是(K线 × 股票)的二维面板，此时沿第0维（时间）对每只股票分别计算。
+float32输入返回float32结果（求和类计算内部仍用float64累加），其他输入返回float64；
+out参数可传入预先分配的结果数组，避免链式计算中的临时数组
+"""
+
+import numpy as np
+
+# 按窗口展开计算时每块最多处理的元素数，控制临时数组的内存占用
+_CHUNK_ELEMENTS = 1 << 22
+
+def as_float(S) -> np.ndarray:
+    """转换为浮点数组，float32保持不变，其他类型转换为float64，已是浮点数组时不复制"""
+    X = np.asarray(S)
+    return X if X.dtype == np.float32 else X.astype('float64', copy=False)
+
+def output_array(X: np.ndarray, out=None) -> np.ndarray:
+    """
+    准备与X形状、类型相同并以NaN填充的结果数组，给出out时使用out
+
+    参数：
+        X: 输入数组
+        out: 预先分配的结果数组，不能与输入共享内存
+
+    返回值：
+        np.ndarray: 结果数组
+    """
+    if out is None:
+        return np.full(X.shape, np.nan, dtype=X.dtype)
+    if out.shape != X.shape:
+        raise ValueError(f"out的形状{out.shape}与输入{X.shape}不一致")
+    out.fill(np.nan)
+    return out
+
+def _wide(X: np.ndarray) -> np.ndarray:
+    """求和类计算使用float64，避免前缀和的舍入误差"""
+    return X.astype('float64', copy=False)
+
+def _along_time(values: np.ndarray, X: np.ndarray) -> np.ndarray:
+    """将一维的时间轴数组变形为可与X按第0维广播的形状"""
+    return values.reshape((-1,) + (1,) * (X.ndim - 1))
+
+def _first_valid(X: np.ndarray):
+    """每只股票第一个非NaN的值，全为NaN时为0，用作中心化的参考值（流式计算时也可在开头确定）"""
+    valid = ~np.isnan(X)
+    first = np.take_along_axis(X, np.expand_dims(valid.argmax(axis=0), 0), axis=0)[0]
+    return np.where(valid.any(axis=0), first, 0.0)
+
+def _check_window(N: int):
+    if int(N) != N or N < 1:
+        raise ValueError(f"窗口长度必须为正整数：{N}")
+
+def _extreme(S, N: int, func, fill: float, out=None) -> np.ndarray:
+    """
+    Van Herk/Gil-Werman算法：按长度N分块，分别求块内前缀和后缀极值，
+    任一窗口恰好跨越一个块边界，结果为两者中的极值，每个元素只参与常数次比较
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        func: np.maximum或np.minimum
+        fill: 补齐最后一块使用的值
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 滑动窗口极值
+    """
+    _check_window(N)
+    X = as_float(S)
+    size = len(X)
+    result = output_array(X, out)
+    if size < N:
+        return result
+    if N == 1:
+        result[...] = X
+        return result
+
+    blocks = -(-size // N)
+    padded = np.full((blocks * N,) + X.shape[1:], fill, dtype=X.dtype)
+    padded[:size] = X
+    padded = padded.reshape((blocks, N) + X.shape[1:])
+    prefix = func.accumulate(padded, axis=1).reshape((-1,) + X.shape[1:])
+    suffix = func.accumulate(padded[:, ::-1], axis=1)[:, ::-1].reshape((-1,) + X.shape[1:])
+    result[N - 1:] = func(suffix[:size - N + 1], prefix[N - 1:size])
+    return result
+
+def rolling_max(S, N: int, out=None) -> np.ndarray:
+    """
+    滑动窗口最大值
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的最大值
+    """
+    return _extreme(S, N, np.maximum, -np.inf, out)
+
+def rolling_min(S, N: int, out=None) -> np.ndarray:
+    """
+    滑动窗口最小值
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的最小值
+    """
+    return _extreme(S, N, np.minimum, np.inf, out)
+
+def compensated_cumsum(X: np.ndarray):
+    """
+    带误差补偿的累加和
+
+    np.cumsum按顺序逐个相加，每一步的舍入误差可由TwoSum无误差变换向量化求出，
+    累加和与误差累加和之和即为补偿后的前缀和
+
+    参数：
+        X: 不含NaN的输入数组，float32输入按float64累加
+
+    返回值：
+        Tuple[np.ndarray, np.ndarray]: (前缀和, 前缀和的舍入误差累计)，两者均在开头补0
+    """
+    # 各步运算写入预先分配的数组，峰值只占4份float64数组
+    shape = (len(X) + 1,) + X.shape[1:]
+    total = np.empty(shape)
+    total[0] = 0.0
+    np.cumsum(X, axis=0, dtype='float64', out=total[1:])
+    previous = total[:-1]
+    current = total[1:]
+    virtual = np.subtract(current, previous)
+    error = np.subtract(current, virtual)
+    np.subtract(previous, error, out=error)
+    np.subtract(X, virtual, out=virtual)
+    error += virtual
+    del virtual
+    error_total = np.empty(shape)
+    error_total[0] = 0.0
+    np.cumsum(error, axis=0, out=error_total[1:])
+    return total, error_total
+
+def _window_sums(X: np.ndarray, N: int) -> np.ndarray:
+    """
+    由补偿前缀和的差求长度为N的全部窗口和（共len(X)-N+1个），结果为float64
+    """
+    total, error = compensated_cumsum(X)
+    sums = np.subtract(total[N:], total[:-N])
+    errors = np.subtract(error[N:], error[:-N], out=total[:len(total) - N])  # 前缀和已用完，复用其内存
+    sums += errors
+    return sums
+
+def _nan_windows(X: np.ndarray, N: int):
+    """
+    找出包含NaN的窗口，返回(NaN替换为0后的数组, 窗口掩码)，没有NaN时掩码为None
+    """
+    missing = np.isnan(X)
+    if not missing.any():
+        return X, None
+    counts = np.concatenate((np.zeros((1,) + X.shape[1:], dtype='int64'), np.cumsum(missing, axis=0)))
+    return np.where(missing, 0.0, X), (counts[N:] - counts[:-N]) > 0
+
+def _rolling_sum(S, N: int, out, divisor: int) -> np.ndarray:
+    """
+    滑动窗口和除以divisor，窗口和以float64计算，最后一次转换为结果类型
+    """
+    _check_window(N)
+    X = as_float(S)
+    result = output_array(X, out)
+    if len(X) < N:
+        return result
+    if np.isinf(X).any():  # 无穷值会使前缀和失效，改为逐窗口求和
+        sums = _chunked(X, N, lambda w: _wide(w).sum(axis=-1))
+    else:
+        X, mask = _nan_windows(X, N)
+        sums = _window_sums(X, N)
+        if mask is not None:
+            sums[mask] = np.nan
+    if divisor != 1:
+        sums /= divisor
+    result[N - 1:] = sums
+    return result
+
+def rolling_sum(S, N: int, out=None) -> np.ndarray:
+    """
+    滑动窗口求和，使用补偿求和，长序列上的误差不随长度累积
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的和
+    """
+    return _rolling_sum(S, N, out, 1)
+
+def rolling_mean(S, N: int, out=None) -> np.ndarray:
+    """
+    滑动窗口均值
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的均值
+    """
+    return _rolling_sum(S, N, out, N)
+
+def rolling_std(S, N: int, ddof: int = 0, out=None) -> np.ndarray:
+    """
+    滑动窗口标准差
+
+    先减去序列的第一个有效值降低平方和相减时的抵消误差，再由补偿前缀和求窗口内的
+    一阶和二阶和
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        ddof: 自由度修正，0为总体标准差
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的标准差
+    """
+    _check_window(N)
+    X = as_float(S)
+    result = output_array(X, out)
+    if len(X) < N or N - ddof <= 0:
+        return result
+    if np.isinf(X).any():
+        result[N - 1:] = _chunked(X, N, lambda w: _wide(w).std(axis=-1, ddof=ddof))
+        return result
+
+    X, mask = _nan_windows(np.subtract(X, _first_valid(X), dtype='float64'), N)
+    sums = _window_sums(X, N)
+    squares = _window_sums(np.multiply(X, X, out=X), N)  # X只在这里使用，原地求平方
+    # 与squares - sums * sums / N的运算顺序相同，逐步写回已有数组
+    np.multiply(sums, sums, out=sums)
+    sums /= N
+    variance = np.subtract(squares, sums, out=squares)
+    np.maximum(variance, 0.0, out=variance)
+    variance /= N - ddof
+    std = np.sqrt(variance, out=variance)
+    if mask is not None:
+        std[mask] = np.nan
+    result[N - 1:] = std
+    return result
+
+def _chunked(X: np.ndarray, N: int, func) -> np.ndarray:
+    """
+    将全部长度为N的窗口沿时间轴展开为视图（窗口位于最后一维），分块调用func
+    对最后一维计算，返回len(X)-N+1个时间点的结果
+    """
+    windows = np.lib.stride_tricks.sliding_window_view(X, N, axis=0)
+    step = max(1, _CHUNK_ELEMENTS // windows[:1].size)
+    return np.concatenate([func(windows[i:i + step]) for i in range(0, len(windows), step)])
+
+def rolling_mad(S, N: int, out=None) -> np.ndarray:
+    """
+    滑动窗口平均绝对偏差（窗口内各值与窗口均值之差的绝对值的均值）
+
+    每个窗口的均值不同，无法用前缀和求得，这里将窗口展开为二维视图整体向量化计算
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+        out: 结果数组
+
+    返回值：
+        np.ndarray: 每个位置最近N个值的平均绝对偏差
+    """
+    _check_window(N)
+    X = as_float(S)
+    result = output_array(X, out)
+    if len(X) < N:
+        return result
+
+    def mad(windows: np.ndarray) -> np.ndarray:
+        windows = _wide(windows)
+        means = windows.mean(axis=-1)
+        return np.abs(windows - means[..., None]).mean(axis=-1)
+
+    result[N - 1:] = _chunked(X, N, mad)
+    return result
+
+def rolling_linreg(S, N: int):
+    """
+    滑动窗口线性回归，一次向量化计算每个窗口的回归结果
+
+    窗口内自变量取0..N-1，由y、x*y、y*y的补偿前缀和得到各窗口的一阶和二阶和，
+    x*y使用长度为N的块内位置，长序列末尾的精度与开头相同；
+    自变量的和与平方和为常数，整体复杂度为O(N)
+
+    参数：
+        S: 输入序列
+        N: 窗口长度
+
+    返回值：
+        Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+            (斜率, 截距（窗口第一个点处的拟合值）, 下一周期的预测值, 决定系数R²)
+    """
+    _check_window(N)
+    X = as_float(S)
+    results = tuple(output_array(X) for _ in range(4))
+    if len(X) < N:
+        return results
+    X = _wide(X)
+
+    offset = _first_valid(X)
+    Y, mask = _nan_windows(X - offset, N)
+    size = len(Y)
+    # 与_extreme相同按长度N分块，位置取块内下标，x*y的量级不随序列长度增长
+    local = _along_time(np.arange(size, dtype='float64') % N, Y)
+    sum_y = _window_sums(Y, N)
+    sum_py = _window_sums(local * Y, N)
+    sum_yy = _window_sums(Y * Y, N)
+    blocks = -(-size // N)
+    padded = np.zeros((blocks * N,) + Y.shape[1:])
+    padded[:size] = Y
+    running = np.cumsum(padded.reshape((blocks, N) + Y.shape[1:]), axis=1).reshape(padded.shape)
+
+    # 窗口从块内下标shift处开始，shift不为0时跨入下一块，下一块内的点块内下标需加N；
+    # 再以窗口中心为原点：x的中心化平方和为常数，x*y的中心化和由块内位置加权和平移得到
+    shift = _along_time((np.arange(N - 1, size) + 1) % N, Y)
+    tail = np.where(shift != 0, running[N - 1:size], 0.0)
+    sxx = N * (N * N - 1) / 12
+    sxy = sum_py + N * tail - (shift + (N - 1) / 2) * sum_y
+    syy = np.maximum(sum_yy - sum_y * sum_y / N, 0.0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = sxy / sxx
+        mean = sum_y / N + offset
+        intercept = mean - slope * (N - 1) / 2
+        r2 = sxy * sxy / (sxx * syy)
+    forecast = intercept + slope * N
+    for result, values in zip(results, (slope, intercept, forecast, r2)):
+        if mask is not None:
+            values[mask] = np.nan
+        result[N - 1:] = values
+    return results
@@ -23,9 +23,11 @@ def setup_logging():
     )
 
 def main():
-    """主程序入口"""
+    """主程序入口，带参数时执行子命令（如fetch），否则进入交互界面"""
     setup_logging()
     cli = StockDataCLI()
+    if len(sys.argv) > 1:
+        sys.exit(cli.execute(sys.argv[1:]))
     cli.run()
 
 if __name__ == '__main__':
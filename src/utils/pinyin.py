@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+拼音首字母工具，用于股票名称的简拼检索
+"""
+
+import bisect
+import itertools
+from typing import List
+
+try:
+    from pypinyin import pinyin as _pinyin, Style as _Style
+except ImportError:  # pypinyin为可选依赖，缺失时使用GB2312编码表
+    _pinyin = None
+
+# GB2312一级汉字按拼音排序，每个声母对应的起始编码
+_GB2312_BOUNDARIES = [
+    (0xB0A1, 'a'), (0xB0C5, 'b'), (0xB2C1, 'c'), (0xB4EE, 'd'), (0xB6EA, 'e'),
+    (0xB7A2, 'f'), (0xB8C1, 'g'), (0xB9FE, 'h'), (0xBBF7, 'j'), (0xBFA6, 'k'),
+    (0xC0AC, 'l'), (0xC2E8, 'm'), (0xC4C3, 'n'), (0xC5B6, 'o'), (0xC5BE, 'p'),
+    (0xC6DA, 'q'), (0xC8BB, 'r'), (0xC8F6, 's'), (0xCBFA, 't'), (0xCDDA, 'w'),
+    (0xCEF4, 'x'), (0xD1B9, 'y'), (0xD4D1, 'z'),
+]
+_GB2312_KEYS = [code for code, _ in _GB2312_BOUNDARIES]
+_GB2312_LEVEL1_END = 0xD7F9
+
+# 股票名称中常见的多音字
+_POLYPHONES = {
+    '行': 'hx', '长': 'cz', '重': 'zc', '乐': 'ly', '厦': 'xs', '藏': 'zc',
+    '朝': 'zc', '传': 'cz', '调': 'td', '降': 'jx', '单': 'ds', '曾': 'zc',
+    '解': 'jx', '盛': 'sc', '石': 'sd', '会': 'hk', '系': 'xj', '柏': 'bp',
+    '莘': 'sx', '茜': 'qx', '蔚': 'wy', '广': 'g',
+}
+
+
+def _char_initials(char: str) -> str:
+    """
+    获取单个字符所有可能的拼音首字母
+
+    参数：
+        char: 单个字符
+
+    返回值：
+        str: 候选首字母组成的字符串，无法识别时返回空字符串
+    """
+    if char.isascii():
+        return char.lower() if char.isalnum() else ''
+    if char in _POLYPHONES:
+        return _POLYPHONES[char]
+    if _pinyin is not None:
+        readings = _pinyin(char, style=_Style.FIRST_LETTER, heteronym=True, errors='ignore')
+        if readings:
+            return ''.join(dict.fromkeys(r.lower() for r in readings[0] if r.isalpha()))
+        return ''
+
+    try:
+        encoded = char.encode('gb2312')
+    except UnicodeEncodeError:
+        return ''
+    if len(encoded) != 2:
+        return ''
+    value = encoded[0] << 8 | encoded[1]
+    if value < _GB2312_KEYS[0] or value > _GB2312_LEVEL1_END:
+        return ''
+    return _GB2312_BOUNDARIES[bisect.bisect_right(_GB2312_KEYS, value) - 1][1]
+
+
+def pinyin_initials(text: str, max_variants: int = 8) -> List[str]:
+    """
+    获取文本的拼音首字母缩写，多音字会产生多个候选
+
+    参数：
+        text: 文本，如'浦发银行'
+        max_variants: 最多返回的候选数
+
+    返回值：
+        List[str]: 首字母缩写列表，如['pfyh', 'pfyx']
+    """
+    choices = [c for c in (_char_initials(ch) for ch in text) if c]
+    if not choices:
+        return []
+    variants = itertools.islice(itertools.product(*choices), max_variants)
+    return [''.join(v) for v in variants]
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+A股交易时段工具，用于计算K线收盘时间和缺失的K线数量
+"""
+
+import bisect
+from datetime import date, datetime, time, timedelta
+from functools import lru_cache
+from typing import List, Tuple
+
+# A股连续竞价时段
+TRADING_SESSIONS: List[Tuple[time, time]] = [
+    (time(9, 30), time(11, 30)),
+    (time(13, 0), time(15, 0)),
+]
+
+# 分钟线周期对应的分钟数
+FREQUENCY_MINUTES = {'1m': 1, '5m': 5, '15m': 15, '30m': 30, '60m': 60}
+
+
+def is_trading_day(day: date) -> bool:
+    """
+    判断是否为交易日（仅排除周末，不含节假日）
+
+    参数：
+        day: 日期
+
+    返回值：
+        bool: 如果是交易日返回True，否则返回False
+    """
+    return day.weekday() < 5
+
+
+@lru_cache(maxsize=None)
+def bar_close_times(frequency: str) -> Tuple[time, ...]:
+    """
+    获取一个交易日内某个分钟周期的全部K线收盘时间
+
+    参数：
+        frequency: 分钟线周期，如'5m'
+
+    返回值：
+        Tuple[time, ...]: 按时间排序的收盘时间，如5m为(09:35, 09:40, ..., 15:00)
+    """
+    minutes = FREQUENCY_MINUTES[frequency]
+    closes = []
+    for start, end in TRADING_SESSIONS:
+        current = datetime.combine(date.min, start)
+        session_end = datetime.combine(date.min, end)
+        while current < session_end:
+            current += timedelta(minutes=minutes)
+            closes.append(min(current, session_end).time())
+    return tuple(closes)
+
+
+def _closes_until(frequency: str, moment: time) -> int:
+    """一个交易日内截至moment（含）已收盘的K线数量"""
+    return bisect.bisect_right(bar_close_times(frequency), moment)
+
+
+def next_bar_close(moment: datetime, frequency: str) -> datetime:
+    """
+    获取moment之后（不含）的第一个K线收盘时间，跳过非交易日
+
+    参数：
+        moment: 当前时间
+        frequency: 分钟线周期，如'5m'
+
+    返回值：
+        datetime: 下一根K线的收盘时间
+    """
+    closes = bar_close_times(frequency)
+    day = moment.date()
+    index = bisect.bisect_right(closes, moment.time())
+    while not is_trading_day(day) or index >= len(closes):
+        day += timedelta(days=1)
+        index = 0
+    return datetime.combine(day, closes[index])
+
+
+def last_bar_close(moment: datetime, frequency: str) -> datetime:
+    """
+    获取moment之前（含）最近一个K线收盘时间，跳过非交易日
+
+    参数：
+        moment: 当前时间
+        frequency: 分钟线周期，如'5m'
+
+    返回值：
+        datetime: 最近一根已收盘K线的收盘时间
+    """
+    closes = bar_close_times(frequency)
+    day = moment.date()
+    index = _closes_until(frequency, moment.time())
+    while not is_trading_day(day) or index == 0:
+        day -= timedelta(days=1)
+        index = len(closes)
+    return datetime.combine(day, closes[index - 1])
+
+
+def count_bars_between(start: datetime, end: datetime, frequency: str) -> int:
+    """
+    计算(start, end]区间内新增的K线数量
+
+    对于分钟线，统计区间内的收盘时间点；对于日线、周线、月线，统计新增的交易日、周、月。
+    节假日按交易日计算，因此结果可能偏大，但不会偏小。
+
+    参数：
+        start: 已有数据的最后一根K线时间
+        end: 截止时间
+        frequency: 数据周期
+
+    返回值：
+        int: 新增的K线数量
+    """
+    if end <= start:
+        return 0
+
+    if frequency in FREQUENCY_MINUTES:
+        per_day = len(bar_close_times(frequency))
+        count = 0
+        day = start.date()
+        while day <= end.date():
+            if is_trading_day(day):
+                upper = _closes_until(frequency, end.time()) if day == end.date() else per_day
+                lower = _closes_until(frequency, start.time()) if day == start.date() else 0
+                count += max(upper - lower, 0)
+            day += timedelta(days=1)
+        return count
+
+    if frequency == '1w':
+        return (end.date() - timedelta(days=end.weekday()) -
+                (start.date() - timedelta(days=start.weekday()))).days // 7
+    if frequency == '1M':
+        return (end.year - start.year) * 12 + end.month - start.month
+
+    days = (end.date() - start.date()).days
+    weeks, remainder = divmod(days, 7)
+    count = weeks * 5
+    for offset in range(1, remainder + 1):
+        if is_trading_day(start.date() + timedelta(days=weeks * 7 + offset)):
+            count += 1
+    return count
+
@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+性能基准测试，覆盖MyTT全部函数和K线加载流程，结果记录到JSON历史文件
+
+用法：
+    python tests/run_benchmarks.py                          完整测试：1k/100k/1M根K线和5000只股票的面板
+    python tests/run_benchmarks.py --quick                  快速测试：1k/100k根K线和500只股票
+    python tests/run_benchmarks.py --filter MA,EMA,storage  只测试名称包含这些关键字的项目
+    python tests/run_benchmarks.py --compare --threshold 0.2
+        与历史文件中最近一次结果比较，耗时增加超过20%的项目视为退化，存在退化时返回1
+"""
+
+import os
+import sys
+import time
+import shutil
+import inspect
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.lib import MyTT
+from src.features.stock_manager import StockDataManager
+from src.utils.helpers import save_to_json, load_from_json
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HISTORY = os.path.join('data', 'benchmarks', 'history.json')
+DEFAULT_SIZES = [1000, 100000, 1000000]
+QUICK_SIZES = [1000, 100000]
+
+# 行情序列参数名，其余参数使用默认值
+_SERIES = {'S', 'CLOSE', 'HIGH', 'LOW', 'OPEN', 'VOL', 'S1', 'S2', 'S_TRUE', 'S_FALSE'}
+# 没有默认值的非序列参数
+_SCALARS = {'N': 20, 'A': 5, 'B': 3}
+
+def synthetic_bars(rows: int, symbols: Optional[int] = None, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    生成随机游走的K线，symbols为None时为一维序列，否则为(K线 × 股票)的面板
+
+    参数：
+        rows: K线数量
+        symbols: 股票数量
+        seed: 随机种子
+
+    返回值：
+        Dict[str, np.ndarray]: open、high、low、close、volume字段
+    """
+    rng = np.random.default_rng(seed)
+    shape = (rows,) if symbols is None else (rows, symbols)
+    close = 50 * np.exp(np.cumsum(rng.normal(0, 0.01, shape), axis=0))
+    spread = close * rng.uniform(0, 0.02, shape)
+    return {
+        'open': close + rng.uniform(-0.5, 0.5, shape) * spread,
+        'high': close + spread,
+        'low': close - spread,
+        'close': close,
+        'volume': rng.uniform(1e5, 1e7, shape),
+    }
+
+def _mytt_arguments(func: Callable, bars: Dict[str, np.ndarray]) -> Optional[Tuple]:
+    """按参数名为MyTT函数构造参数，无法构造时返回None"""
+    if func is MyTT.RD:  # RD的第一个参数N是序列
+        return (bars['close'],)
+    fields = {'CLOSE': 'close', 'HIGH': 'high', 'LOW': 'low', 'OPEN': 'open', 'VOL': 'volume'}
+    args = []
+    for name, parameter in inspect.signature(func).parameters.items():
+        if name == 'S_BOOL':
+            args.append(bars['close'] > bars['open'])
+        elif name in _SERIES:
+            args.append(bars[fields.get(name, 'close')])
+        elif parameter.default is not inspect.Parameter.empty:
+            break
+        elif name in _SCALARS:
+            args.append(_SCALARS[name])
+        else:
+            return None
+    return tuple(args)
+
+def mytt_functions() -> Dict[str, Callable]:
+    """MyTT中的全部指标函数（PANEL只是宽表包装，不单独测试）"""
+    functions = {}
+    for name, func in vars(MyTT).items():
+        if name.isupper() and not name.startswith('_') and name != 'PANEL' and inspect.isfunction(func) and func.__module__ == MyTT.__name__:
+            functions[name] = func
+    return functions
+
+def measure(func: Callable, repeat: int) -> Dict[str, float]:
+    """
+    先执行一次预热（numba编译、缓存），再计时repeat次
+
+    返回值：
+        Dict[str, float]: 最短和中位耗时（秒）
+    """
+    func()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'best': min(timings), 'median': float(np.median(timings))}
+
+def mytt_cases(sizes: List[int], symbols: int, panel_bars: int) -> Dict[str, Callable]:
+    """MyTT函数在各个序列长度和面板上的测试项目"""
+    cases = {}
+    datasets = [(f"{size}", synthetic_bars(size)) for size in sizes]
+    if symbols:
+        datasets.append((f"{panel_bars}x{symbols}", synthetic_bars(panel_bars, symbols)))
+    for name, func in mytt_functions().items():
+        for label, bars in datasets:
+            args = _mytt_arguments(func, bars)
+            if args is None:
+                logger.warning(f"无法为{name}构造参数，跳过")
+                break
+            cases[f"mytt.{name}[{label}]"] = lambda func=func, args=args: func(*args)
+    return cases
+
+def storage_cases(data_dir: str) -> Dict[str, Callable]:
+    """DataFrame序列化/反序列化和load_cached_data的测试项目：十年日线和一年1分钟线"""
+    histories = {
+        '1d_2500': pd.date_range('2015-01-05', periods=2500, freq='B'),
+        '1m_60000': pd.date_range('2024-01-02 09:31', periods=60000, freq='min'),
+    }
+    cases = {}
+    for backend in ('json', 'columnar'):
+        manager = StockDataManager()
+        manager.initialize({'data_dir': os.path.join(data_dir, backend), 'storage': backend})
+        for label, index in histories.items():
+            bars = synthetic_bars(len(index))
+            df = pd.DataFrame(bars, index=index)
+            frequency = label.split('_')[0]
+            manager._save_stock_data('sh600000', frequency, df)
+
+            def cold(manager=manager, frequency=frequency):
+                manager.frame_cache.clear()
+                return manager.load_cached_data('sh600000', frequency)
+
+            cases[f"storage.load_cached_data.{backend}.cold[{label}]"] = cold
+            cases[f"storage.load_cached_data.{backend}.warm[{label}]"] = \
+                lambda manager=manager, frequency=frequency: manager.load_cached_data('sh600000', frequency)
+            if backend == 'json':
+                serialized = manager._serialize_dataframe(df)
+                cases[f"storage.serialize[{label}]"] = lambda manager=manager, df=df: manager._serialize_dataframe(df)
+                cases[f"storage.deserialize[{label}]"] = \
+                    lambda manager=manager, data=serialized: manager._deserialize_dataframe(data)
+    return cases
+
+def _environment() -> Dict[str, str]:
+    """记录运行环境，便于比较不同机器或依赖版本的结果"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        commit = ''
+    try:
+        import numba
+        numba_version = numba.__version__
+    except ImportError:
+        numba_version = ''
+    return {'commit': commit, 'python': platform.python_version(), 'machine': platform.machine(),
+            'numpy': np.__version__, 'pandas': pd.__version__, 'numba': numba_version}
+
+def run_benchmarks(sizes: List[int], symbols: int, panel_bars: int, repeat: int,
+                   patterns: Optional[List[str]] = None) -> Dict:
+    """
+    执行基准测试
+
+    参数：
+        sizes: 一维序列的K线数量
+        symbols: 面板的股票数量，0表示不测试面板
+        panel_bars: 面板的K线数量
+        repeat: 每个项目的计时次数
+        patterns: 只运行名称包含任一关键字的项目
+
+    返回值：
+        Dict: 本次运行的记录，results为项目名称到耗时的映射
+    """
+    data_dir = tempfile.mkdtemp()
+    try:
+        cases = {**mytt_cases(sizes, symbols, panel_bars), **storage_cases(data_dir)}
+        if patterns:
+            cases = {name: case for name, case in cases.items() if any(p in name for p in patterns)}
+        results = {}
+        with np.errstate(all='ignore'):
+            for name, case in cases.items():
+                results[name] = measure(case, repeat)
+                print(f"{name:<60} {results[name]['best'] * 1000:>12.3f} ms")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return {'time': datetime.now().isoformat(timespec='seconds'), 'environment': _environment(),
+            'repeat': repeat, 'results': results}
+
+def compare_results(baseline: Dict, current: Dict, threshold: float) -> List[Tuple[str, float, float, float]]:
+    """
+    比较两次运行的最短耗时
+
+    参数：
+        baseline: 基准记录
+        current: 本次记录
+        threshold: 允许的耗时增加比例，如0.2表示20%
+
+    返回值：
+        List[Tuple[str, float, float, float]]: 退化的项目(名称, 基准耗时, 本次耗时, 耗时比)
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None or previous['best'] <= 0:
+            continue
+        ratio = result['best'] / previous['best']
+        if ratio > 1 + threshold:
+            regressions.append((name, previous['best'], result['best'], ratio))
+    return regressions
+
+def load_history(file_path: str) -> List[Dict]:
+    """
+    加载历史记录
+
+    返回值：
+        List[Dict]: 按时间顺序的运行记录，文件不存在时为空列表
+    """
+    if not os.path.exists(file_path):
+        return []
+    history = load_from_json(file_path)
+    return history.get('runs', []) if history else []
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description="MyTT指标和K线加载的性能基准测试")
+    parser.add_argument('--sizes', help="一维序列的K线数量，逗号分隔，默认1000,100000,1000000")
+    parser.add_argument('--symbols', type=int, default=5000, help="面板的股票数量，0表示不测试面板")
+    parser.add_argument('--panel-bars', type=int, default=250, help="面板的K线数量")
+    parser.add_argument('--repeat', type=int, default=3, help="每个项目的计时次数")
+    parser.add_argument('--quick', action='store_true', help="快速模式：不测试1M根K线，面板为500只股票")
+    parser.add_argument('--filter', help="只运行名称包含这些关键字（逗号分隔）的项目")
+    parser.add_argument('--history', default=DEFAULT_HISTORY, help="历史记录文件")
+    parser.add_argument('--compare', action='store_true', help="与历史文件中最近一次记录比较")
+    parser.add_argument('--threshold', type=float, default=0.2, help="耗时增加超过该比例视为退化")
+    parser.add_argument('--no-save', action='store_true', help="不写入历史记录")
+    args = parser.parse_args(argv)
+
+    sizes = [int(size) for size in args.sizes.split(',')] if args.sizes else \
+        (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+    symbols = min(args.symbols, 500) if args.quick else args.symbols
+    patterns = args.filter.split(',') if args.filter else None
+
+    history = load_history(args.history)
+    current = run_benchmarks(sizes, symbols, args.panel_bars, max(1, args.repeat), patterns)
+
+    regressions = []
+    if args.compare:
+        if not history:
+            print("没有历史记录可供比较")
+        else:
+            regressions = compare_results(history[-1], current, args.threshold)
+            baseline = history[-1].get('environment', {}).get('commit', '') or history[-1].get('time', '')
+            print(f"\n与 {baseline} 比较，阈值 {args.threshold:.0%}：")
+            for name, before, after, ratio in regressions:
+                print(f"  退化 {name:<56} {before * 1000:>10.3f} -> {after * 1000:>10.3f} ms ({ratio:.2f}x)")
+            if not regressions:
+                print("  没有退化")
+
+    if not args.no_save:
+        history.append(current)
+        if save_to_json(args.history, {'runs': history}):
+            print(f"\n结果已记录到 {args.history}")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.WARNING)
+    sys.exit(main())
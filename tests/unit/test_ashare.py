@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Ashare行情接口的单元测试
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from src.lib import Ashare
+
+
+def _make_frame(code):
+    """生成测试用行情数据"""
+    return pd.DataFrame({'close': [1.0]}, index=pd.to_datetime(['2023-01-03']), columns=['close']).assign(code=code)
+
+
+class TestGetPrices(unittest.TestCase):
+    """测试批量行情接口"""
+
+    def test_fallback_order(self):
+        """测试每只股票保持新浪优先、腾讯备用的顺序"""
+        calls = []
+
+        def sina(code, **kwargs):
+            calls.append(('sina', code))
+            if code == 'sz000001':
+                raise ValueError('新浪接口失败')
+            return _make_frame(code)
+
+        def tencent(code, **kwargs):
+            calls.append(('tencent', code))
+            return _make_frame(code)
+
+        with patch.object(Ashare, 'get_price_sina', side_effect=sina), \
+             patch.object(Ashare, 'get_price_day_tx', side_effect=tencent):
+            data, errors = Ashare.get_prices(['sh600000', '000001.XSHE'], frequency='1d', count=1)
+
+        self.assertEqual(errors, {})
+        self.assertEqual(set(data), {'sh600000', '000001.XSHE'})
+        self.assertEqual(data['000001.XSHE']['code'].iloc[0], 'sz000001')
+        self.assertLess(calls.index(('sina', 'sz000001')), calls.index(('tencent', 'sz000001')))
+        self.assertNotIn(('tencent', 'sh600000'), calls)
+
+    def test_per_symbol_errors(self):
+        """测试单只股票失败不影响其他股票"""
+        def tencent(code, **kwargs):
+            if code == 'sh600000':
+                raise ValueError('接口错误')
+            return _make_frame(code)
+
+        with patch.object(Ashare, 'get_price_min_tx', side_effect=tencent):
+            data, errors = Ashare.get_prices(['sh600000', 'sz000001'], frequency='1m')
+
+        self.assertEqual(list(data), ['sz000001'])
+        self.assertEqual(errors, {'sh600000': '接口错误'})
+
+        data, errors = Ashare.get_prices(['sh600000'], frequency='2h')
+        self.assertEqual(data, {})
+        self.assertIn('sh600000', errors)
+
+    def test_host_limits(self):
+        """测试每个主机的并发数限制"""
+        lock = threading.Lock()
+        state = {'active': 0, 'peak': 0}
+
+        def sina(code, **kwargs):
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.02)
+            with lock:
+                state['active'] -= 1
+            return _make_frame(code)
+
+        codes = [f'sh6000{i:02d}' for i in range(12)]
+        with patch.object(Ashare, 'get_price_sina', side_effect=sina):
+            data, errors = Ashare.get_prices(codes, frequency='5m',
+                                             host_limits={Ashare.SINA_HOST: 3})
+
+        self.assertEqual(len(data), 12)
+        self.assertGreater(state['peak'], 1)
+        self.assertLessEqual(state['peak'], 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+基准测试工具的单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from tests.run_benchmarks import compare_results, load_history, main, mytt_functions, _mytt_arguments, synthetic_bars
+
+
+class TestBenchmarks(unittest.TestCase):
+    """测试基准测试的参数构造、历史记录和退化比较"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.history = os.path.join(self.temp_dir, "history.json")
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_every_function_covered(self):
+        """测试能为MyTT的每个函数构造参数"""
+        bars = synthetic_bars(100)
+        for name, func in mytt_functions().items():
+            args = _mytt_arguments(func, bars)
+            self.assertIsNotNone(args, name)
+            func(*args)
+
+    def test_compare(self):
+        """测试耗时增加超过阈值时视为退化"""
+        baseline = {'results': {'a': {'best': 1.0}, 'b': {'best': 1.0}, 'c': {'best': 1.0}}}
+        current = {'results': {'a': {'best': 1.1}, 'b': {'best': 1.5}, 'c': {'best': 0.5}, 'd': {'best': 9.0}}}
+        self.assertEqual(compare_results(baseline, current, 0.2), [('b', 1.0, 1.5, 1.5)])
+
+    def test_history(self):
+        """测试结果追加到历史文件，比较时没有退化返回0"""
+        argv = ['--sizes', '200', '--symbols', '5', '--panel-bars', '50', '--repeat', '1',
+                '--filter', 'mytt.MA[', '--history', self.history]
+        self.assertEqual(main(argv), 0)
+        self.assertEqual(main(argv + ['--compare', '--threshold', '1000']), 0)
+        history = load_history(self.history)
+        self.assertEqual(len(history), 2)
+        self.assertEqual(sorted(history[0]['results']), ['mytt.MA[200]', 'mytt.MA[50x5]'])
+
+
+if __name__ == '__main__':
+    unittest.main()
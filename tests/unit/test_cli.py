@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+命令行批量下载的单元测试
+"""
+
+import os
+import io
+import json
+import shutil
+import tempfile
+import unittest
+import multiprocessing as mp
+from contextlib import redirect_stdout
+from unittest.mock import patch
+import pandas as pd
+from src.interfaces.cli import StockDataCLI
+
+
+@unittest.skipUnless(mp.get_start_method() == 'fork', "工作进程需继承父进程中的mock")
+class TestFetchCommand(unittest.TestCase):
+    """测试fetch子命令的检查点和吞吐量统计"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.journal = os.path.join(self.temp_dir, "journal.jsonl")
+        self.data = pd.DataFrame({'open': [10.0, 10.5, 10.6], 'close': [10.2, 10.8, 10.7],
+                                  'high': [10.3, 10.9, 10.9], 'low': [9.9, 10.4, 10.5],
+                                  'volume': [1e5, 2e5, 3e5]},
+                                 index=pd.to_datetime(['2025-02-24', '2025-02-25', '2025-02-26']))
+        self.cli = StockDataCLI()
+        self.cli.controller.initialize({'manager': {'data_dir': self.temp_dir}})
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def fetch(self, **kwargs) -> int:
+        with redirect_stdout(io.StringIO()) as output:
+            code = self.cli.fetch(['sh600000', 'sz000001', 'sz000002'], ['1d', '5m'], count=3, jobs=2,
+                                  journal=self.journal, **kwargs)
+        self.output = output.getvalue()
+        return code
+
+    @patch('src.features.stock_manager.get_price')
+    def test_resume(self, mock_get_price):
+        """测试失败后保留检查点，再次运行只下载未完成的任务"""
+        mock_get_price.side_effect = lambda code, **kwargs: pd.DataFrame() if code == 'sz000002' else self.data
+        self.assertEqual(self.fetch(), 1)
+        self.assertIn("完成 4/6 个任务", self.output)
+        with open(self.journal, encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f]
+        self.assertEqual(entries[0]['params']['frequencies'], ['1d', '5m'])
+        self.assertEqual(sum(entry.get('ok', False) for entry in entries[1:]), 4)
+        self.assertEqual({entry['bars'] for entry in entries[1:] if entry['ok']}, {3})
+
+        mock_get_price.side_effect = lambda code, **kwargs: self.data
+        self.assertEqual(self.fetch(), 0)
+        self.assertIn("完成 2/2 个任务", self.output)
+        self.assertIn("根K线/秒", self.output)
+        self.assertFalse(os.path.exists(self.journal))
+        self.assertEqual(len(self.cli.controller.manager.load_cached_data('sz000002', '5m')), 3)
+
+    @patch('src.features.stock_manager.get_price')
+    def test_changed_parameters(self, mock_get_price):
+        """测试参数不同或指定restart时忽略已有的检查点"""
+        mock_get_price.side_effect = lambda code, **kwargs: pd.DataFrame() if code == 'sz000002' else self.data
+        self.fetch()
+        self.fetch(restart=True)
+        self.assertIn("完成 4/6 个任务", self.output)
+        self.fetch(incremental=True)
+        self.assertIn("完成 4/6 个任务", self.output)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -52,6 +52,22 @@ class TestDataController(unittest.TestCase):
         self.assertFalse(success)
         self.assertEqual(error, "未获取到数据")
     
+    @patch('src.features.stock_manager.StockDataManager.get_and_save_stock_data_batch')
+    def test_get_stock_data_batch(self, mock_get_batch):
+        """测试批量获取股票数据"""
+        mock_get_batch.return_value = {
+            '300718': (True, 'path/300718_1d.json'),
+            '600000': (False, "未获取到数据")
+        }
+        results = self.controller.get_stock_data_batch(['300718', '600000'])
+        self.assertEqual(results, mock_get_batch.return_value)
+        
+        # 模拟异常时每只股票都返回错误信息
+        mock_get_batch.side_effect = Exception("网络错误")
+        results = self.controller.get_stock_data_batch(['300718', '600000'])
+        self.assertEqual(set(results), {'300718', '600000'})
+        self.assertFalse(results['300718'][0])
+    
     @patch('src.features.stock_fetcher.StockDataFetcher.fuzzy_match_stock')
     def test_search_stock(self, mock_search):
         """测试股票搜索功能"""
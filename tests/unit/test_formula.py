@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+公式编译器的单元测试
+"""
+
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.lib import MyTT
+from src.lib.formula import compile_formula
+
+
+class TestFormula(unittest.TestCase):
+    """测试公式解析、公共子表达式去重和求值"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(5)
+        close = rng.normal(size=400).cumsum() + 100
+        self.data = pd.DataFrame({'open': close + rng.normal(size=400), 'close': close,
+                                  'high': close + 1, 'low': close - 1,
+                                  'volume': rng.random(400) * 1e6})
+
+    def test_evaluate(self):
+        """测试结果与直接调用MyTT一致"""
+        program = compile_formula("""
+            {MACD} DIF:EMA(CLOSE,12)-EMA(C,26);
+            DEA:EMA(DIF,9);
+            MACD:RD((DIF-DEA)*2);
+            MID:=MA(C,20); // 中间变量不输出
+            C>MID AND V>=MA(VOL,5)
+        """)
+        self.assertEqual(list(program.outputs), ['DIF', 'DEA', 'MACD', 'OUT1'])
+        self.assertEqual(program.inputs, ['close', 'volume'])
+
+        result = program.evaluate(self.data)
+        C, V = self.data['close'].values, self.data['volume'].values
+        DIF = MyTT.EMA(C, 12) - MyTT.EMA(C, 26)
+        np.testing.assert_array_equal(result['DIF'], DIF)
+        np.testing.assert_array_equal(result['DEA'], MyTT.EMA(DIF, 9))
+        np.testing.assert_array_equal(result['MACD'], MyTT.MACD(C)[2])
+        np.testing.assert_array_equal(result['OUT1'], (C > MyTT.MA(C, 20)) & (V >= MyTT.MA(V, 5)))
+
+    def test_multiline(self):
+        """测试未写完的表达式跨行书写，分号或完整表达式后的换行结束语句"""
+        program = compile_formula("""
+            DIF:EMA(CLOSE,12)-
+                EMA(CLOSE,26);
+            SIGNAL:C>MA(C,20)
+                AND V>MA(V,5)
+            OR CROSS(DIF,
+                     EMA(DIF,9))
+            MID:MA(C,20)
+            X:MID*2
+        """)
+        self.assertEqual(list(program.outputs), ['DIF', 'SIGNAL', 'MID', 'X'])
+        result = program.evaluate(self.data)
+        C, V = self.data['close'].values, self.data['volume'].values
+        DIF = MyTT.EMA(C, 12) - MyTT.EMA(C, 26)
+        np.testing.assert_array_equal(result['DIF'], DIF)
+        np.testing.assert_array_equal(result['SIGNAL'], ((C > MyTT.MA(C, 20)) & (V > MyTT.MA(V, 5)))
+                                      | MyTT.CROSS(DIF, MyTT.EMA(DIF, 9)))
+        np.testing.assert_array_equal(result['X'], MyTT.MA(C, 20) * 2)
+
+    def test_precedence(self):
+        """测试运算符优先级和一元负号"""
+        result = compile_formula("X:-C+H*2/(L-1)>O OR 1=2").evaluate(self.data)
+        C, H, L, O = (self.data[k].values for k in ('close', 'high', 'low', 'open'))
+        np.testing.assert_array_equal(result['X'], (-C + H * 2 / (L - 1) > O) | False)
+
+    def test_shared_subexpressions(self):
+        """测试30个公式中相同的均线只计算一次"""
+        formulas = {f"f{i}": f"A:=MA(CLOSE,5);B:=MA(C,{10 + i % 3});XG:CROSS(A,B) AND C>MA(C,5)"
+                    for i in range(30)}
+        program = compile_formula(formulas)
+        self.assertEqual(len(program.outputs), 30)
+        with mock.patch.object(MyTT, 'MA', wraps=MyTT.MA) as ma:
+            result = program.evaluate(self.data)
+        self.assertEqual(ma.call_count, 4)
+        expected = MyTT.CROSS(MyTT.MA(self.data['close'].values, 5), MyTT.MA(self.data['close'].values, 11))
+        np.testing.assert_array_equal(result['f1.XG'] > 0,
+                                      (expected > 0) & (self.data['close'].values > MyTT.MA(self.data['close'].values, 5)))
+
+    def test_commutative(self):
+        """测试交换律下等价的表达式合并为同一节点"""
+        program = compile_formula({'a': "X:MA(C,5)+MA(H,5)", 'b': "Y:MA(H,5)+MA(C,5)"})
+        self.assertEqual(program.outputs['a.X'], program.outputs['b.Y'])
+
+    def test_buffer_reuse(self):
+        """测试原地复用中间结果不会改写输入和输出"""
+        close = self.data['close'].values.copy()
+        result = compile_formula("A:C*2;B:(C-MA(C,5))*(A+1)/2").evaluate(self.data)
+        np.testing.assert_array_equal(self.data['close'].values, close)
+        np.testing.assert_array_equal(result['A'], close * 2)
+        np.testing.assert_array_equal(result['B'], (close - MyTT.MA(close, 5)) * (close * 2 + 1) / 2)
+
+    def test_panel(self):
+        """测试对二维面板一次求值"""
+        rng = np.random.default_rng(6)
+        close = rng.normal(size=(200, 4)).cumsum(axis=0) + 50
+        program = compile_formula("UP:C>MA(C,10);DIF:EMA(C,12)-EMA(C,26)")
+        result = program.evaluate({'close': close})
+        for j in range(4):
+            single = program.evaluate({'close': close[:, j]})
+            np.testing.assert_array_equal(result['UP'][:, j], single['UP'])
+            np.testing.assert_allclose(result['DIF'][:, j], single['DIF'], rtol=1e-12)
+
+    def test_errors(self):
+        """测试错误的公式"""
+        for text in ("X:MA(C,5", "X:FOO(C)", "X:UNKNOWN+1", "X:MACD(C)", "X:C $ 1"):
+            with self.assertRaises(ValueError):
+                compile_formula(text).evaluate(self.data)
+        with self.assertRaises(ValueError):
+            compile_formula("X:MA(AMOUNT,5)")
+        with self.assertRaises(ValueError):
+            compile_formula("X:C>O").evaluate({'close': self.data['close']})
+
+
+if __name__ == '__main__':
+    unittest.main()
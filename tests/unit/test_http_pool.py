@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+HTTP连接池模块的单元测试
+"""
+
+import threading
+import unittest
+from http.server import HTTPServer, BaseHTTPRequestHandler
+from src.core.http_pool import HttpPool, get_default_pool
+from src.core.module import ModuleBase
+
+
+class _KeepAliveHandler(BaseHTTPRequestHandler):
+    """支持长连接的测试请求处理器"""
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHttpPool(unittest.TestCase):
+    """测试HTTP连接池"""
+
+    def setUp(self):
+        """启动本地测试服务器"""
+        self.server = HTTPServer(('127.0.0.1', 0), _KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f'http://127.0.0.1:{self.server.server_port}/'
+
+    def tearDown(self):
+        """关闭测试服务器"""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reuse_stats(self):
+        """测试长连接复用计数"""
+        pool = HttpPool()
+        for _ in range(3):
+            response = pool.get(self.url)
+            self.assertEqual(response.text, 'ok')
+        pool.close()
+
+        stats = pool.stats()
+        self.assertEqual(stats['requests'], 3)
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 2)
+
+    def test_no_keep_alive(self):
+        """测试关闭长连接后每次请求都新建连接"""
+        pool = HttpPool({'keep_alive': False})
+        for _ in range(2):
+            pool.get(self.url)
+        pool.close()
+        self.assertEqual(pool.stats()['misses'], 2)
+
+    def test_config(self):
+        """测试超时与压缩配置"""
+        pool = HttpPool({'connect_timeout': 1, 'read_timeout': 2, 'compression': False})
+        self.assertEqual(pool.timeout, (1, 2))
+        self.assertEqual(pool.session.headers['Accept-Encoding'], 'identity')
+
+    def test_module_injection(self):
+        """测试通过模块配置注入连接池"""
+        module = ModuleBase()
+        module.initialize()
+        self.assertIs(module.get_http_pool(), get_default_pool())
+
+        pool = HttpPool()
+        module = ModuleBase()
+        module.initialize({'http_pool': pool})
+        self.assertIs(module.get_http_pool(), pool)
+
+        module = ModuleBase()
+        module.initialize({'http': {'pool_maxsize': 4}})
+        self.assertEqual(module.get_http_pool().config['pool_maxsize'], 4)
+        self.assertIs(module.get_http_pool(), module.get_http_pool())
+
+if __name__ == '__main__':
+    unittest.main()
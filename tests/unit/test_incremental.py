@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+增量指标的单元测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.lib import MyTT
+from src.lib.incremental import (IncrementalIndicator, IncrementalMACD, IncrementalKDJ, IncrementalBOLL,
+                                 IncrementalATR, IncrementalRSI, save_snapshots, load_snapshots)
+
+
+class TestIncrementalIndicators(unittest.TestCase):
+    """测试增量指标与批量计算一致"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(5)
+        close = rng.normal(size=300).cumsum() + 50
+        high = close + rng.random(300)
+        low = close - rng.random(300)
+        close[3] = np.nan
+        high[50] = np.nan
+        close[120] = close[119]
+        self.bars = pd.DataFrame({'close': close, 'high': high, 'low': low})
+        self.batch = {
+            'macd': MyTT.MACD(close),
+            'kdj': MyTT.KDJ(close, high, low),
+            'boll': MyTT.BOLL(close),
+            'atr': MyTT.ATR(close, high, low),
+            'rsi': MyTT.RSI(close),
+        }
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def create_indicators(self):
+        return {'macd': IncrementalMACD(), 'kdj': IncrementalKDJ(), 'boll': IncrementalBOLL(),
+                'atr': IncrementalATR(), 'rsi': IncrementalRSI()}
+
+    def assert_matches_batch(self, name, i, result):
+        expected = self.batch[name]
+        expected = tuple(np.asarray(v)[i] for v in expected) if isinstance(expected, tuple) \
+            else np.asarray(expected)[i]
+        np.testing.assert_array_equal(np.asarray(result, dtype=float), np.asarray(expected, dtype=float),
+                                      err_msg=f"{name} 第{i}根K线")
+
+    def test_update_matches_batch(self):
+        """测试逐根更新与批量计算逐位相同"""
+        indicators = self.create_indicators()
+        for i, bar in enumerate(self.bars.to_dict('records')):
+            for name, indicator in indicators.items():
+                self.assert_matches_batch(name, i, indicator.update(bar))
+
+    def test_revise_last(self):
+        """测试修正未走完的K线"""
+        indicators = self.create_indicators()
+        for i, bar in enumerate(self.bars.to_dict('records')):
+            forming = {'close': bar['close'] + 1, 'high': bar['high'] + 2, 'low': bar['low'] - 2}
+            for name, indicator in indicators.items():
+                indicator.update(forming)
+                indicator.revise_last({key: value - 0.5 for key, value in bar.items()})
+                self.assert_matches_batch(name, i, indicator.revise_last(bar))
+        with self.assertRaises(ValueError):
+            IncrementalMACD().revise_last({'close': 1.0})
+
+    def test_snapshot_restore(self):
+        """测试保存状态后热启动"""
+        records = self.bars.to_dict('records')
+        indicators = self.create_indicators()
+        for bar in records[:150]:
+            for indicator in indicators.values():
+                indicator.update(bar)
+
+        path = os.path.join(self.temp_dir, "indicators.json")
+        self.assertTrue(save_snapshots(path, indicators))
+        restored = load_snapshots(path)
+        self.assertEqual(set(restored), set(indicators))
+        for i, bar in enumerate(records[150:], 150):
+            for name, indicator in restored.items():
+                self.assert_matches_batch(name, i, indicator.update(bar))
+
+        # 只包含窗口数值的旧版本快照恢复时重建单调队列和NaN计数
+        def strip(state):
+            return {key: strip(value) if isinstance(value, dict) else value for key, value in state.items()
+                    if key not in ('count', 'nan_count', 'candidates', 'missing_count')}
+        kdj = IncrementalKDJ()
+        for bar in records[:150]:
+            kdj.update(bar)
+        snapshot = kdj.snapshot()
+        snapshot['state'] = strip(snapshot['state'])
+        kdj = IncrementalIndicator.restore(snapshot)
+        for i, bar in enumerate(records[150:], 150):
+            self.assert_matches_batch('kdj', i, kdj.update(bar))
+
+        self.assertIsInstance(IncrementalIndicator.restore(IncrementalRSI(6).snapshot()), IncrementalRSI)
+        with self.assertRaises(ValueError):
+            IncrementalIndicator.restore({'indicator': 'Unknown', 'params': {}, 'state': {}})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+MyTT指标函数的单元测试
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.lib import MyTT
+
+
+def reference_sma(S, N, M=1):
+    """逐点递推的SMA，作为对照"""
+    K = pd.Series(S).rolling(N).mean()
+    for i in range(N + 1, len(S)):
+        K[i] = (M * S[i] + (N - M) * K[i - 1]) / N
+    return K
+
+
+class TestRecursiveFilter(unittest.TestCase):
+    """测试递推滤波内核"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(0)
+        self.close = rng.normal(size=2000).cumsum() + 100
+
+    def test_sma_bit_compatible(self):
+        """测试SMA与逐点递推的结果逐位相同"""
+        diff = np.diff(self.close, prepend=np.nan)
+        for S in (self.close, np.maximum(diff, 0), self.close.astype(int)):
+            for N, M in ((6, 1), (14, 1), (9, 3)):
+                np.testing.assert_array_equal(MyTT.SMA(S, N, M), reference_sma(S, N, M).values)
+        np.testing.assert_array_equal(MyTT.SMA(self.close[:10], 9), reference_sma(self.close[:10], 9).values)
+
+    def test_python_kernel(self):
+        """测试未安装numba时的纯Python内核"""
+        X = self.close
+        Y = pd.Series(X).rolling(14).mean().to_numpy()
+        result = MyTT._recursive_py(X, Y, 15, 1, 13, 14)
+        expected = reference_sma(X, 14).to_numpy()
+        np.testing.assert_array_equal(result, expected)
+
+    def test_window_indicators(self):
+        """测试基于滑动窗口内核的指标"""
+        high, low = self.close + 1, self.close - 1
+        TP = pd.Series((high + low + self.close) / 3)
+        avedev = TP.rolling(14).apply(lambda x: np.abs(x - x.mean()).mean(), raw=True)
+        expected = (TP - TP.rolling(14).mean()) / (0.015 * avedev)
+        np.testing.assert_allclose(MyTT.CCI(self.close, high, low, 14), expected.values, rtol=1e-9)
+
+        up, mid, down = MyTT.TAQ(high, low, 20)
+        np.testing.assert_array_equal(up, pd.Series(high).rolling(20).max().values)
+        np.testing.assert_array_equal(down, pd.Series(low).rolling(20).min().values)
+
+    def test_linear_regression(self):
+        """测试SLOPE、FORCAST与序列版本LINREG一致"""
+        slope, intercept, forecast, r2 = MyTT.LINREG(self.close, 20)
+        poly = np.polyfit(np.arange(20), self.close[-20:], 1)
+        self.assertAlmostEqual(MyTT.SLOPE(self.close, 20), poly[0], places=9)
+        self.assertAlmostEqual(MyTT.FORCAST(self.close, 20), np.polyval(poly, 20), places=9)
+        K, Y = MyTT.SLOPE(self.close, 20, RS=True)
+        np.testing.assert_allclose(Y, np.polyval(poly, np.arange(20)), rtol=1e-12)
+        self.assertAlmostEqual(MyTT.SLOPE(self.close, 20), slope[-1], places=9)
+        self.assertEqual(len(forecast), len(self.close))
+
+    def test_rsi(self):
+        """测试基于SMA的RSI"""
+        rsi = MyTT.RSI(self.close, 24)
+        DIF = self.close - MyTT.REF(self.close, 1)
+        expected = np.round(reference_sma(np.maximum(DIF, 0), 24) / reference_sma(np.abs(DIF), 24) * 100, 3)
+        np.testing.assert_array_equal(np.asarray(rsi), np.asarray(expected))
+
+
+class TestNumpyLayer(unittest.TestCase):
+    """测试0级函数的返回类型、float32和out参数"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(4)
+        self.close = rng.normal(size=500).cumsum() + 100
+        self.close[7] = np.nan
+
+    def test_return_types(self):
+        """测试返回ndarray，结果与pandas实现一致"""
+        S = pd.Series(self.close)
+        cases = [(MyTT.REF(S, 2), S.shift(2)), (MyTT.REF(self.close, -3), S.shift(-3)),
+                 (MyTT.DIFF(S), S.diff()), (MyTT.DIFF(self.close, 5), S.diff(5)),
+                 (MyTT.EMA(S, 12), S.ewm(span=12, adjust=False).mean()), (MyTT.SMA(S, 6), reference_sma(self.close, 6))]
+        for result, expected in cases:
+            self.assertIs(type(result), np.ndarray)
+            np.testing.assert_array_equal(result, expected.values)
+
+    def test_short_series(self):
+        """测试序列长度不超过N时REF、DIFF全部为NAN，依赖它们的指标不报错"""
+        S = np.arange(5.)
+        for N in (5, 7, -5, -7):
+            self.assertTrue(np.isnan(MyTT.REF(S, N)).all())
+            self.assertTrue(np.isnan(MyTT.DIFF(S, N)).all())
+        self.assertTrue(np.isnan(MyTT.REF(np.arange(10.).reshape(5, 2), 6)).all())
+        self.assertEqual(len(MyTT.RSI(S, 24)), 5)
+        self.assertEqual(len(MyTT.MTM(S, 12)[0]), 5)
+
+    def test_float32(self):
+        """测试float32输入返回float32"""
+        S = self.close.astype(np.float32)
+        for func, args in ((MyTT.MA, (5,)), (MyTT.STD, (5,)), (MyTT.SUM, (5,)), (MyTT.HHV, (5,)), (MyTT.LLV, (5,)),
+                           (MyTT.EMA, (5,)), (MyTT.SMA, (5,)), (MyTT.REF, (1,)), (MyTT.DIFF, ()), (MyTT.AVEDEV, (5,))):
+            result = func(S, *args)
+            self.assertEqual(result.dtype, np.float32, func.__name__)
+            np.testing.assert_allclose(result, func(S.astype(np.float64), *args), rtol=1e-5, atol=1e-4)
+        self.assertTrue(all(R.dtype == np.float32 for R in MyTT.MACD(S) + MyTT.BOLL(S)))
+        self.assertEqual(MyTT.MA(np.arange(50), 5).dtype, np.float64)
+
+    def test_out(self):
+        """测试结果写入out"""
+        out = np.empty_like(self.close)
+        for func, args in ((MyTT.MA, (5,)), (MyTT.STD, (5,)), (MyTT.HHV, (5,)), (MyTT.EMA, (5,)),
+                           (MyTT.SMA, (5,)), (MyTT.REF, (1,)), (MyTT.DIFF, (1,))):
+            self.assertIs(func(self.close, *args, out=out), out)
+            np.testing.assert_array_equal(out, func(self.close, *args))
+        with self.assertRaises(ValueError):
+            MyTT.MA(self.close, 5, out=np.empty(3))
+
+
+class TestConditionSeries(unittest.TestCase):
+    """测试BARSLAST、LAST、BARSCOUNT、VALUEWHEN的序列版本"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(9)
+        self.close = rng.normal(size=(120, 4)).cumsum(axis=0) + 20
+        self.close[:5, 1] = np.nan
+        self.cond = rng.random((120, 4)) < 0.15
+        self.cond[:, 3] = False
+
+    def test_against_loops(self):
+        """测试与逐周期循环的结果一致，面板每列与单独计算一致"""
+        for j in range(4):
+            cond, close = self.cond[:, j], self.close[:, j]
+            barslast, valuewhen, last = [], [], []
+            previous = None
+            for i in range(len(cond)):
+                if cond[i]:
+                    previous = i
+                barslast.append(np.nan if previous is None else i - previous)
+                valuewhen.append(np.nan if previous is None else close[previous])
+                last.append(i >= 5 and bool(cond[i - 5:i - 1].all()))
+            np.testing.assert_array_equal(MyTT.BARSLAST(cond), barslast)
+            np.testing.assert_array_equal(MyTT.VALUEWHEN(cond, close), valuewhen)
+            np.testing.assert_array_equal(MyTT.LAST(cond, 5, 2), last)
+            np.testing.assert_array_equal(MyTT.BARSLAST(self.cond)[:, j], barslast)
+            np.testing.assert_array_equal(MyTT.VALUEWHEN(self.cond, self.close)[:, j], valuewhen)
+            np.testing.assert_array_equal(MyTT.LAST(self.cond, 5, 2)[:, j], last)
+
+    def test_barscount(self):
+        """测试从第一个有效数据开始计数"""
+        count = MyTT.BARSCOUNT(self.close)
+        np.testing.assert_array_equal(count[:, 0], np.arange(1, 121))
+        self.assertTrue(np.isnan(count[:5, 1]).all())
+        np.testing.assert_array_equal(count[5:, 1], np.arange(1, 116))
+        np.testing.assert_array_equal(MyTT.BARSCOUNT(self.close[:, 1]), count[:, 1])
+
+    def test_last_window(self):
+        """测试LAST包含前A日和前B日，B为0时包含当前周期"""
+        S = np.array([1, 1, 1, 0, 1, 1, 1], dtype=bool)
+        np.testing.assert_array_equal(MyTT.LAST(S, 2, 0), [False, False, True, False, False, False, True])
+        np.testing.assert_array_equal(MyTT.LAST(S, 3, 1), [False, False, False, True, False, False, False])
+        np.testing.assert_array_equal(MyTT.VALUEWHEN(S, 7.0), np.full(7, 7.0))
+
+
+class TestPanel(unittest.TestCase):
+    """测试二维面板(K线 × 股票)计算"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(3)
+        self.close = rng.normal(size=(300, 6)).cumsum(axis=0) + 50
+        self.high = self.close + rng.random((300, 6))
+        self.low = self.close - rng.random((300, 6))
+        self.close[10, 2] = np.nan
+
+    def assert_columns_match(self, panel_result, func, *args):
+        """面板结果的每一列应与对该股票单独计算的结果一致"""
+        panel_result = panel_result if isinstance(panel_result, tuple) else (panel_result,)
+        for j in range(self.close.shape[1]):
+            single = func(*[a[:, j] if isinstance(a, np.ndarray) and a.ndim == 2 else a for a in args])
+            single = single if isinstance(single, tuple) else (single,)
+            for expected, actual in zip(single, panel_result):
+                np.testing.assert_allclose(np.asarray(actual)[:, j], np.asarray(expected, dtype=float),
+                                           rtol=1e-9, atol=1e-9)
+
+    def test_indicators(self):
+        """测试常用指标在面板上按列计算"""
+        C, H, L = self.close, self.high, self.low
+        cases = [(MyTT.MA, C, 5), (MyTT.EMA, C, 12), (MyTT.REF, C, 1), (MyTT.HHV, H, 9),
+                 (MyTT.LLV, L, 9), (MyTT.MACD, C), (MyTT.KDJ, C, H, L), (MyTT.RSI, C),
+                 (MyTT.BOLL, C), (MyTT.ATR, C, H, L), (MyTT.CCI, C, H, L), (MyTT.DMI, C, H, L),
+                 (MyTT.LINREG, C, 10)]
+        for func, *args in cases:
+            self.assert_columns_match(func(*args), func, *args)
+        np.testing.assert_array_equal(MyTT.SMA(C, 6)[:, 0], MyTT.SMA(C[:, 0], 6))
+        self.assertEqual(MyTT.CROSS(MyTT.MA(C, 5), MyTT.MA(C, 10)).shape, C.shape)
+        self.assertEqual(MyTT.BARSLAST(C > 60).shape, C.shape)
+        self.assertTrue(np.isnan(MyTT.BARSLAST(C[:, 0] > 1000)).all())
+
+    def test_wide_frame(self):
+        """测试宽表DataFrame"""
+        index = pd.date_range('2025-02-24 09:31', periods=300, freq='1min')
+        frame = pd.DataFrame(self.close, index=index, columns=[f's{j}' for j in range(6)])
+        dif, dea, macd = MyTT.PANEL(MyTT.MACD, frame)
+        self.assertIsInstance(dif, pd.DataFrame)
+        self.assertTrue(dif.index.equals(index))
+        np.testing.assert_array_equal(dif.values, MyTT.MACD(self.close)[0])
+        with self.assertRaises(ValueError):
+            MyTT.PANEL(MyTT.KDJ, frame, frame.iloc[:, :3], frame)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+进程管理和多进程工作池的单元测试
+"""
+
+import os
+import shutil
+import multiprocessing as mp
+import tempfile
+import unittest
+from unittest.mock import patch
+import pandas as pd
+from src.core.http_pool import get_default_pool
+from src.core.process import ProcessManager, WorkerPool
+from src.features.stock_manager import StockDataManager
+
+_marker_dir = None
+
+def _square(item):
+    return item * item, os.getpid(), id(get_default_pool())
+
+def _flaky(item):
+    """每个任务第一次执行时失败，item为'crash'时第一次直接退出进程"""
+    marker = os.path.join(_marker_dir, str(item))
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        if item == 'crash':
+            os._exit(1)
+        raise ValueError(f"first attempt {item}")
+    return item
+
+def _always_fail(item):
+    raise RuntimeError("boom")
+
+def _set_marker_dir(path):
+    global _marker_dir
+    _marker_dir = path
+
+
+class TestWorkerPool(unittest.TestCase):
+    """测试多进程工作池"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def test_map(self):
+        """测试任务分片到多个进程，每个进程使用自己的连接池"""
+        pool = WorkerPool(_square, workers=3)
+        calls = []
+        results = pool.map(range(20), progress=lambda done, total, item, ok: calls.append((done, total)))
+        self.assertEqual({item: value[0] for item, (ok, value) in results.items()},
+                         {i: i * i for i in range(20)})
+        self.assertEqual(len({value[1] for ok, value in results.values()}), 3)
+        self.assertNotIn(os.getpid(), {value[1] for ok, value in results.values()})
+        self.assertEqual(calls[-1], (20, 20))
+        self.assertEqual(pool.stats()['succeeded'], 20)
+        self.assertEqual(pool.process_manager.processes, {})
+
+    def test_retry_and_restart(self):
+        """测试失败的任务重试，异常退出的工作进程被重启"""
+        pool = WorkerPool(_flaky, workers=2, retries=1, initializer=_set_marker_dir, initargs=(self.temp_dir,))
+        results = pool.map(['a', 'b', 'crash', 'c'])
+        self.assertTrue(all(ok for ok, _ in results.values()), results)
+        stats = pool.stats()
+        self.assertGreaterEqual(stats['retried'], 2)
+        self.assertEqual(stats['restarts'], 1)
+        self.assertEqual(stats['succeeded'], 4)
+
+        results = WorkerPool(_always_fail, workers=2, retries=2).map(['x'])
+        self.assertEqual(results, {'x': (False, 'RuntimeError: boom')})
+
+    def test_early_exit(self):
+        """测试中途停止迭代时关闭工作进程"""
+        manager = ProcessManager()
+        pool = WorkerPool(_square, workers=2, process_manager=manager)
+        for item, ok, value in pool.run(range(100)):
+            break
+        self.assertEqual(manager.processes, {})
+        self.assertEqual(list(WorkerPool(_square).run([])), [])
+
+
+class TestBackfill(unittest.TestCase):
+    """测试多进程批量下载"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.data = pd.DataFrame({'open': [10.0, 10.5], 'close': [10.2, 10.8], 'high': [10.3, 10.9],
+                                  'low': [9.9, 10.4], 'volume': [1e5, 2e5]},
+                                 index=pd.to_datetime(['2025-02-24', '2025-02-25']))
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    @unittest.skipUnless(mp.get_start_method() == 'fork', "工作进程需继承父进程中的mock")
+    @patch('src.features.stock_manager.get_price')
+    def test_backfill(self, mock_get_price):
+        """测试每个(股票, 频率)由工作进程下载并保存"""
+        mock_get_price.side_effect = lambda code, **kwargs: pd.DataFrame() if code == 'sz000002' else self.data
+        manager = StockDataManager()
+        manager.initialize({'data_dir': self.temp_dir})
+        results = manager.backfill(['sh600000', 'sz000001', 'sz000002'], ['1d', '5m'], workers=2, retries=0)
+        self.assertEqual(len(results), 6)
+        self.assertTrue(results[('sh600000', '5m')][0])
+        self.assertEqual(results[('sz000002', '1d')], (False, 'RuntimeError: 未获取到数据'))
+        self.assertEqual(len(manager.load_cached_data('sz000001', '5m')), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
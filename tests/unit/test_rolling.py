@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+滑动窗口内核的单元测试
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.lib import rolling
+
+
+class TestRollingKernels(unittest.TestCase):
+    """测试滑动窗口内核"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        rng = np.random.default_rng(1)
+        self.data = rng.normal(size=5000).cumsum() + 1000
+        self.data[100] = np.nan
+        self.series = pd.Series(self.data)
+
+    def test_max_min(self):
+        """测试滑动最大值和最小值与pandas完全一致"""
+        for N in (1, 5, 14, 60):
+            np.testing.assert_array_equal(rolling.rolling_max(self.data, N),
+                                          self.series.rolling(N).max().values)
+            np.testing.assert_array_equal(rolling.rolling_min(self.data, N),
+                                          self.series.rolling(N).min().values)
+        self.assertTrue(np.isnan(rolling.rolling_max([1.0, 2.0], 5)).all())
+        with self.assertRaises(ValueError):
+            rolling.rolling_max(self.data, 0)
+
+    def test_sum_mean_std(self):
+        """测试滑动求和、均值和标准差"""
+        windows = np.lib.stride_tricks.sliding_window_view(self.data, 20)
+        np.testing.assert_allclose(rolling.rolling_sum(self.data, 20)[19:], windows.sum(axis=1), rtol=1e-12)
+        np.testing.assert_allclose(rolling.rolling_mean(self.data, 20),
+                                   self.series.rolling(20).mean().values, rtol=1e-12)
+        np.testing.assert_allclose(rolling.rolling_std(self.data, 20)[19:], windows.std(axis=1), rtol=1e-8)
+        np.testing.assert_allclose(rolling.rolling_std(self.data, 20, ddof=1)[19:],
+                                   windows.std(axis=1, ddof=1), rtol=1e-8)
+        np.testing.assert_array_equal(rolling.rolling_sum([1.0, np.inf, 2.0, 3.0], 2),
+                                      [np.nan, np.inf, np.inf, 5.0])
+
+    def test_compensated_sum(self):
+        """测试补偿求和在长序列上不累积误差"""
+        data = np.full(100001, 0.1)
+        data[::2] = 1e8
+        self.assertEqual(rolling.rolling_sum(data, 3)[-1], 1e8 + 0.1 + 1e8)
+
+    def test_mad(self):
+        """测试滑动平均绝对偏差"""
+        expected = self.series.rolling(14).apply(lambda x: np.abs(x - x.mean()).mean(), raw=True).values
+        np.testing.assert_allclose(rolling.rolling_mad(self.data, 14), expected, rtol=1e-12)
+
+    def test_linreg(self):
+        """测试滑动线性回归与逐窗口最小二乘拟合一致"""
+        data = self.data[200:]
+        slope, intercept, forecast, r2 = rolling.rolling_linreg(data, 20)
+        x = np.arange(20)
+        for i in range(19, len(data), 97):
+            window = data[i - 19:i + 1]
+            poly = np.polyfit(x, window, 1)
+            fitted = np.polyval(poly, x)
+            expected_r2 = 1 - ((window - fitted) ** 2).sum() / ((window - window.mean()) ** 2).sum()
+            np.testing.assert_allclose([slope[i], intercept[i], forecast[i], r2[i]],
+                                       [poly[0], poly[1], np.polyval(poly, 20), expected_r2], rtol=1e-9)
+        self.assertTrue(np.isnan(rolling.rolling_linreg(self.data, 20)[0][100:119]).all())
+
+    def test_linreg_long_series(self):
+        """测试长序列末尾窗口的回归精度不随序列长度下降"""
+        data = np.random.default_rng(7).normal(size=1_000_000).cumsum() + 100
+        slope, intercept, forecast, r2 = rolling.rolling_linreg(data, 20)
+        poly = np.polyfit(np.arange(20), data[-20:], 1)
+        np.testing.assert_allclose([slope[-1], intercept[-1], forecast[-1]],
+                                   [poly[0], poly[1], np.polyval(poly, 20)], rtol=1e-9)
+
+    def test_panel(self):
+        """测试二维面板沿时间轴按列计算"""
+        panel = np.column_stack([self.data, self.data[::-1], np.arange(len(self.data), dtype=float)])
+        for func in (rolling.rolling_max, rolling.rolling_min, rolling.rolling_sum,
+                     rolling.rolling_std, rolling.rolling_mad):
+            result = func(panel, 14)
+            self.assertEqual(result.shape, panel.shape)
+            for j in range(panel.shape[1]):
+                np.testing.assert_allclose(result[:, j], func(panel[:, j], 14), rtol=1e-9, atol=1e-12)
+        slope = rolling.rolling_linreg(panel, 14)[0]
+        np.testing.assert_allclose(slope[13:, 2], 1.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
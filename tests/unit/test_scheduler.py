@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+K线轮询调度器的单元测试
+"""
+
+import threading
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+from src.controllers.scheduler import BarScheduler
+
+
+class TestBarScheduler(unittest.TestCase):
+    """测试按K线收盘时间轮询"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.controller = MagicMock()
+        self.controller.get_stock_data_batch.side_effect = \
+            lambda codes, frequency, count, incremental: {code: (True, f"{code}_{frequency}") for code in codes}
+        self.scheduler = BarScheduler(self.controller, delay=3)
+        self.scheduler.watch('sh600000', ['1m', '5m'])
+        self.scheduler.watch('sz000001', ['5m', '60m'])
+
+    def fetched(self):
+        return {(call.args[1], tuple(call.args[0])) for call in self.controller.get_stock_data_batch.call_args_list}
+
+    def test_only_rolled_over_frequencies(self):
+        """测试只获取刚刚收盘的周期，收盘前不重复请求"""
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 35, 5))
+        self.assertEqual(len(self.fetched()), 3)  # 启动时补齐各周期
+
+        self.controller.get_stock_data_batch.reset_mock()
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 35, 30))
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 36, 1))  # 收盘后未到delay
+        self.assertEqual(self.fetched(), set())
+
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 36, 4))
+        self.assertEqual(self.fetched(), {('1m', ('sh600000',))})
+        self.controller.get_stock_data_batch.reset_mock()
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 40, 3))
+        self.assertEqual(self.fetched(), {('1m', ('sh600000',)), ('5m', ('sh600000', 'sz000001'))})
+        self.assertTrue(all(call.kwargs['incremental']
+                            for call in self.controller.get_stock_data_batch.call_args_list))
+
+        # 午休期间没有新K线，13:01之后才有1m
+        self.scheduler.run_once(datetime(2025, 2, 24, 11, 30, 3))
+        self.controller.get_stock_data_batch.reset_mock()
+        self.scheduler.run_once(datetime(2025, 2, 24, 12, 30))
+        self.assertEqual(self.fetched(), set())
+        self.assertEqual(self.scheduler.next_wakeup(datetime(2025, 2, 24, 12, 30)), datetime(2025, 2, 24, 13, 1, 3))
+        self.assertEqual(self.scheduler.next_wakeup(datetime(2025, 2, 24, 15, 0, 10)), datetime(2025, 2, 25, 9, 31, 3))
+
+    def test_failed_symbols_retry(self):
+        """测试失败的股票在下一轮重新获取，成功的不再请求"""
+        self.controller.get_stock_data_batch.side_effect = \
+            lambda codes, frequency, count, incremental: {code: (code != 'sz000001', '') for code in codes}
+        self.scheduler.run_once(datetime(2025, 2, 24, 10, 30, 5))
+        self.controller.get_stock_data_batch.reset_mock()
+        self.assertEqual(self.scheduler.due(datetime(2025, 2, 24, 10, 30, 20)),
+                         {'5m': (datetime(2025, 2, 24, 10, 30), ['sz000001']),
+                          '60m': (datetime(2025, 2, 24, 10, 30), ['sz000001'])})
+        self.scheduler.unwatch('sz000001')
+        self.assertEqual(self.scheduler.due(datetime(2025, 2, 24, 10, 30, 20)), {})
+        self.assertEqual(self.scheduler.stats()['failed'], 2)
+
+    def test_overlapping_ticks_collapse(self):
+        """测试上一轮未结束时新的一轮被合并"""
+        entered, release = threading.Event(), threading.Event()
+
+        def slow(codes, frequency, count, incremental):
+            entered.set()
+            release.wait(5)
+            return {code: (True, '') for code in codes}
+
+        self.controller.get_stock_data_batch.side_effect = slow
+        worker = threading.Thread(target=self.scheduler.run_once, args=(datetime(2025, 2, 24, 9, 45, 5),))
+        worker.start()
+        entered.wait(5)
+        self.assertEqual(self.scheduler.run_once(datetime(2025, 2, 24, 9, 46, 5)), {})
+        release.set()
+        worker.join()
+        self.assertEqual(self.scheduler.stats()['collapsed'], 1)
+        # 补齐时一次请求覆盖重叠期间收盘的K线
+        self.controller.get_stock_data_batch.reset_mock()
+        self.controller.get_stock_data_batch.side_effect = None
+        self.controller.get_stock_data_batch.return_value = {'sh600000': (True, '')}
+        self.scheduler.run_once(datetime(2025, 2, 24, 9, 48, 5))
+        self.assertEqual(self.fetched(), {('1m', ('sh600000',))})
+
+    def test_invalid_frequency(self):
+        """测试不支持的周期"""
+        with self.assertRaises(ValueError):
+            self.scheduler.watch('sh600000', ['1d'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+证券主数据检索的单元测试
+"""
+
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from src.core.http_pool import HttpPool
+from src.features.security_master import SecurityMaster
+from src.utils.pinyin import pinyin_initials
+
+
+class TestSecurityMasterSearch(unittest.TestCase):
+    """测试证券检索"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.master = SecurityMaster()
+        self.master.initialize({'path': 'unused.json'})
+        self.master._set_securities([
+            {'code': 'sz000001', 'name': '平安银行'},
+            {'code': 'sh600000', 'name': '浦发银行'},
+            {'code': 'sh600004', 'name': '白云机场'},
+            {'code': 'sh600036', 'name': '招商银行'},
+            {'code': 'sz300718', 'name': '长盛轴承'},
+            {'code': 'sh601988', 'name': '中国银行'},
+            {'code': 'sz000166', 'name': '申万宏源'},
+        ], time.time())
+
+    def codes(self, keyword, limit=None):
+        return [s['code'] for s in self.master.search(keyword, limit)]
+
+    def test_code_search(self):
+        """测试代码检索"""
+        self.assertEqual(self.codes('600000'), ['sh600000'])
+        self.assertEqual(self.codes('6000'), ['sh600000', 'sh600004', 'sh600036'])
+        self.assertEqual(self.codes('sh600036'), ['sh600036'])
+        self.assertEqual(self.codes('000001.XSHE'), ['sz000001'])
+        self.assertEqual(self.codes('000001.XSHG'), [])
+        self.assertEqual(self.codes('sz0001'), ['sz000166'])
+
+    def test_name_search(self):
+        """测试名称检索与排序"""
+        # 精确 > 前缀 > 子串
+        self.assertEqual(self.codes('中国银行'), ['sh601988'])
+        self.assertEqual(self.codes('银行')[:4], ['sz000001', 'sh600000', 'sh600036', 'sh601988'])
+        self.assertEqual(self.codes('招商'), ['sh600036'])
+        self.assertEqual(self.codes('不存在'), [])
+
+    def test_pinyin_search(self):
+        """测试拼音首字母检索"""
+        self.assertEqual(self.codes('pfyh'), ['sh600000'])
+        self.assertEqual(self.codes('PFYH'), ['sh600000'])
+        self.assertEqual(self.codes('zgyh'), ['sh601988'])
+        self.assertEqual(self.codes('cs'), ['sz300718'])
+        self.assertEqual(set(self.codes('yh')), {'sz000001', 'sh600000', 'sh600036', 'sh601988'})
+
+    def test_limit(self):
+        """测试返回结果数量限制"""
+        self.assertEqual(len(self.codes('银行', limit=2)), 2)
+        self.assertEqual(self.codes('6000', limit=1), ['sh600000'])
+
+    def test_pinyin_initials(self):
+        """测试拼音首字母工具"""
+        self.assertIn('pfyh', pinyin_initials('浦发银行'))
+        self.assertEqual(pinyin_initials('贵州茅台'), ['gzmt'])
+        self.assertEqual(pinyin_initials('*ST康美'), ['stkm'])
+        self.assertEqual(pinyin_initials(''), [])
+
+class TestSecurityMasterRefresh(unittest.TestCase):
+    """测试分页下载证券列表"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'security_master.json')
+        self.http = MagicMock(spec=HttpPool)
+        self.master = SecurityMaster()
+        self.master.initialize({'path': self.path, 'nodes': ['sh_a'], 'page_size': 2,
+                                'http_pool': self.http})
+
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+
+    def respond(self, pages):
+        """按页码返回响应，pages为页码 -> (状态码, 证券列表)"""
+        def get(url):
+            page = int(url.split('page=')[1].split('&')[0])
+            status, stocks = pages.get(page, (200, []))
+            return MagicMock(status_code=status, text=json.dumps(stocks) if status == 200 else '')
+        self.http.get.side_effect = get
+
+    def test_failed_page(self):
+        """测试中途某一页失败时保留原有的证券列表"""
+        self.respond({1: (200, [{'symbol': 'sh600000', 'name': '浦发银行'}, {'symbol': 'sh600004', 'name': '白云机场'}]),
+                      2: (200, [{'symbol': 'sh600036', 'name': '招商银行'}])})
+        self.assertTrue(self.master.refresh())
+        self.assertEqual(len(self.master.securities), 3)
+        with open(self.path, encoding='utf-8') as f:
+            saved = f.read()
+
+        self.respond({1: (200, [{'symbol': 'sh600000', 'name': '浦发银行'}, {'symbol': 'sh600004', 'name': '白云机场'}]),
+                      2: (500, None)})
+        self.assertFalse(self.master.refresh())
+        self.assertEqual(len(self.master.securities), 3)
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(f.read(), saved)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -5,6 +5,9 @@
 股票数据获取模块的单元测试
 """
 
+import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 from src.features.stock_fetcher import StockDataFetcher
@@ -14,7 +17,14 @@ class TestStockDataFetcher(unittest.TestCase):
     
     def setUp(self):
         """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.master_path = os.path.join(self.temp_dir, "security_master.json")
         self.fetcher = StockDataFetcher()
+        self.fetcher.initialize({'security_master': {'path': self.master_path}})
+    
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
     
     def test_frequency_map(self):
         """测试频率映射字典"""
@@ -28,7 +38,7 @@ class TestStockDataFetcher(unittest.TestCase):
         }
         self.assertEqual(self.fetcher.frequency_map, expected_map)
     
-    @patch('requests.get')
+    @patch('src.core.http_pool.HttpPool.get')
     def test_get_stock_name_tencent(self, mock_get):
         """测试从腾讯接口获取股票名称"""
         # 模拟腾讯接口返回数据
@@ -42,7 +52,7 @@ class TestStockDataFetcher(unittest.TestCase):
         self.assertEqual(self.fetcher.get_stock_name('300718.XSHE'), '测试股票')
         self.assertEqual(self.fetcher.get_stock_name('300718'), '测试股票')
     
-    @patch('requests.get')
+    @patch('src.core.http_pool.HttpPool.get')
     def test_get_stock_name_sina(self, mock_get):
         """测试从新浪接口获取股票名称"""
         # 模拟腾讯接口失败，新浪接口成功
@@ -58,7 +68,7 @@ class TestStockDataFetcher(unittest.TestCase):
         mock_get.side_effect = mock_get_response
         self.assertEqual(self.fetcher.get_stock_name('sz300718'), '测试股票')
     
-    @patch('requests.get')
+    @patch('src.core.http_pool.HttpPool.get')
     def test_fuzzy_match_stock(self, mock_get):
         """测试模糊匹配股票功能"""
         def mock_get_response(url):
@@ -102,11 +112,84 @@ class TestStockDataFetcher(unittest.TestCase):
         mock_get.side_effect = mock_empty_response
         matches = self.fetcher.fuzzy_match_stock('不存在的公司')
         self.assertEqual(len(matches), 0)
+        
+        # 证券列表已持久化，新的获取器无需访问网络
+        self.assertTrue(os.path.exists(self.master_path))
+        fetcher = StockDataFetcher()
+        fetcher.initialize({'security_master': {'path': self.master_path}})
+        with patch('src.core.http_pool.HttpPool.get', side_effect=Exception('网络错误')) as mock_offline:
+            matches = fetcher.fuzzy_match_stock('银行')
+            self.assertEqual(matches, [{'code': '600000', 'name': '测试银行'}])
+            mock_offline.assert_not_called()
+    
+    @patch('src.core.http_pool.HttpPool.get')
+    def test_fuzzy_match_paging(self, mock_get):
+        """测试分页下载完整的证券列表"""
+        def mock_get_response(url):
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            page = int(url.split('page=')[1].split('&')[0])
+            if 'node=sh_a' in url and page <= 3:
+                mock_response.text = f'[{{"symbol": "sh60000{page}", "name": "第{page}页银行"}}]'
+            else:
+                mock_response.text = 'null'
+            return mock_response
+        
+        mock_get.side_effect = mock_get_response
+        matches = self.fetcher.fuzzy_match_stock('银行')
+        self.assertEqual([m['code'] for m in matches], ['sh600001', 'sh600002', 'sh600003'])
+        self.assertEqual(self.fetcher.fuzzy_match_stock('3页'), [{'code': 'sh600003', 'name': '第3页银行'}])
     
+    @patch('src.core.http_pool.HttpPool.get')
+    def test_batch_names_and_cache(self, mock_get):
+        """测试按批请求名称，新浪补齐腾讯缺失的代码，名称缓存持久化"""
+        def mock_get_response(url):
+            mock_response = MagicMock()
+            mock_response.status_code = 200
+            codes = url.split('=', 1)[1].split(',')
+            if 'qt.gtimg.cn' in url:
+                mock_response.text = ''.join(f'v_{code}="1~名称{code[2:]}~{code[2:]}~10.5~10.0";\n'
+                                             for code in codes if code != 'sh600999')
+            else:
+                mock_response.text = ''.join(f'var hq_str_{code}="新浪{code[2:]},10.1,10.0";\n' for code in codes)
+            return mock_response
+
+        mock_get.side_effect = mock_get_response
+        codes = [f"{600000 + i}" for i in range(130)] + ['300718.XSHE', 'sh600999']
+        names = self.fetcher.get_stock_names(codes)
+        self.assertEqual(names['600001'], '名称600001')
+        self.assertEqual(names['300718.XSHE'], '名称300718')
+        self.assertEqual(names['sh600999'], '新浪600999')
+        # 132个代码：腾讯3批，新浪1批
+        self.assertEqual(mock_get.call_count, 4)
+
+        fetcher = StockDataFetcher()
+        fetcher.initialize({'security_master': {'path': self.master_path}})
+        with patch('src.core.http_pool.HttpPool.get', side_effect=Exception('网络错误')) as mock_offline:
+            self.assertEqual(fetcher.get_stock_name('sz300718'), '名称300718')
+            mock_offline.assert_not_called()
+
+    @patch('src.core.http_pool.HttpPool.get')
+    def test_get_quotes(self, mock_get):
+        """测试解析腾讯行情字段"""
+        fields = ['1', '浦发银行', '600000', '10.50', '10.40', '10.45', '123456'] + [''] * 23 + \
+                 ['20250224150003', '0.10', '0.96', '10.60', '10.30', '', '', '12345.6'] + [''] * 10
+        mock_response = MagicMock()
+        mock_response.status_code = 200
+        mock_response.text = f'v_sh600000="{"~".join(fields)}";'
+        mock_get.return_value = mock_response
+        quote = self.fetcher.get_quotes(['600000'])['600000']
+        self.assertEqual(quote['name'], '浦发银行')
+        self.assertEqual((quote['price'], quote['prev_close'], quote['open']), (10.5, 10.4, 10.45))
+        self.assertEqual((quote['high'], quote['low']), (10.6, 10.3))
+        self.assertEqual(quote['volume'], 12345600)
+        self.assertAlmostEqual(quote['amount'], 123456000)
+        self.assertEqual(quote['time'], '2025-02-24 15:00:03')
+
     def test_error_handling(self):
         """测试错误处理"""
         # 测试网络请求失败的情况
-        with patch('requests.get', side_effect=Exception('网络错误')):
+        with patch('src.core.http_pool.HttpPool.get', side_effect=Exception('网络错误')):
             self.assertEqual(self.fetcher.get_stock_name('300718'), '未知股票')
             self.assertEqual(self.fetcher.fuzzy_match_stock('测试'), [])
 
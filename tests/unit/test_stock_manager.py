@@ -6,6 +6,8 @@
 """
 
 import os
+import shutil
+import tempfile
 import unittest
 from unittest.mock import patch, MagicMock
 import pandas as pd
@@ -85,5 +87,61 @@ class TestStockDataManager(unittest.TestCase):
         # 测试重复初始化
         self.assertTrue(self.manager.initialize())
 
+class TestIncrementalFetch(unittest.TestCase):
+    """测试增量获取"""
+    
+    def setUp(self):
+        """测试前的准备工作"""
+        self.temp_dir = tempfile.mkdtemp()
+        self.manager = StockDataManager()
+        self.manager.initialize({'data_dir': self.temp_dir})
+        self.history = pd.DataFrame({
+            'open': [1.0, 2.0, 3.0],
+            'high': [1.0, 2.0, 3.0],
+            'low': [1.0, 2.0, 3.0],
+            'close': [1.0, 2.0, 3.0],
+            'volume': [10.0, 20.0, 30.0]
+        }, index=pd.to_datetime(['2025-02-24 14:50', '2025-02-24 14:55', '2025-02-24 15:00']))
+    
+    def tearDown(self):
+        """测试后的清理工作"""
+        shutil.rmtree(self.temp_dir)
+    
+    @patch('src.features.stock_manager.count_bars_between')
+    @patch('src.features.stock_manager.get_price')
+    def test_incremental_merge(self, mock_get_price, mock_count):
+        """测试只获取缺失的K线并覆盖最后一根K线"""
+        mock_get_price.return_value = self.history
+        self.assertTrue(self.manager.get_and_save_stock_data('sh600000', '5m', count=800)[0])
+        
+        # 最后一根K线被修正，新增两根K线
+        tail = pd.DataFrame({
+            'open': [3.0, 4.0, 5.0],
+            'close': [3.5, 4.0, 5.0],
+            'high': [3.0, 4.0, 5.0],
+            'low': [3.0, 4.0, 5.0],
+            'volume': [35.0, 40.0, 50.0]
+        }, index=pd.to_datetime(['2025-02-24 15:00', '2025-02-25 09:35', '2025-02-25 09:40']))
+        mock_get_price.return_value = tail
+        mock_count.return_value = 2
+        
+        success, _ = self.manager.get_and_save_stock_data('sh600000', '5m', count=800, incremental=True)
+        self.assertTrue(success)
+        self.assertEqual(mock_get_price.call_args.kwargs['count'], 3)
+        
+        merged = self.manager.load_cached_data('sh600000', '5m')
+        self.assertEqual(len(merged), 5)
+        self.assertFalse(merged.index.duplicated().any())
+        self.assertEqual(list(merged.columns), list(self.history.columns))
+        self.assertEqual(merged['close'].tolist(), [1.0, 2.0, 3.5, 4.0, 5.0])
+    
+    @patch('src.features.stock_manager.get_price')
+    def test_incremental_without_history(self, mock_get_price):
+        """测试没有已保存数据时全量获取"""
+        mock_get_price.return_value = self.history
+        success, _ = self.manager.get_and_save_stock_data('sh600000', '5m', count=800, incremental=True)
+        self.assertTrue(success)
+        self.assertEqual(mock_get_price.call_args.kwargs['count'], 800)
+
 if __name__ == '__main__':
     unittest.main()
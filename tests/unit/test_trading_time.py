@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+交易时段工具的单元测试
+"""
+
+import unittest
+from datetime import datetime, time
+from src.utils.trading_time import bar_close_times, count_bars_between, next_bar_close, last_bar_close
+
+
+class TestTradingTime(unittest.TestCase):
+    """测试交易时段工具"""
+
+    def test_bar_close_times(self):
+        """测试K线收盘时间"""
+        self.assertEqual(bar_close_times('60m'), (time(10, 30), time(11, 30), time(14, 0), time(15, 0)))
+        closes = bar_close_times('5m')
+        self.assertEqual(len(closes), 48)
+        self.assertEqual(closes[0], time(9, 35))
+        self.assertEqual(closes[-1], time(15, 0))
+        self.assertEqual(len(bar_close_times('1m')), 240)
+
+    def test_count_intraday_bars(self):
+        """测试分钟线缺失数量"""
+        last = datetime(2025, 2, 24, 14, 40)  # 周一
+        self.assertEqual(count_bars_between(last, datetime(2025, 2, 24, 14, 52), '5m'), 2)
+        self.assertEqual(count_bars_between(last, datetime(2025, 2, 24, 20, 0), '5m'), 4)
+        self.assertEqual(count_bars_between(last, datetime(2025, 2, 25, 9, 40), '5m'), 6)
+        # 跨越周末只计算交易日
+        friday = datetime(2025, 2, 21, 15, 0)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 2, 24, 10, 0), '15m'), 2)
+        self.assertEqual(count_bars_between(friday, friday, '5m'), 0)
+
+    def test_next_and_last_bar_close(self):
+        """测试前后相邻的K线收盘时间"""
+        monday = datetime(2025, 2, 24, 9, 31, 20)
+        self.assertEqual(next_bar_close(monday, '5m'), datetime(2025, 2, 24, 9, 35))
+        self.assertEqual(next_bar_close(datetime(2025, 2, 24, 9, 35), '5m'), datetime(2025, 2, 24, 9, 40))
+        self.assertEqual(next_bar_close(datetime(2025, 2, 24, 11, 30), '60m'), datetime(2025, 2, 24, 14, 0))
+        self.assertEqual(next_bar_close(datetime(2025, 2, 21, 15, 0), '1m'), datetime(2025, 2, 24, 9, 31))
+        self.assertEqual(last_bar_close(monday, '5m'), datetime(2025, 2, 21, 15, 0))
+        self.assertEqual(last_bar_close(datetime(2025, 2, 24, 12, 10), '30m'), datetime(2025, 2, 24, 11, 30))
+        self.assertEqual(last_bar_close(datetime(2025, 2, 24, 14, 0), '60m'), datetime(2025, 2, 24, 14, 0))
+
+    def test_count_daily_bars(self):
+        """测试日线、周线、月线缺失数量"""
+        friday = datetime(2025, 2, 21)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 2, 23, 12, 0), '1d'), 0)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 2, 24, 12, 0), '1d'), 1)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 3, 7), '1d'), 10)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 3, 3), '1w'), 2)
+        self.assertEqual(count_bars_between(friday, datetime(2025, 4, 1), '1M'), 2)
+
+if __name__ == '__main__':
+    unittest.main()